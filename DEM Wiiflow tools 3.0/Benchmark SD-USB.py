@@ -0,0 +1,141 @@
+"""Benchmarks an SD card or USB drive with the same copy engine the transfers use.
+
+Writes a synthetic library (lots of cover sized files spread over a few
+system folders, like a real card, and a few ROM/bin sized ones) to a scratch
+folder on the drive, reads it back, prints the numbers and
+saves them as "benchmark metrics.json" next to this script, then deletes
+everything it wrote. Run it on different cards, hubs or thread counts and
+compare.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common import metrics, readback, transfer
+
+BENCHMARK_FOLDER = "wiiflow benchmark"
+COVER_FILES = 300
+COVER_FOLDERS = 4
+COVER_SIZE = 200 * 1024
+ROM_FILES = 2
+ROM_SIZE = 64 * 1024 * 1024
+
+def get_drives():
+    """Returns a list of available drives on the system."""
+    drives = []
+    if os.name == 'nt':  # Windows-based system
+        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            drive = f'{letter}:\\'
+            if os.path.exists(drive):
+                drives.append(drive)
+    else:
+        # For non-Windows systems (Linux, Mac), you can adapt this part
+        drives.append('/')  # Assuming root as the main drive
+    return drives
+
+def display_drives(drives):
+    """Displays available drives for the user to select."""
+    print("Available Drives:")
+    for i, drive in enumerate(drives):
+        print(f'{i + 1}. {drive}')
+
+def select_drive(drives):
+    """Allows user to select a drive."""
+    while True:
+        try:
+            choice = int(input("Select a drive number: "))
+            if 1 <= choice <= len(drives):
+                return drives[choice - 1]
+            else:
+                print("Invalid selection. Please select a valid drive number.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+def make_library(folder):
+    """Fills folder with the synthetic covers and ROMs."""
+    roms = os.path.join(folder, "roms")
+    os.makedirs(roms)
+    for i in range(COVER_FOLDERS):
+        os.makedirs(os.path.join(folder, "covers", f"system {i}"))
+    for i in range(COVER_FILES):
+        covers = os.path.join(folder, "covers", f"system {i % COVER_FOLDERS}")
+        with open(os.path.join(covers, f"cover {i:04d}.png"), 'wb') as f:
+            f.write(os.urandom(COVER_SIZE))
+    chunk = os.urandom(1024 * 1024)
+    for i in range(ROM_FILES):
+        with open(os.path.join(roms, f"game {i}.bin"), 'wb') as f:
+            for _ in range(ROM_SIZE // len(chunk)):
+                f.write(chunk)
+
+def ask_workers():
+    """Asks how many copy threads to use for small files."""
+    answer = input(f"Number of copy threads for small files (Enter for {transfer.COPY_WORKERS}): ").strip()
+    try:
+        return max(1, int(answer)) if answer else transfer.COPY_WORKERS
+    except ValueError:
+        return transfer.COPY_WORKERS
+
+def main():
+    script_directory = os.path.dirname(os.path.abspath(__file__))
+
+    # Get available drives
+    drives = get_drives()
+    if not drives:
+        print("No available drives found.")
+        return
+
+    # Display and select the drive to test
+    print("\nSelect the drive to benchmark:")
+    display_drives(drives)
+    destination_drive = select_drive(drives)
+    workers = ask_workers()
+
+    source_folder = tempfile.mkdtemp(prefix="wiiflow benchmark ")
+    destination_folder = os.path.join(destination_drive, BENCHMARK_FOLDER)
+    if os.path.exists(destination_folder):
+        shutil.rmtree(destination_folder)
+
+    try:
+        print("Creating the test files...")
+        make_library(source_folder)
+
+        benchmark_metrics = metrics.new_metrics()
+        plan = transfer.plan_folder_copy(source_folder, destination_folder, transfer_metrics=benchmark_metrics)
+        print(f"Writing {len(plan['jobs'])} files to {destination_folder}...")
+        stats = transfer.copy_files(plan, workers=workers, transfer_metrics=benchmark_metrics)
+        transfer.print_transfer_summary(stats)
+
+        # Flush the writes. readback reads around the file cache, so the numbers come from the drive.
+        if hasattr(os, 'sync'):
+            os.sync()
+        print("Reading them back...")
+        result = readback.measure_read_speed(destination_folder)
+        readback.print_read_speed(destination_folder, result)
+
+        report = metrics.summarize(benchmark_metrics)
+        small_files = sum(1 for job in plan['jobs'] if job['size'] < transfer.LARGE_FILE_SIZE)
+        small_seconds = report['phases'].get('copy small files', 0.0)
+        if small_files and small_seconds:
+            print(f"\nSmall files with {workers} threads: {small_files / small_seconds:.1f} files/s overall")
+        print("\nBy file size, per thread:")
+        for name, entry in report['size_classes'].items():
+            if entry['files']:
+                print(f"  {name}: {entry['files']} files, {entry['mb_per_second']:.1f} MB/s, "
+                      f"{entry['files_per_second']:.1f} files/s")
+        print(f"  os.makedirs: {report['calls']['makedirs']['seconds']:.3f}s, "
+              f"os.stat: {report['calls']['stat']['seconds']:.3f}s")
+
+        metrics.add_phase(benchmark_metrics, 'read back', result['read_seconds'])
+        path = metrics.write_metrics(benchmark_metrics, script_directory, "benchmark metrics.json")
+        print(f"Results saved to {path}")
+    finally:
+        shutil.rmtree(source_folder, ignore_errors=True)
+        shutil.rmtree(destination_folder, ignore_errors=True)
+
+    # Keep the script open and wait for user input to exit
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common import wfc
+from wiiflow_common.covercache import COVERS_FOLDER, build_cover_cache
+from wiiflow_common.systems import SYSTEMS
+
+def select_systems():
+    """Asks which systems to build the cover cache for and returns their table entries."""
+    print("\nSystems:")
+    for i, system in enumerate(SYSTEMS):
+        print(f'{i + 1}. {system["name"]}')
+    while True:
+        answer = input("Enter the numbers of the systems to build the cover cache for, separated by commas, or 'all': ").strip().lower()
+        if answer == 'all':
+            return list(SYSTEMS)
+        try:
+            choices = sorted({int(part) for part in answer.split(',') if part.strip()})
+        except ValueError:
+            print("Please enter numbers separated by commas, or 'all'.")
+            continue
+        if choices and all(1 <= choice <= len(SYSTEMS) for choice in choices):
+            return [SYSTEMS[choice - 1] for choice in choices]
+        print("Invalid selection. Please select valid system numbers.")
+
+def main():
+    # The tool folders sit next to this script
+    tools_directory = os.path.dirname(os.path.abspath(__file__))
+
+    print("Builds Wiiflow's cover cache from each tool's \"renamed cover art\" folder, so the Wii")
+    print("doesn't have to. Run it after the DAT tools, then transfer the covers as usual.")
+    if not wfc.pillow_available():
+        input("\nPress Enter to exit...")
+        return
+
+    systems = select_systems()
+
+    start = time.perf_counter()
+    for system in systems:
+        tool_folder = os.path.join(tools_directory, system['tool'])
+        if not os.path.isdir(os.path.join(tool_folder, COVERS_FOLDER)):
+            print(f"\n{system['name']}: no renamed cover art folder, skipping.")
+            continue
+        print(f"\n{system['name']}:")
+        built, up_to_date, failed = build_cover_cache(tool_folder)
+        print(f"{built} built, {up_to_date} already up to date, {failed} failed.")
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
+
+    # Keep the script open and wait for user input to exit
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
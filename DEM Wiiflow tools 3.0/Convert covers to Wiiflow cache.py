@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common import wfc
+from wiiflow_common.covercache import build_cache_folder
+
+def ask_folder(prompt):
+    while True:
+        folder = input(prompt).strip().strip('"')
+        if folder:
+            return folder
+        print("Please enter a folder.")
+
+def main():
+    # Usage: Convert covers to Wiiflow cache.py [covers folder] [cache folder]
+    # Asks for the folders that aren't given.
+    print("Converts a folder of cover PNGs into Wiiflow cache files (.wfc). Subfolders are kept,")
+    print("so the output folder can be copied straight to wiiflow/cache on the SD/USB drive.")
+    if not wfc.pillow_available():
+        input("\nPress Enter to exit...")
+        return
+
+    covers_folder = sys.argv[1] if len(sys.argv) > 1 else ask_folder("\nEnter the folder with the covers: ")
+    if not os.path.isdir(covers_folder):
+        print(f"{covers_folder} is not a folder.")
+        input("\nPress Enter to exit...")
+        return
+    cache_folder = sys.argv[2] if len(sys.argv) > 2 else ask_folder("Enter the folder to write the cache files to: ")
+
+    start = time.perf_counter()
+    built, up_to_date, failed = build_cache_folder(covers_folder, cache_folder)
+    print(f"{built} built, {up_to_date} already up to date, {failed} failed.")
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
+
+    # Keep the script open and wait for user input to exit
+    if len(sys.argv) <= 2:
+        input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
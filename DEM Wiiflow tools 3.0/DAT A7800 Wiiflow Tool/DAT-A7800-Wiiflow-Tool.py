@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import atarirom, covers, datindex, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -56,7 +62,7 @@ def list_a7800_games():
     if not os.path.exists(a7800_folder):
         print('The "a7800 games" folder does not exist.')
         return False
-    a78_files = [f for f in os.listdir(a7800_folder) if f.endswith('.a78')]
+    a78_files = [f for f in manifest.list_files(library_manifest, a7800_folder) if f.endswith('.a78')]
 
     if not a78_files:
         print('No .a78 files present in the "a7800 games" folder.')
@@ -89,11 +95,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "a7800 cover art" folder.')
         return False
@@ -165,7 +173,7 @@ def transfer_matching_cover_art(a78_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -278,6 +286,9 @@ def main():
                     a7800_folder = os.path.join(os.getcwd(), "a7800 games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    dat_titles = datindex.identify_games(a7800_folder, list_a7800_games() or [], header_size=atarirom.a78_header_size)
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         a78_files = list_a7800_games()
@@ -285,7 +296,8 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".a78"
@@ -366,7 +378,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -402,8 +414,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        a7800_games = [f for f in os.listdir(a7800_games_folder) if f.endswith('.a78')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.a78.png')]
+        a7800_games = [f for f in manifest.list_files(library_manifest, a7800_games_folder) if f.endswith('.a78')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.a78.png')]
 
         for game in a7800_games:
             expected_cover_art_name = game + ".png"
@@ -445,6 +457,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
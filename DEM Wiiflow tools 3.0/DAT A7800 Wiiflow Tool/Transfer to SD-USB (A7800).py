@@ -1,5 +1,9 @@
 import os
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common.covercache import cover_cache_transfers
+from wiiflow_common.transfer import ask_transfer_options, transfer_all
 
 def get_drives():
     """Returns a list of available drives on the system."""
@@ -32,27 +36,6 @@ def select_drive(drives):
         except ValueError:
             print("Please enter a valid number.")
 
-def transfer_folder_contents(source_folder, destination_folder):
-    """Transfers the contents of a folder to the destination."""
-    if not os.path.exists(source_folder):
-        print(f"The source folder {source_folder} does not exist.")
-        return
-    
-    if not os.path.exists(destination_folder):
-        os.makedirs(destination_folder)
-
-    try:
-        for item in os.listdir(source_folder):
-            s = os.path.join(source_folder, item)
-            d = os.path.join(destination_folder, item)
-            if os.path.isdir(s):
-                shutil.copytree(s, d, dirs_exist_ok=True)
-            else:
-                shutil.copy2(s, d)
-        print(f'Contents of {source_folder} have been successfully transferred to {destination_folder}')
-    except Exception as e:
-        print(f'An error occurred while transferring {source_folder}: {e}')
-
 def main():
     # Get the folder where this script is running
     script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -72,6 +55,12 @@ def main():
     display_drives(drives)
     destination_drive = select_drive(drives)
 
+    # Full copy, or only copy what changed since the last transfer
+    transfer_options = ask_transfer_options()
+
+    # Everything is queued first so it can be checked before copying starts
+    transfers = []
+
     # Set the destination path for Atari 7800 games
     destination_7800_path = os.path.join(destination_drive, "wii7800", "roms")
 
@@ -80,7 +69,7 @@ def main():
 
     if user_input_games == 'yes':
         # Transfer contents to the "wii7800/roms" folder
-        transfer_folder_contents(source_7800_games, destination_7800_path)
+        transfers.append((source_7800_games, destination_7800_path, transfer_options))
     else:
         print("Atari 7800 games transfer cancelled.")
 
@@ -92,10 +81,15 @@ def main():
         destination_cover_art_path = os.path.join(destination_drive, "wiiflow", "boxcovers", "Atari", "7800")
 
         # Transfer contents to the "wiiflow/boxcovers/Atari/7800" folder
-        transfer_folder_contents(source_renamed_cover_art, destination_cover_art_path)
+        transfers.append((source_renamed_cover_art, destination_cover_art_path, transfer_options))
+        # Pre-built Wiiflow cover cache, when "Build Wiiflow cover cache.py" made one
+        transfers.extend(cover_cache_transfers(script_directory, destination_cover_art_path, transfer_options))
     else:
         print("Cover art transfer cancelled.")
     
+    # Check that everything fits, then copy
+    transfer_all(transfers)
+
     # Keep the script open and wait for user input to exit
     input("\nPress Enter to exit...")
 
@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -54,7 +60,7 @@ def list_colecovision_games():
     if not os.path.exists(colecovision_folder):
         print('The "colecovision games" folder does not exist.')
         return False
-    col_files = [f for f in os.listdir(colecovision_folder) if f.endswith('.col')]
+    col_files = [f for f in manifest.list_files(library_manifest, colecovision_folder) if f.endswith('.col')]
 
     if not col_files:
         print('No .col files present in the "colecovision games" folder.')
@@ -87,11 +93,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "colecovision cover art" folder.')
         return False
@@ -164,7 +172,7 @@ def transfer_matching_cover_art(col_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -275,6 +283,9 @@ def main():
                     colecovision_folder = os.path.join(os.getcwd(), "colecovision games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    dat_titles = datindex.identify_games(colecovision_folder, list_colecovision_games() or [])
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         col_files = list_colecovision_games()
@@ -282,7 +293,8 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".col"
@@ -363,7 +375,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -399,8 +411,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        colecovision_games = [f for f in os.listdir(colecovision_games_folder) if f.endswith('.col')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.col.png')]
+        colecovision_games = [f for f in manifest.list_files(library_manifest, colecovision_games_folder) if f.endswith('.col')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.col.png')]
 
         for game in colecovision_games:
             expected_cover_art_name = game + ".png"
@@ -450,6 +462,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
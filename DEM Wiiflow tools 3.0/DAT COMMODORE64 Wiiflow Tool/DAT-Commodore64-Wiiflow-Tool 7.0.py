@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\((?!Disk \d+|Disk \d+ Side [A-C]|Side [A-C]).*?\)\s*|\s*\[(?!Disk \d+|Side [A-C]).*?\]\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -78,7 +84,7 @@ def list_commodore64_games():
         print('The "commodore64 games" folder does not exist.')
         return False
     valid_extensions = ['.tap', '.d64', '.t64', '.prg']
-    game_files = [f for f in os.listdir(commodore64_folder) if any(f.lower().endswith(ext) for ext in valid_extensions) and not f.lower().endswith('.crt')]
+    game_files = [f for f in manifest.list_files(library_manifest, commodore64_folder) if any(f.lower().endswith(ext) for ext in valid_extensions) and not f.lower().endswith('.crt')]
 
     if not game_files:
         print('No valid game files present in the "commodore64 games" folder.')
@@ -107,11 +113,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "commodore64 cover art" folder.')
         return False
@@ -269,7 +277,7 @@ def transfer_matching_cover_art(game_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        shutil.copy(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path, keep_original=True)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                         matched_files.add(game_file)  # Track the matched game file
                     except Exception as e:
@@ -302,7 +310,7 @@ def match_and_rename_cover_art_with_disk_info(game_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        shutil.copy(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path, keep_original=True)
                         print(f"Matched and renamed '{art_file}' to '{new_art_name}'")
                         
                         # Create additional copies for other disks or sides
@@ -314,7 +322,7 @@ def match_and_rename_cover_art_with_disk_info(game_files, art_files):
                                     additional_disk_info = f"(Disk {i})"
                                     additional_art_name = f"{art_file_base} {additional_disk_info}{ext}.png"
                                     additional_art_path = os.path.join(renamed_folder, additional_art_name)
-                                    shutil.copy(art_file, additional_art_path)
+                                    covers.materialize_cover(art_file, additional_art_path, keep_original=True)
                                     print(f"Created additional copy for '{additional_art_name}'")
                     except Exception as e:
                         print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -445,6 +453,9 @@ def main():
                     commodore64_folder = os.path.join(os.getcwd(), "commodore64 games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    dat_titles = datindex.identify_games(commodore64_folder, list_commodore64_games() or [])
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         game_files = list_commodore64_games()
@@ -452,7 +463,8 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + os.path.splitext(game_file)[1]
@@ -578,6 +590,7 @@ d888888b  .d88b.   .d88b.  db
 if __name__ == "__main__":
     try:
         main()
+        manifest.save_manifest(library_manifest)
     except Exception as e:
         print(f"An error occurred: {e}")
         input("Press Enter to exit...")
@@ -1,14 +1,20 @@
 import os
+import sys
 import time
 import re
 import difflib
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 def list_game_watch_games():
     game_watch_folder = os.path.join(os.getcwd(), "game&watch games")
     if not os.path.exists(game_watch_folder):
         print('The "game&watch games" folder does not exist.')
         return False
-    mgw_files = [f for f in os.listdir(game_watch_folder) if f.endswith('.mgw')]
+    mgw_files = [f for f in manifest.list_files(library_manifest, game_watch_folder) if f.endswith('.mgw')]
 
     if not mgw_files:
         print('No .mgw files present in the "game&watch games" folder.')
@@ -41,11 +47,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "game&watch cover art" folder.')
         return False
@@ -146,6 +154,9 @@ def main():
                     game_watch_folder = os.path.join(os.getcwd(), "game&watch games")
                     matches = []
                     already_matched = set()  # Track already matched files
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    dat_titles = datindex.identify_games(game_watch_folder, list_game_watch_games() or [])
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         mgw_files = list_game_watch_games()  # Update the list of mgw files
@@ -153,7 +164,8 @@ def main():
                             if game_file in already_matched:
                                 continue  # Skip already matched files
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".mgw"
@@ -239,7 +251,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -255,7 +267,7 @@ def main():
                                         new_art_name = os.path.basename(file)
                                         new_art_path = os.path.join(renamed_folder, new_art_name)
                                         try:
-                                            os.rename(file, new_art_path)
+                                            covers.materialize_cover(file, new_art_path)
                                             print(f"Moved unmatched art file '{file}' to '{new_art_path}'")
                                         except Exception as e:
                                             print(f"Failed to move '{file}' to '{new_art_path}': {e}")
@@ -316,6 +328,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
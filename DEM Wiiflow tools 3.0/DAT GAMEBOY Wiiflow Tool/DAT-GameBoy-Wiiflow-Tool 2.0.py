@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, gbrom, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -54,7 +60,7 @@ def list_gameboy_games():
     if not os.path.exists(gameboy_folder):
         print('The "gameboy games" folder does not exist.')
         return False
-    gb_files = [f for f in os.listdir(gameboy_folder) if f.endswith('.gb')]
+    gb_files = [f for f in manifest.list_files(library_manifest, gameboy_folder) if f.endswith('.gb')]
 
     if not gb_files:
         print('No .gb files present in the "gameboy games" folder.')
@@ -87,11 +93,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "gameboy cover art" folder.')
         return False
@@ -163,7 +171,7 @@ def transfer_matching_cover_art(gb_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -274,6 +282,11 @@ def main():
                     gameboy_folder = os.path.join(os.getcwd(), "gameboy games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by game code or checksum don't need fuzzy matching
+                    gb_files = list_gameboy_games() or []
+                    headers = gbrom.probe_folder(gameboy_folder, gb_files)
+                    dat_titles = datindex.identify_games(gameboy_folder, gb_files, serials=gbrom.game_codes(headers))
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         gb_files = list_gameboy_games()
@@ -281,7 +294,8 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".gb"
@@ -362,7 +376,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -398,8 +412,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        gameboy_games = [f for f in os.listdir(gameboy_games_folder) if f.endswith('.gb')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.gb.png')]
+        gameboy_games = [f for f in manifest.list_files(library_manifest, gameboy_games_folder) if f.endswith('.gb')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.gb.png')]
 
         for game in gameboy_games:
             expected_cover_art_name = game + ".png"
@@ -449,6 +463,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest, n64rom
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -55,10 +61,10 @@ def list_n64_games():
         if not os.path.exists(n64_folder):
             print('The "n64 games" folder does not exist.')
             return False
-        z64_files = [f for f in os.listdir(n64_folder) if f.endswith('.z64')]
+        z64_files = [f for f in manifest.list_files(library_manifest, n64_folder) if f.lower().endswith(n64rom.ROM_EXTENSIONS)]
 
         if not z64_files:
-            print('No .z64 files present in the "n64 games" folder.')
+            print('No .z64, .v64 or .n64 files present in the "n64 games" folder.')
             time.sleep(5)
             return False
 
@@ -100,11 +106,13 @@ def list_cover_art_files():
             return False
 
         art_files = []
-        for root, dirs, files in os.walk(art_folder):
+        for root, dirs, files in manifest.walk(library_manifest, art_folder):
             for file in files:
                 if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                     art_files.append(os.path.join(root, file))
 
+        art_files = imageprobe.filter_cover_art(art_files)
+
         if not art_files:
             print('No cover art files present in the "n64 cover art" folder.')
             return False
@@ -189,14 +197,14 @@ def transfer_matching_cover_art(z64_files, art_files):
         for art_file in art_files:
             art_file_base = os.path.splitext(os.path.basename(art_file))[0]
             if art_file_base.lower() == z64_file_base.lower():
-                new_art_name = f"{z64_file_base}.z64.png"
+                new_art_name = f"{z64_file}.png"
                 new_art_path = os.path.join(renamed_folder, new_art_name)
                 
                 if os.path.exists(new_art_path):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -231,6 +239,15 @@ def main():
             return
 
     if z64_files:
+        n64_folder = os.path.join(os.getcwd(), "n64 games")
+        to_convert = n64rom.needs_conversion(n64_folder, z64_files)
+        if to_convert:
+            print(f"\n\n{len(to_convert)} of your games are byte-swapped (.v64) or little-endian (.n64) dumps.")
+            answer = input("Wiiflow and this tool use .z64 names. Convert them to .z64 now? (yes/no): ").strip().lower()
+            if answer == 'yes':
+                n64rom.convert_folder(n64_folder, to_convert)
+                z64_files = list_n64_games() or []
+
         print("\n\n")
         
         answer = input("Would you like to check for duplicate titles? (yes/no): ").strip().lower()
@@ -307,6 +324,9 @@ def main():
                     n64_folder = os.path.join(os.getcwd(), "n64 games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    dat_titles = datindex.identify_games(n64_folder, list_n64_games() or [])
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         z64_files = list_n64_games()
@@ -314,10 +334,12 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
-                                new_file_name = os.path.splitext(best_match)[0] + ".z64"
+                                # Games the user chose not to convert keep their .v64/.n64 extension
+                                new_file_name = os.path.splitext(best_match)[0] + os.path.splitext(game_file)[1]
                                 if os.path.exists(os.path.join(n64_folder, new_file_name)):
                                     print(f"File '{new_file_name}' already exists. Skipping rename for '{game_file}'.")
                                 else:
@@ -368,7 +390,8 @@ def main():
 
                             if answer == 'yes':
                                 art_matches = []
-                                z64_file_titles = [os.path.splitext(f)[0] for f in z64_files]
+                                z64_files_by_title = {os.path.splitext(f)[0]: f for f in z64_files}
+                                z64_file_titles = list(z64_files_by_title)
                                 already_matched_art = set()
                                 while True:
                                     changes_made = False
@@ -378,7 +401,7 @@ def main():
                                         art_file_title = os.path.splitext(os.path.basename(art_file))[0]
                                         best_match = find_best_match(art_file_title, z64_file_titles)
                                         if best_match:
-                                            art_matches.append((best_match + ".z64", art_file))
+                                            art_matches.append((z64_files_by_title[best_match], art_file))
                                             changes_made = True
                                             already_matched_art.add(art_file)
                                             print(f"Matched '{art_file}' to '{best_match}'")
@@ -387,15 +410,14 @@ def main():
 
                                 if art_matches:
                                     for game_file, art_file in art_matches:
-                                        game_base, _ = os.path.splitext(game_file)
-                                        new_art_name = game_base + ".z64.png"
+                                        new_art_name = game_file + ".png"
                                         new_art_path = os.path.join(os.getcwd(), "renamed cover art", new_art_name)
                                         
                                         if os.path.exists(new_art_path):
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -431,8 +453,9 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        n64_games = [f for f in os.listdir(n64_games_folder) if f.endswith('.z64')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.z64.png')]
+        n64_games = [f for f in manifest.list_files(library_manifest, n64_games_folder) if f.lower().endswith(n64rom.ROM_EXTENSIONS)]
+        cover_extensions = tuple(ext + '.png' for ext in n64rom.ROM_EXTENSIONS)
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.lower().endswith(cover_extensions)]
 
         for game in n64_games:
             expected_cover_art_name = game + ".png"
@@ -474,6 +497,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
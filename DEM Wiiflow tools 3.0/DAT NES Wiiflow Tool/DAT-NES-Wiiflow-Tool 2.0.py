@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest, nesrom
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -55,7 +61,7 @@ def list_nes_games():
         if not os.path.exists(nes_folder):
             print('The "nes games" folder does not exist.')
             return False
-        nes_files = [f for f in os.listdir(nes_folder) if f.endswith('.nes')]
+        nes_files = [f for f in manifest.list_files(library_manifest, nes_folder) if f.endswith('.nes')]
 
         if not nes_files:
             print('No .nes files present in the "nes games" folder.')
@@ -100,11 +106,13 @@ def list_cover_art_files():
             return False
 
         art_files = []
-        for root, dirs, files in os.walk(art_folder):
+        for root, dirs, files in manifest.walk(library_manifest, art_folder):
             for file in files:
                 if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                     art_files.append(os.path.join(root, file))
 
+        art_files = imageprobe.filter_cover_art(art_files)
+
         if not art_files:
             print('No cover art files present in the "nes cover art" folder.')
             return False
@@ -271,7 +279,7 @@ def rename_megaman_games():
             "Megaman VI": "Mega Man 6"
         }
         
-        nes_files = [f for f in os.listdir(nes_folder) if f.endswith('.nes')]
+        nes_files = [f for f in manifest.list_files(library_manifest, nes_folder) if f.endswith('.nes')]
         for file in nes_files:
             base_name, ext = os.path.splitext(file)
             if base_name in megaman_mapping:
@@ -305,7 +313,7 @@ def transfer_matching_cover_art(nes_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -417,6 +425,12 @@ def main():
                     nes_folder = os.path.join(os.getcwd(), "nes games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching.
+                    # The DATs don't include the iNES header, so it is left out of the checksums.
+                    nes_files = list_nes_games() or []
+                    dat_titles = datindex.identify_games(nes_folder, nes_files, header_size=nesrom.header_size)
+                    nesrom.probe_folder(nes_folder, nes_files, dat_titles)
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         nes_files = list_nes_games()
@@ -424,7 +438,8 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            best_match = datindex.exact_match(dat_title, known_titles) or find_best_match(dat_title or game_name, txt_files)
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".nes"
@@ -505,7 +520,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -541,8 +556,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        nes_games = [f for f in os.listdir(nes_games_folder) if f.endswith('.nes')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.nes.png')]
+        nes_games = [f for f in manifest.list_files(library_manifest, nes_games_folder) if f.endswith('.nes')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.nes.png')]
 
         for game in nes_games:
             expected_cover_art_name = game + ".png"
@@ -584,6 +599,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
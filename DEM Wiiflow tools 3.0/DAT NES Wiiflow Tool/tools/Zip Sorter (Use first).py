@@ -1,5 +1,14 @@
 import os
 import shutil
+import sys
+
+# The shared tool code is two folders up. This script also gets copied next to the games, where it isn't
+tool_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(tool_folder))
+try:
+    from wiiflow_common import datindex, nesrom
+except ImportError:
+    datindex = nesrom = None
 
 # Define folder names for the categories
 japan_folder = "Japan"
@@ -26,9 +35,21 @@ os.makedirs(europe_folder, exist_ok=True)
 # Get a list of all .zip files in the current directory
 zip_files = [file for file in os.listdir() if file.endswith(".zip")]
 
+# With the NES DATs in the tool's "dat files" folder, games are sorted by their DAT title instead of
+# their file name, which catches badly named dumps. The iNES header is left out of the checksums,
+# like the DATs do, and the headers are checked on the way.
+dat_titles = {}
+if datindex is not None:
+    dat_folder = os.path.join(tool_folder, datindex.DAT_FOLDER)
+    if not os.path.isdir(dat_folder):
+        dat_folder = datindex.DAT_FOLDER
+    dat_titles = datindex.identify_games(os.getcwd(), zip_files, dat_folder=dat_folder, header_size=nesrom.header_size,
+                                         cache_folder=tool_folder)
+    nesrom.probe_folder(os.getcwd(), zip_files, dat_titles)
+
 # Loop through each file and move it to the appropriate folder
 for zip_file in zip_files:
-    lower_name = zip_file.lower()  # Convert to lowercase for consistent checking
+    lower_name = dat_titles.get(zip_file, zip_file).lower()  # Convert to lowercase for consistent checking
     if "(j)" in lower_name or "(jap)" in lower_name or "(japan)" in lower_name:
         shutil.move(zip_file, os.path.join(japan_folder, zip_file))
     elif "(e)" in lower_name or "(eu)" in lower_name or "(europe)" in lower_name:
@@ -45,7 +66,7 @@ for zip_file in zip_files:
         shutil.move(zip_file, os.path.join(vs_folder, zip_file))
     elif "(hack)" in lower_name:
         shutil.move(zip_file, os.path.join(hack_folder, zip_file))
-    elif "_" in zip_file:
+    elif "_" in zip_file and zip_file not in dat_titles:
         shutil.move(zip_file, os.path.join(underscore_folder, zip_file))
 
 print("Files sorted into respective folders!")
@@ -1,9 +1,15 @@
 import os
+import sys
 import re
 from difflib import get_close_matches
 import shutil
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, imageprobe, manifest
+
+library_manifest = manifest.load_manifest()
+
 # Define the folder paths
 ps1_cover_art_folder = "ps1 cover art"
 ps1_games_folder = "ps1 games"
@@ -95,7 +101,7 @@ if user_input == "yes":
     png_files = []
     try:
         # Walk through the ps1 games folder and its subfolders
-        for root, dirs, files in os.walk(ps1_games_folder):
+        for root, dirs, files in manifest.walk(library_manifest, ps1_games_folder):
             for file in files:
                 base_name, ext = os.path.splitext(file)
                 if file.endswith('.bin') and base_name not in renamed_files:
@@ -182,11 +188,12 @@ if user_input == "yes":
                 work_on_cover_art = input("Your games should be all set now. Do you want to start working on your cover art? (yes/no): ").strip().lower()
                 if work_on_cover_art == "yes":
                     print("Here are the .png files found in the 'ps1 cover art' folder:")
-                    for root, dirs, files in os.walk(ps1_cover_art_folder):
+                    for root, dirs, files in manifest.walk(library_manifest, ps1_cover_art_folder):
                         for file in files:
                             if file.endswith('.png'):
                                 png_files.append(os.path.join(root, file))
                                 print(f"- {file}")
+                    png_files = imageprobe.filter_cover_art(png_files)
                     print("\n\n\n")
 
                     remove_region_from_png = input("Would you like to remove the '(Region)' information from these titles too? (yes/no): ").strip().lower()
@@ -224,10 +231,10 @@ if user_input == "yes":
                                 png_name_numbers = re.findall(r'\d+', png_base_name)
                                 if match and ((not base_name_numbers and not png_name_numbers) or base_name_numbers == png_name_numbers):
                                     new_png_name = base_name + ".cue.png"
-                                    new_png_path = os.path.join(os.path.dirname(png_file_path), new_png_name)
+                                    new_png_path = os.path.join(renamed_cover_art_folder, new_png_name)
                                     print(f"Renaming {os.path.basename(png_file_path)} to {new_png_name}")
-                                    shutil.copyfile(png_file_path, new_png_path)
-                                    shutil.move(new_png_path, os.path.join(renamed_cover_art_folder, new_png_name))
+                                    # Keep the original, the same cover is reused for every disc of a game
+                                    covers.materialize_cover(png_file_path, new_png_path, keep_original=True)
                                     print(f"Moved {new_png_name} to {renamed_cover_art_folder}")
                                     match_found = True
                                     break
@@ -257,6 +264,8 @@ if user_input == "yes":
 else:
     print("Okay, maybe next time!")
 
+manifest.save_manifest(library_manifest)
+
 # Final pause to ensure the user can see everything before the script closes
 print("\nAll unmatched games have been moved to the 'unmatched games' folder.")
 print("\nThank you for using this script!")
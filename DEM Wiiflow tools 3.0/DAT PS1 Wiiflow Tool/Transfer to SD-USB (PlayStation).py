@@ -1,5 +1,8 @@
 import os
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covercache, transfer
 
 def get_drives():
     """Returns a list of available drives on the system."""
@@ -31,38 +34,6 @@ def select_drive(drives):
         except ValueError:
             print("Please enter a valid number.")
 
-def transfer_folder_contents(source_folder, destination_folder):
-    """Transfers the contents of a folder to the destination, skipping the 'bin' folder itself but including its contents."""
-    if not os.path.exists(source_folder):
-        print(f"The source folder {source_folder} does not exist.")
-        return
-    
-    if not os.path.exists(destination_folder):
-        os.makedirs(destination_folder)
-
-    try:
-        for item in os.listdir(source_folder):
-            s = os.path.join(source_folder, item)
-            d = os.path.join(destination_folder, item)
-            
-            if os.path.isdir(s) and item.lower() == 'bin':
-                for sub_item in os.listdir(s):
-                    sub_s = os.path.join(s, sub_item)
-                    sub_d = os.path.join(destination_folder, sub_item)
-                    if os.path.isdir(sub_s):
-                        shutil.copytree(sub_s, sub_d, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(sub_s, sub_d)
-            else:
-                if os.path.isdir(s):
-                    shutil.copytree(s, d, dirs_exist_ok=True)
-                else:
-                    shutil.copy2(s, d)
-
-        print(f'Contents of {source_folder} have been successfully transferred to {destination_folder}')
-    except Exception as e:
-        print(f'An error occurred while transferring {source_folder}: {e}')
-
 def main():
     # Get the folder where this script is running
     script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -83,6 +54,12 @@ def main():
     display_drives(drives)
     destination_drive = select_drive(drives)
 
+    # Full copy, or only copy what changed since the last transfer
+    transfer_options = transfer.ask_transfer_options()
+
+    # Everything is queued first so it can be checked before copying starts
+    transfers = []
+
     # Set the destination path for PS1 games
     destination_ps1_path = os.path.join(destination_drive, "wiisxrx", "isos")
 
@@ -90,7 +67,7 @@ def main():
     user_input_games = input("Do you want to transfer your PS1 games to the SD/USB drive? (yes/no): ").strip().lower()
 
     if user_input_games == 'yes':
-        transfer_folder_contents(source_ps1_games, destination_ps1_path)
+        transfers.append((source_ps1_games, destination_ps1_path, transfer_options, ('bin',)))
     else:
         print("PS1 games transfer cancelled.")
 
@@ -99,7 +76,9 @@ def main():
 
     if user_input_art == 'yes':
         destination_cover_art_path = os.path.join(destination_drive, "wiiflow", "boxcovers", "PlayStation")
-        transfer_folder_contents(source_renamed_cover_art, destination_cover_art_path)
+        transfers.append((source_renamed_cover_art, destination_cover_art_path, transfer_options, ('bin',)))
+        # Pre-built Wiiflow cover cache, when "Build Wiiflow cover cache.py" made one
+        transfers.extend(covercache.cover_cache_transfers(script_directory, destination_cover_art_path, transfer_options))
     else:
         print("Cover art transfer cancelled.")
 
@@ -108,10 +87,13 @@ def main():
 
     if user_input_bios == 'yes':
         destination_bios_path = os.path.join(destination_drive, "wiisxrx", "bios")
-        transfer_folder_contents(source_bios_folder, destination_bios_path)
+        transfers.append((source_bios_folder, destination_bios_path, None, ('bin',)))
     else:
         print("PlayStation BIOS transfer cancelled.")
     
+    # Check that everything fits, then copy
+    transfer.transfer_all(transfers)
+
     # Keep the script open and wait for user input to exit
     input("\nPress Enter to exit...")
 
@@ -1,16 +1,22 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest, segarom
+
+library_manifest = manifest.load_manifest()
+
 def list_game_gear_games():
     game_gear_folder = os.path.join(os.getcwd(), "game gear games")
     if not os.path.exists(game_gear_folder):
         print('The "game gear games" folder does not exist.')
         return False
-    zip_files = [f for f in os.listdir(game_gear_folder) if f.endswith('.zip')]
+    zip_files = [f for f in manifest.list_files(library_manifest, game_gear_folder) if f.endswith('.zip')]
 
     if not zip_files:
         print('No .zip files present in the "game gear games" folder.')
@@ -87,11 +93,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "game gear cover art" folder.')
         return False
@@ -172,7 +180,7 @@ def transfer_matching_cover_art(zip_files, art_files):
                 else:
                     print(f"Matching '{art_file}' to '{new_art_name}'")
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -286,6 +294,12 @@ def main():
                     game_gear_folder = os.path.join(os.getcwd(), "game gear games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum or serial don't need fuzzy matching,
+                    # and neither do the ones whose header title is in the list
+                    zip_files = list_game_gear_games() or []
+                    sega_headers = segarom.probe_folder(game_gear_folder, zip_files)
+                    dat_titles = datindex.identify_games(game_gear_folder, zip_files, serials=segarom.serials(sega_headers))
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         zip_files = list_game_gear_games()
@@ -293,7 +307,11 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            header_title = sega_headers.get(game_file, {}).get('title')
+                            best_match = (datindex.exact_match(dat_title, known_titles)
+                                          or datindex.exact_match(header_title, known_titles)
+                                          or find_best_match(dat_title or game_name, txt_files))
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".zip"
@@ -381,7 +399,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -424,8 +442,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        game_gear_games = [f for f in os.listdir(game_gear_games_folder) if f.endswith('.zip')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.zip.png')]
+        game_gear_games = [f for f in manifest.list_files(library_manifest, game_gear_games_folder) if f.endswith('.zip')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.zip.png')]
 
         for game in game_gear_games:
             expected_cover_art_name = game + ".png"
@@ -474,6 +492,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
@@ -1,11 +1,17 @@
 import os
+import sys
 import shutil
 import re
 from difflib import get_close_matches
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, imageprobe, manifest
+
+library_manifest = manifest.load_manifest(os.path.dirname(os.path.abspath(__file__)))
+
 def find_files(directory, extensions):
     matches = []
-    for root, _, files in os.walk(directory):
+    for root, _, files in manifest.walk(library_manifest, directory):
         for filename in files:
             if filename.lower().endswith(extensions):
                 matches.append(os.path.join(root, filename))
@@ -81,7 +87,7 @@ def rename_files(source_files, target_files, output_dir, excluded_files):
 
             new_path = os.path.join(output_dir, new_name)
             print(f"DEBUG: Copying {src} to {new_path}")
-            shutil.copy(src, new_path)
+            covers.materialize_cover(src, new_path, keep_original=True)
             print(f"Copied: {src} -> {new_name}")
         else:
             print(f"No match found for: {src}")
@@ -92,11 +98,11 @@ def list_image_files(directory):
         return []
     
     matches = []
-    for root, _, files in os.walk(directory):
+    for root, _, files in manifest.walk(library_manifest, directory):
         for filename in files:
             if filename.lower().endswith(('.png', '.jpeg', '.jpg')):
                 matches.append(os.path.join(root, filename))
-    return matches
+    return imageprobe.filter_cover_art(matches)
 
 def list_txt_files(directory):
     if not os.path.exists(directory):
@@ -145,7 +151,7 @@ def find_closest_matches(bin_cue_files, txt_base_names, excluded_files):
     return matches
 
 def fix_multiple_disc_titles(renamed_dir, games_dir):
-    renamed_files = os.listdir(renamed_dir)
+    renamed_files = manifest.list_files(library_manifest, renamed_dir)
     disc_games = [f for f in os.listdir(games_dir) if any(f.endswith(ext) for ext in ['(Disc 1)', '(Disc 2)', '(Disc 3)', '(Disc 4)'])]
 
     processed_files = set()
@@ -165,7 +171,7 @@ def fix_multiple_disc_titles(renamed_dir, games_dir):
             
             if new_path not in processed_files and not os.path.exists(new_path):
                 print(f"DEBUG: Copying {src_path} to {new_path}")
-                shutil.copy(src_path, new_path)
+                covers.materialize_cover(src_path, new_path, keep_original=True)
                 print(f"Copied: {src_path} -> {new_name}")
                 processed_files.add(new_path)
 
@@ -565,3 +571,4 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
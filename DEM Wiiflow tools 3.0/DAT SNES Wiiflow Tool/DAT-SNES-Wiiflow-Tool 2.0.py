@@ -1,10 +1,16 @@
 import os
+import sys
 import time
 import re
 import difflib
 import shutil
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import covers, datindex, imageprobe, manifest, snesrom
+
+library_manifest = manifest.load_manifest()
+
 def normalize_title(title):
     return re.sub(r'\s*\(.*?\)\s*', '', title, flags=re.IGNORECASE).strip()
 
@@ -54,7 +60,7 @@ def list_snes_games():
     if not os.path.exists(snes_folder):
         print('The "snes games" folder does not exist.')
         return False
-    sfc_files = [f for f in os.listdir(snes_folder) if f.endswith('.sfc')]
+    sfc_files = [f for f in manifest.list_files(library_manifest, snes_folder) if f.endswith('.sfc')]
 
     if not sfc_files:
         print('No .sfc files present in the "snes games" folder.')
@@ -87,11 +93,13 @@ def list_cover_art_files():
         return False
 
     art_files = []
-    for root, dirs, files in os.walk(art_folder):
+    for root, dirs, files in manifest.walk(library_manifest, art_folder):
         for file in files:
             if file.lower().endswith(('.png', '.jpeg', '.jpg')):
                 art_files.append(os.path.join(root, file))
 
+    art_files = imageprobe.filter_cover_art(art_files)
+
     if not art_files:
         print('No cover art files present in the "snes cover art" folder.')
         return False
@@ -1007,7 +1015,7 @@ def transfer_matching_cover_art(sfc_files, art_files):
                     print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                 else:
                     try:
-                        os.rename(art_file, new_art_path)
+                        covers.materialize_cover(art_file, new_art_path)
                         print(f"Transferred '{art_file}' to '{new_art_path}'")
                     except Exception as e:
                         print(f"Failed to transfer '{art_file}' to '{new_art_name}': {e}")
@@ -1118,6 +1126,12 @@ def main():
                     snes_folder = os.path.join(os.getcwd(), "snes games")
                     matches = []
                     already_matched = set()
+                    # Games the DATs in "dat files" know by checksum don't need fuzzy matching
+                    # and neither do the ones whose internal header title is in the list
+                    sfc_files = list_snes_games() or []
+                    snes_headers = snesrom.probe_folder(snes_folder, sfc_files)
+                    dat_titles = datindex.identify_games(snes_folder, sfc_files, header_size=snesrom.copier_header_size)
+                    known_titles = datindex.title_lookup(txt_files)
                     while True:
                         changes_made = False
                         sfc_files = list_snes_games()
@@ -1125,7 +1139,11 @@ def main():
                             if game_file in already_matched:
                                 continue
                             game_name, _ = os.path.splitext(game_file)
-                            best_match = find_best_match(game_name, txt_files)
+                            dat_title = dat_titles.get(game_file)
+                            header_title = snes_headers.get(game_file, {}).get('title')
+                            best_match = (datindex.exact_match(dat_title, known_titles)
+                                          or datindex.exact_match(header_title, known_titles)
+                                          or find_best_match(dat_title or game_name, txt_files))
                             if best_match:
                                 matches.append((game_file, best_match))
                                 new_file_name = os.path.splitext(best_match)[0] + ".sfc"
@@ -1206,7 +1224,7 @@ def main():
                                             print(f"File '{new_art_path}' already exists. Skipping rename for '{art_file}'.")
                                         else:
                                             try:
-                                                os.rename(art_file, new_art_path)
+                                                covers.materialize_cover(art_file, new_art_path)
                                                 print(f"Renamed '{art_file}' to '{new_art_name}'")
                                             except Exception as e:
                                                 print(f"Failed to rename '{art_file}' to '{new_art_name}': {e}")
@@ -1242,8 +1260,8 @@ def main():
         if not os.path.exists(unmatched_games_folder):
             os.makedirs(unmatched_games_folder)
 
-        snes_games = [f for f in os.listdir(snes_games_folder) if f.endswith('.sfc')]
-        renamed_cover_art = [f for f in os.listdir(renamed_cover_art_folder) if f.endswith('.sfc.png')]
+        snes_games = [f for f in manifest.list_files(library_manifest, snes_games_folder) if f.endswith('.sfc')]
+        renamed_cover_art = [f for f in manifest.list_files(library_manifest, renamed_cover_art_folder) if f.endswith('.sfc.png')]
 
         for game in snes_games:
             expected_cover_art_name = game + ".png"
@@ -1285,6 +1303,7 @@ d888888b  .d88b.   .d88b.  db
 
 if __name__ == "__main__":
     main()
+    manifest.save_manifest(library_manifest)
 
 # Keep the script open for review
 input("Press Enter to exit...")
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common import coverimage
+from wiiflow_common.covercache import COVERS_FOLDER
+from wiiflow_common.systems import SYSTEMS
+
+def select_systems():
+    """Asks which systems to convert and returns their table entries."""
+    print("\nSystems:")
+    for i, system in enumerate(SYSTEMS):
+        print(f'{i + 1}. {system["name"]}')
+    while True:
+        answer = input("Enter the numbers of the systems to convert, separated by commas, or 'all': ").strip().lower()
+        if answer == 'all':
+            return list(SYSTEMS)
+        try:
+            choices = sorted({int(part) for part in answer.split(',') if part.strip()})
+        except ValueError:
+            print("Please enter numbers separated by commas, or 'all'.")
+            continue
+        if choices and all(1 <= choice <= len(SYSTEMS) for choice in choices):
+            return [SYSTEMS[choice - 1] for choice in choices]
+        print("Invalid selection. Please select valid system numbers.")
+
+def main():
+    # The tool folders sit next to this script
+    tools_directory = os.path.dirname(os.path.abspath(__file__))
+
+    print("Converts each tool's \"renamed cover art\" to real 1090x680 PNG files, the size Wiiflow")
+    print("expects. JPEG covers that were only renamed to .png are converted too.")
+    print("Run it after the DAT tools and before \"Build Wiiflow cover cache.py\".")
+    if not coverimage.pillow_available():
+        input("\nPress Enter to exit...")
+        return
+
+    systems = select_systems()
+
+    start = time.perf_counter()
+    for system in systems:
+        covers_folder = os.path.join(tools_directory, system['tool'], COVERS_FOLDER)
+        if not os.path.isdir(covers_folder):
+            print(f"\n{system['name']}: no renamed cover art folder, skipping.")
+            continue
+        print(f"\n{system['name']}:")
+        converted, already_fine, failed = coverimage.normalize_folder(covers_folder)
+        print(f"{converted} converted, {already_fine} already 1090x680 PNG, {failed} failed.")
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
+
+    # Keep the script open and wait for user input to exit
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
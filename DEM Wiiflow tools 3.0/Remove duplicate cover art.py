@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common import coverdedup
+from wiiflow_common.systems import SYSTEMS, art_folder
+
+def select_systems():
+    """Asks which systems to check and returns their table entries."""
+    print("\nSystems:")
+    for i, system in enumerate(SYSTEMS):
+        print(f'{i + 1}. {system["name"]}')
+    while True:
+        answer = input("Enter the numbers of the systems to check, separated by commas, or 'all': ").strip().lower()
+        if answer == 'all':
+            return list(SYSTEMS)
+        try:
+            choices = sorted({int(part) for part in answer.split(',') if part.strip()})
+        except ValueError:
+            print("Please enter numbers separated by commas, or 'all'.")
+            continue
+        if choices and all(1 <= choice <= len(SYSTEMS) for choice in choices):
+            return [SYSTEMS[choice - 1] for choice in choices]
+        print("Invalid selection. Please select valid system numbers.")
+
+def ask_yes_no(prompt):
+    while True:
+        answer = input(prompt).strip().lower()
+        if answer in ('yes', 'no'):
+            return answer == 'yes'
+        print("Please answer 'yes' or 'no'.")
+
+def main():
+    # The tool folders sit next to this script
+    tools_directory = os.path.dirname(os.path.abspath(__file__))
+
+    print("Finds covers that show the same picture (ALT and demo folders, region copies) in each")
+    print("tool's cover art folder and moves all but one of them to a \"duplicate cover art\" folder.")
+    print("Run it before the DAT tools, so every game is matched to a single cover.")
+    if not coverdedup.dependencies_available():
+        input("\nPress Enter to exit...")
+        return
+
+    systems = select_systems()
+
+    start = time.perf_counter()
+    for system in systems:
+        tool_folder = os.path.join(tools_directory, system['tool'])
+        covers_folder = os.path.join(tool_folder, art_folder(system))
+        if not os.path.isdir(covers_folder):
+            print(f"\n{system['name']}: no \"{art_folder(system)}\" folder, skipping.")
+            continue
+        print(f"\n{system['name']}:")
+        results = coverdedup.find_duplicate_covers(covers_folder)
+        if not results:
+            print("No duplicate covers found.")
+            continue
+
+        for kept, duplicates in results:
+            print(f"Keeping '{os.path.relpath(kept, covers_folder)}'")
+            for path in duplicates:
+                print(f"  - same picture: '{os.path.relpath(path, covers_folder)}'")
+        count = sum(len(duplicates) for kept, duplicates in results)
+        if ask_yes_no(f"Move these {count} duplicates to \"{coverdedup.DUPLICATES_FOLDER}\"? (yes/no): "):
+            duplicates_folder = os.path.join(tool_folder, coverdedup.DUPLICATES_FOLDER)
+            moved = coverdedup.move_duplicates(results, covers_folder, duplicates_folder)
+            print(f"Moved {moved} covers.")
+        else:
+            print("No files were moved.")
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
+
+    # Keep the script open and wait for user input to exit
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
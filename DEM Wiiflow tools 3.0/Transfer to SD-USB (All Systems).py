@@ -0,0 +1,101 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from wiiflow_common.fanout import fan_out
+from wiiflow_common.systems import SYSTEMS, system_transfers
+from wiiflow_common.transfer import ask_transfer_options, transfer_all
+
+def get_drives():
+    """Returns a list of available drives on the system."""
+    drives = []
+    if os.name == 'nt':  # Windows-based system
+        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            drive = f'{letter}:\\'
+            if os.path.exists(drive):
+                drives.append(drive)
+    else:
+        # For non-Windows systems (Linux, Mac), you can adapt this part
+        drives.append('/')  # Assuming root as the main drive
+    return drives
+
+def display_drives(drives):
+    """Displays available drives for the user to select."""
+    print("Available Drives:")
+    for i, drive in enumerate(drives):
+        print(f'{i + 1}. {drive}')
+
+def select_drives(drives):
+    """Allows user to select one drive, or several to build more than one card at once."""
+    while True:
+        try:
+            answer = input("Select a drive number, or several separated by commas to build more than one card at once: ")
+            choices = list(dict.fromkeys(int(part) for part in answer.split(',') if part.strip()))
+            if choices and all(1 <= choice <= len(drives) for choice in choices):
+                return [drives[choice - 1] for choice in choices]
+            else:
+                print("Invalid selection. Please select a valid drive number.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+def select_systems():
+    """Asks which systems to transfer and returns their table entries."""
+    print("\nSystems:")
+    for i, system in enumerate(SYSTEMS):
+        print(f'{i + 1}. {system["name"]}')
+    while True:
+        answer = input("Enter the numbers of the systems to transfer, separated by commas, or 'all': ").strip().lower()
+        if answer == 'all':
+            return list(SYSTEMS)
+        try:
+            choices = sorted({int(part) for part in answer.split(',') if part.strip()})
+        except ValueError:
+            print("Please enter numbers separated by commas, or 'all'.")
+            continue
+        if choices and all(1 <= choice <= len(SYSTEMS) for choice in choices):
+            return [SYSTEMS[choice - 1] for choice in choices]
+        print("Invalid selection. Please select valid system numbers.")
+
+def main():
+    # The tool folders sit next to this script
+    tools_directory = os.path.dirname(os.path.abspath(__file__))
+
+    # Get available drives
+    drives = get_drives()
+    if not drives:
+        print("No available drives found.")
+        return
+
+    # Display and select the destination drive(s)
+    print("\nSelect the destination drive:")
+    display_drives(drives)
+    destination_drives = select_drives(drives)
+
+    systems = select_systems()
+
+    # Full copy, or only copy what changed since the last transfer
+    transfer_options = ask_transfer_options()
+
+    user_input_art = input("Would you like to transfer the cover art of these systems as well? (yes/no): ").strip().lower()
+    user_input_bios = input("Would you like to transfer the BIOS files too (Atari Lynx, Intellivision, PlayStation, Sega CD)? (yes/no): ").strip().lower()
+
+    # One combined plan for every system, checked and copied in a single run
+    drive_transfers = []
+    for destination_drive in destination_drives:
+        transfers = []
+        for system in systems:
+            transfers.extend(system_transfers(system, tools_directory, destination_drive, transfer_options,
+                                              covers=user_input_art == 'yes', bios=user_input_bios == 'yes'))
+        drive_transfers.append((destination_drive, transfers))
+
+    if len(drive_transfers) == 1:
+        transfer_all(drive_transfers[0][1], report_folder=tools_directory)
+    else:
+        # Several cards: every source file is read once and written to all of them
+        fan_out(drive_transfers, report_folder=tools_directory)
+
+    # Keep the script open and wait for user input to exit
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
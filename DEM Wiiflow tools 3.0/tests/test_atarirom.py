@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import atarirom, datindex
+
+
+class HeaderedDumpTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.games = os.path.join(self.folder.name, 'games')
+        os.makedirs(self.games)
+        self.rom = os.urandom(48 * 1024)
+        dat_folder = os.path.join(self.folder.name, datindex.DAT_FOLDER)
+        os.makedirs(dat_folder)
+        with open(os.path.join(dat_folder, 'atari.dat'), 'w', encoding='utf-8') as f:
+            f.write(f'<?xml version="1.0"?><datafile><game name="Game (USA)">'
+                    f'<rom name="game" size="{len(self.rom)}" crc="{zlib.crc32(self.rom):08x}"/></game></datafile>')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_a78_header_is_left_out(self):
+        header = bytearray(atarirom.A78_HEADER_SIZE)
+        header[1:10] = atarirom.A78_MAGIC
+        header[100:128] = atarirom.A78_END_MAGIC
+        with open(os.path.join(self.games, 'game.a78'), 'wb') as f:
+            f.write(bytes(header) + self.rom)
+        titles = datindex.identify_games(self.games, ['game.a78'], header_size=atarirom.a78_header_size)
+        self.assertEqual(titles, {'game.a78': "Game (USA)"})
+
+    def test_zipped_lnx_header_is_left_out(self):
+        header = atarirom.LNX_MAGIC + bytes(atarirom.LNX_HEADER_SIZE - 4)
+        with zipfile.ZipFile(os.path.join(self.games, 'game.zip'), 'w') as archive:
+            archive.writestr('game.lnx', header + self.rom)
+        titles = datindex.identify_games(self.games, ['game.zip'], header_size=atarirom.lnx_header_size)
+        self.assertEqual(titles, {'game.zip': "Game (USA)"})
+
+    def test_headerless_dump_is_hashed_whole(self):
+        self.assertEqual(atarirom.a78_header_size(self.rom[:512], len(self.rom)), 0)
+        self.assertEqual(atarirom.lnx_header_size(self.rom[:512], len(self.rom)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
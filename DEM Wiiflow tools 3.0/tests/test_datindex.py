@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import datindex, segarom
+
+DAT = """<?xml version="1.0"?>
+<datafile>
+  <header><name>{system}</name></header>
+{games}</datafile>
+"""
+GAME = '  <game name="{title}"><serial>{serial}</serial><rom name="x" size="1" crc="00000000"/></game>\n'
+
+
+def write_dat(folder, system, games):
+    path = os.path.join(folder, system + '.dat')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(DAT.format(system=system, games=''.join(GAME.format(title=title, serial=serial)
+                                                        for title, serial in games)))
+    return path
+
+
+def genesis_rom(serial):
+    head = bytearray(segarom.GENESIS_HEADER_END)
+    head[0x100:0x110] = b'SEGA GENESIS    '
+    head[0x180:0x18E] = serial.ljust(14)
+    return bytes(head)
+
+
+def master_system_rom(product_bcd):
+    rom = bytearray(32 * 1024)
+    # TMR SEGA header at 0x7FF0: product code in BCD, then region 4 (export) and size C (32 KB)
+    rom[0x7FF0:0x7FF8] = segarom.TMR_SIGNATURE
+    rom[0x7FFC:0x7FFF] = product_bcd
+    rom[0x7FFF] = 0x4C
+    return bytes(rom)
+
+
+class SerialLookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = datindex.new_index()
+        datindex._add_serial(self.index, "AGB-AXVE-USA", "Pokemon - Ruby Version (USA)")
+        datindex._add_serial(self.index, "T-1079", "Game A (Japan)")
+        datindex._add_serial(self.index, "MK-1079", "Game B (USA)")
+
+    def test_game_code_finds_the_full_serial(self):
+        self.assertEqual(datindex.lookup_serial(self.index, "AXVE"), "Pokemon - Ruby Version (USA)")
+        self.assertEqual(datindex.lookup_serial(self.index, "AGB-AXVE-USA"), "Pokemon - Ruby Version (USA)")
+
+    def test_serials_with_different_prefixes_dont_collide(self):
+        self.assertEqual(datindex.lookup_serial(self.index, "T-1079"), "Game A (Japan)")
+        self.assertEqual(datindex.lookup_serial(self.index, "MK-1079"), "Game B (USA)")
+
+    def test_serial_missing_from_the_dat_finds_nothing(self):
+        index = datindex.new_index()
+        datindex._add_serial(index, "T-1079", "Game A (Japan)")
+        self.assertIsNone(datindex.lookup_serial(index, "MK-1079"))
+        self.assertIsNone(datindex.lookup_serial(index, "GM MK-1079 -00"))
+
+
+
+class SegaSerialTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def probe_serial(self, name, data):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return segarom.serials({name: segarom.probe(path)})[name]
+
+    def test_genesis_header_finds_the_dat_serial(self):
+        index = datindex.load_dat(write_dat(self.folder.name, "Sega - Mega Drive - Genesis", [
+            ("Game B (USA, Europe)", "MK-1079-00"),
+            ("Game A (Japan)", "T-1080"),
+        ]))
+        self.assertEqual(datindex.lookup_serial(index, self.probe_serial('b.md', genesis_rom(b'GM MK-1079 -00'))),
+                         "Game B (USA, Europe)")
+        # Same number, other publisher
+        self.assertIsNone(datindex.lookup_serial(index, self.probe_serial('c.md', genesis_rom(b'GM T-1079 -00'))))
+
+    def test_master_system_product_number_finds_the_dat_serial(self):
+        index = datindex.load_dat(write_dat(self.folder.name, "Sega - Master System - Mark III", [
+            ("Game C (USA, Europe)", "MK-7001, MK-7001-50"),
+        ]))
+        serial = self.probe_serial('c.sms', master_system_rom(b'\x01\x70\x00'))
+        self.assertEqual(serial, '7001')
+        self.assertEqual(datindex.lookup_serial(index, serial), "Game C (USA, Europe)")
+
+    def test_other_dats_dont_get_sega_keys(self):
+        index = datindex.load_dat(write_dat(self.folder.name, "Nintendo - Game Boy Advance", [
+            ("Game D (USA)", "NES-7001-USA"),
+        ]))
+        self.assertIsNone(datindex.lookup_serial(index, '7001'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import gbrom
+
+
+def gbc_rom(title, code=b'', licensee=gbrom.NEW_LICENSEE):
+    head = bytearray(gbrom.HEADER_END)
+    head[0x104:0x134] = gbrom.NINTENDO_LOGO
+    field = (title + code).ljust(15, b'\0')
+    head[0x134:0x143] = field
+    head[0x143] = 0x80
+    head[0x14A] = 0x01
+    head[0x14B] = licensee
+    checksum = 0
+    for byte in head[0x134:0x14D]:
+        checksum = (checksum - byte - 1) & 0xFF
+    head[0x14D] = checksum
+    return bytes(head) + bytes(32 * 1024 - len(head))
+
+
+class GameCodeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def probe(self, data):
+        path = os.path.join(self.folder.name, 'game.gbc')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return gbrom.probe(path)
+
+    def test_code_after_an_11_character_title(self):
+        result = self.probe(gbc_rom(b'POKEMON_GLD', b'AAUE'))
+        self.assertIsNone(result['problem'])
+        self.assertEqual(result['game_code'], 'AAUE')
+        self.assertEqual(result['title'], 'POKEMON_GLD')
+
+    def test_code_after_a_shorter_title(self):
+        result = self.probe(gbc_rom(b'ZELDA'.ljust(11, b'\0'), b'AZ7E'))
+        self.assertEqual(result['game_code'], 'AZ7E')
+        self.assertEqual(result['title'], 'ZELDA')
+
+    def test_old_licensee_cart_has_no_code(self):
+        result = self.probe(gbc_rom(b'TETRIS DXAAAA', licensee=0x01))
+        self.assertIsNone(result['game_code'])
+        self.assertEqual(result['title'], 'TETRIS DXAAAA')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import largefile
+
+
+def short_copy_file_range(src, dst, count, offset_src=None, offset_dst=None):
+    # Copies the first 1000 bytes, then claims there is nothing left, like some filesystems do
+    if offset_src:
+        return 0
+    data = os.pread(src, min(count, 1000), 0)
+    return os.pwrite(dst, data, 0)
+
+
+class CopyLargeFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.folder.name, 'game.bin')
+        self.destination = os.path.join(self.folder.name, 'copy.bin')
+        self.data = os.urandom(300000)
+        with open(self.source, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    @unittest.skipUnless(hasattr(os, 'pread'), "needs os.pread")
+    def test_short_copy_file_range_hands_over_to_the_next_method(self):
+        with mock.patch.object(os, 'copy_file_range', short_copy_file_range, create=True):
+            used = largefile.copy_large_file(self.source, self.destination, progress=None)
+        self.assertNotEqual(used, 'copy_file_range')
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    @unittest.skipUnless(hasattr(os, 'pread'), "needs os.pread")
+    def test_short_copy_with_no_method_left_fails(self):
+        methods = (('copy_file_range', largefile._copy_with_copy_file_range),)
+        with mock.patch.object(os, 'copy_file_range', short_copy_file_range, create=True), \
+                mock.patch.object(largefile, 'COPY_METHODS', methods):
+            with self.assertRaises(OSError):
+                largefile.copy_large_file(self.source, self.destination, progress=None)
+        self.assertFalse(os.path.exists(self.destination))
+
+
+if __name__ == '__main__':
+    unittest.main()
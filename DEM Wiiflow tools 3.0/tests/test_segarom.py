@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import segarom
+
+ROM_SIZE = 512 * 1024
+
+
+def genesis_rom(serial=b'GM MK-1079 -00'):
+    head = bytearray(segarom.GENESIS_HEADER_END)
+    head[0x100:0x110] = b'SEGA GENESIS    '
+    head[0x150:0x15F] = b'SONIC THE HEDGE'
+    head[0x180:0x18E] = serial.ljust(14)
+    head[0x1F0:0x1F3] = b'JUE'
+    return bytes(head) + bytes(ROM_SIZE - len(head))
+
+
+class GenesisHeaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_good_header_gives_the_product_code(self):
+        result = segarom.probe(self.write('sonic.md', genesis_rom()))
+        self.assertTrue(result['valid'])
+        self.assertEqual(result['serial'], 'MK-1079')
+        self.assertEqual(result['region'], 'Japan, USA, Europe')
+
+    def test_garbled_header_is_not_valid(self):
+        result = segarom.probe(self.write('sonic.md', genesis_rom(b'GM \x8a\x01\xff-1079')))
+        self.assertFalse(result['valid'])
+        self.assertIsNone(result['serial'])
+        self.assertIsNone(result['title'])
+        self.assertEqual(segarom.serials({'sonic.md': result}), {})
+
+    def test_zipped_smd_is_not_valid(self):
+        copier_header = bytearray(segarom.SMD_HEADER_SIZE)
+        copier_header[8:10] = b'\xaa\xbb'
+        path = os.path.join(self.folder.name, 'sonic.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('sonic.bin', bytes(copier_header) + b'\x13' * ROM_SIZE)
+        result = segarom.probe(path)
+        self.assertFalse(result['valid'])
+        self.assertIsNotNone(result['problem'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,6 @@
+"""Shared helpers for the DEM Wiiflow tools.
+
+Every DAT tool and Transfer script adds the "DEM Wiiflow tools 3.0" folder to
+sys.path and imports what it needs from here, so keep this folder next to the
+tool folders.
+"""
@@ -0,0 +1,43 @@
+"""Atari 7800 and Lynx ROM headers.
+
+Emulators need a header in front of these games to know how to run them:
+
+  .a78  128 bytes: a version byte, "ATARI7800" at byte 1, the title, the ROM
+        size, the cartridge type and controllers, and "ACTUAL CART DATA
+        STARTS HERE" at byte 100
+  .lnx  64 bytes: "LYNX" at byte 0, the bank sizes, the title, the
+        manufacturer and the screen rotation
+
+No-Intro lists both systems headerless, like the cartridge itself, so
+a78_header_size() and lnx_header_size() are what romhash.hash_files() uses to
+leave the header out of the CRC, MD5 and SHA-1 it looks up in the DATs.
+"""
+
+A78_HEADER_SIZE = 128
+A78_MAGIC = b'ATARI7800'
+A78_END_MAGIC = b'ACTUAL CART DATA STARTS HERE'
+LNX_HEADER_SIZE = 64
+LNX_MAGIC = b'LYNX'
+
+
+def a78_header_size(head, size):
+    """Returns 128 for an Atari 7800 ROM with an .a78 header, 0 for a headerless one.
+
+    Fits romhash.hash_files(header_size=...).
+    """
+    if size <= A78_HEADER_SIZE or len(head) < A78_HEADER_SIZE:
+        return 0
+    # A few old tools wrote the header without the name at byte 1
+    if head[1:10] == A78_MAGIC or head[100:128] == A78_END_MAGIC:
+        return A78_HEADER_SIZE
+    return 0
+
+
+def lnx_header_size(head, size):
+    """Returns 64 for a Lynx ROM with an .lnx header, 0 for a headerless (.lyx) one.
+
+    Fits romhash.hash_files(header_size=...).
+    """
+    if size <= LNX_HEADER_SIZE or head[:4] != LNX_MAGIC:
+        return 0
+    return LNX_HEADER_SIZE
@@ -0,0 +1,130 @@
+"""CMPR texture encoder for the Wiiflow cover cache, vectorized with NumPy.
+
+CMPR is the GameCube/Wii version of DXT1: every 4x4 pixel block is stored as
+two RGB565 colours and a 2 bit index per pixel choosing between those two and
+two colours in between. Compared to PC DXT1 the colours are big endian, the
+first pixel of each row is in the top bits of its byte, and the blocks are
+grouped by four into 8x8 pixel tiles (top left, top right, bottom left, bottom
+right), tiles going left to right, top to bottom.
+
+encode_cmpr() works on all the blocks of an image at once: each block's two
+colours are the ends of its pixels along the block's main colour axis, and
+every pixel then picks the nearest of the four colours.
+
+Needs NumPy (pip install numpy).
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Power iterations used to find each block's main colour axis
+AXIS_ITERATIONS = 4
+
+
+def numpy_available():
+    """Returns True when NumPy is installed, printing how to get it when it is not."""
+    if np is None:
+        print("Compressed (CMPR) cover textures need NumPy. Install it with: pip install numpy")
+        print("Without it the cover cache is built uncompressed, which takes more space on the card.")
+        return False
+    return True
+
+
+def _to_rgb565(colors):
+    colors = np.clip(np.rint(colors), 0, 255).astype(np.uint16)
+    return ((colors[..., 0] >> 3) << 11) | ((colors[..., 1] >> 2) << 5) | (colors[..., 2] >> 3)
+
+
+def _from_rgb565(values):
+    red = (values >> 11) & 0x1F
+    green = (values >> 5) & 0x3F
+    blue = values & 0x1F
+    return np.stack(((red << 3) | (red >> 2), (green << 2) | (green >> 4), (blue << 3) | (blue >> 2)),
+                    axis=-1).astype(np.float32)
+
+
+def _block_endpoints(blocks):
+    """Returns the two end colours (N x 3 each) for N blocks of 16 pixels."""
+    mean = blocks.mean(axis=1, keepdims=True)
+    centered = blocks - mean
+    covariance = np.einsum('nki,nkj->nij', centered, centered)
+
+    axis = np.ones((blocks.shape[0], 3), dtype=np.float32)
+    for _ in range(AXIS_ITERATIONS):
+        axis = np.einsum('nij,nj->ni', covariance, axis)
+        length = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.where(length > 1e-6, axis / np.maximum(length, 1e-6), 0)
+
+    projection = np.einsum('nki,ni->nk', centered, axis)
+    low = mean[:, 0] + axis * projection.min(axis=1, keepdims=True)
+    high = mean[:, 0] + axis * projection.max(axis=1, keepdims=True)
+    return high, low
+
+
+def encode_blocks(blocks):
+    """Encodes N blocks (N x 16 x 3 pixels, rows first) into N x 8 bytes of CMPR."""
+    blocks = blocks.astype(np.float32)
+    high, low = _block_endpoints(blocks)
+    color0 = _to_rgb565(high)
+    color1 = _to_rgb565(low)
+
+    # Four colour mode needs color0 > color1. Equal colours just use index 0.
+    swap = color0 < color1
+    color0, color1 = np.where(swap, color1, color0), np.where(swap, color0, color1)
+
+    end0 = _from_rgb565(color0)
+    end1 = _from_rgb565(color1)
+    palette = np.stack((end0, end1, (2 * end0 + end1) / 3, (end0 + 2 * end1) / 3), axis=1)
+    distances = ((blocks[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    indices = distances.argmin(axis=-1).astype(np.uint8)
+    indices[color0 == color1] = 0
+
+    rows = indices.reshape(-1, 4, 4)
+    index_bytes = (rows[..., 0] << 6) | (rows[..., 1] << 4) | (rows[..., 2] << 2) | rows[..., 3]
+
+    encoded = np.empty((blocks.shape[0], 8), dtype=np.uint8)
+    encoded[:, 0] = color0 >> 8
+    encoded[:, 1] = color0 & 0xFF
+    encoded[:, 2] = color1 >> 8
+    encoded[:, 3] = color1 & 0xFF
+    encoded[:, 4:] = index_bytes
+    return encoded
+
+
+def encode_cmpr(image):
+    """Encodes an RGB Pillow image (sides a multiple of 8) as a GX CMPR texture."""
+    pixels = np.asarray(image.convert('RGB'), dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    block_rows, block_columns = height // 4, width // 4
+
+    # (block row, pixel row, block column, pixel column, rgb) -> one block per row
+    blocks = pixels.reshape(block_rows, 4, block_columns, 4, 3).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 3)
+    encoded = encode_blocks(blocks).reshape(block_rows, block_columns, 8)
+
+    # Group the blocks two by two into 8x8 pixel tiles
+    tiles = encoded.reshape(block_rows // 2, 2, block_columns // 2, 2, 8).transpose(0, 2, 1, 3, 4)
+    return tiles.tobytes()
+
+
+def decode_cmpr(data, width, height):
+    """Turns a GX CMPR texture back into an RGB array (height x width x 3), to check a cache file."""
+    block_rows, block_columns = height // 4, width // 4
+    encoded = np.frombuffer(data, dtype=np.uint8, count=block_rows * block_columns * 8)
+    encoded = encoded.reshape(block_rows // 2, block_columns // 2, 2, 2, 8).transpose(0, 2, 1, 3, 4)
+    encoded = encoded.reshape(-1, 8)
+
+    color0 = (encoded[:, 0].astype(np.uint16) << 8) | encoded[:, 1]
+    color1 = (encoded[:, 2].astype(np.uint16) << 8) | encoded[:, 3]
+    end0 = _from_rgb565(color0)
+    end1 = _from_rgb565(color1)
+    four_colors = (color0 > color1)[:, None]
+    third = np.where(four_colors, (2 * end0 + end1) / 3, (end0 + end1) / 2)
+    fourth = np.where(four_colors, (end0 + 2 * end1) / 3, 0)
+    palette = np.stack((end0, end1, third, fourth), axis=1)
+
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    indices = (encoded[:, 4:, None] >> shifts) & 3
+    pixels = np.take_along_axis(palette, indices.reshape(-1, 16, 1).astype(np.intp), axis=1)
+    pixels = pixels.reshape(block_rows, block_columns, 4, 4, 3).transpose(0, 2, 1, 3, 4)
+    return np.rint(pixels.reshape(height, width, 3)).astype(np.uint8)
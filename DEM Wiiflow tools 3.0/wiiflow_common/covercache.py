@@ -0,0 +1,130 @@
+"""Pre-built Wiiflow cover cache for each tool.
+
+build_cover_cache() turns every cover in a tool's "renamed cover art" folder
+into a Wiiflow cache file in its "wiiflow cache" folder ("Game.zip.png" becomes
+"Game.zip.wfc"), skipping covers whose cache file is newer than the cover and
+removing cache files whose cover is gone. The transfers then copy that folder
+to wiiflow/cache/<same folders as the covers under wiiflow/boxcovers>.
+
+Covers are converted in a process pool, one cover per task. With NumPy the
+textures are CMPR compressed (cmpr.py), like Wiiflow does by default;
+without it they are stored as RGB565.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from wiiflow_common import cmpr, wfc
+
+CACHE_WORKERS = os.cpu_count() or 1
+
+COVERS_FOLDER = "renamed cover art"
+CACHE_FOLDER = "wiiflow cache"
+CACHE_EXTENSION = '.wfc'
+
+
+def cache_name(cover_name):
+    """Returns the cache file name Wiiflow uses for a cover file name."""
+    return os.path.splitext(cover_name)[0] + CACHE_EXTENSION
+
+
+def cache_destination(destination_cover_art_path):
+    """Maps a wiiflow/boxcovers/... folder on the drive to its wiiflow/cache/... folder."""
+    parts = os.path.normpath(destination_cover_art_path).split(os.sep)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i].lower() == 'boxcovers':
+            parts[i] = 'cache'
+            break
+    return os.sep.join(parts)
+
+
+def cover_cache_transfers(tool_folder, destination_cover_art_path, options=None):
+    """Returns the transfer of a tool's cover cache, or nothing when it has none."""
+    cache_folder = os.path.join(tool_folder, CACHE_FOLDER)
+    if not os.path.isdir(cache_folder):
+        return []
+    return [(cache_folder, cache_destination(destination_cover_art_path), options)]
+
+
+def list_cache_jobs(covers_folder, cache_folder):
+    """Returns (jobs, up to date, orphans).
+
+    jobs are the (cover, cache file) pairs to build, up to date counts the
+    covers that already have a current cache file and orphans are cache files
+    whose cover is gone.
+    """
+    jobs = []
+    up_to_date = 0
+    wanted = set()
+    for root, dirs, files in os.walk(covers_folder):
+        target = os.path.normpath(os.path.join(cache_folder, os.path.relpath(root, covers_folder)))
+        for name in files:
+            if not name.lower().endswith('.png'):
+                continue
+            cover_path = os.path.join(root, name)
+            wfc_path = os.path.join(target, cache_name(name))
+            wanted.add(wfc_path)
+            try:
+                if os.stat(wfc_path).st_mtime_ns >= os.stat(cover_path).st_mtime_ns:
+                    up_to_date += 1
+                    continue
+            except OSError:
+                pass
+            jobs.append((cover_path, wfc_path))
+
+    orphans = []
+    for root, dirs, files in os.walk(cache_folder):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if name.lower().endswith(CACHE_EXTENSION) and path not in wanted:
+                orphans.append(path)
+    return jobs, up_to_date, orphans
+
+
+def _build_one(cover_path, wfc_path, use_cmpr):
+    os.makedirs(os.path.dirname(wfc_path), exist_ok=True)
+    wfc.write_cache_file(cover_path, wfc_path, cmpr.encode_cmpr if use_cmpr else None)
+
+
+def build_cache_folder(covers_folder, cache_folder, workers=CACHE_WORKERS):
+    """Builds cache files in cache_folder for the covers in covers_folder.
+
+    Returns (built, up to date, failed).
+    """
+    if not wfc.pillow_available():
+        return 0, 0, 0
+    use_cmpr = cmpr.numpy_available()
+
+    jobs, up_to_date, orphans = list_cache_jobs(covers_folder, cache_folder)
+    for path in orphans:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Failed to remove {path}: {e}")
+    if not jobs:
+        return 0, up_to_date, 0
+
+    built = 0
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = {pool.submit(_build_one, cover_path, wfc_path, use_cmpr): cover_path
+                   for cover_path, wfc_path in jobs}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is None:
+                built += 1
+            else:
+                print(f"Failed to build the cache for {futures[future]}: {error}")
+                failed += 1
+            done = built + failed
+            if done % 50 == 0 or done == len(jobs):
+                seconds = time.perf_counter() - start
+                print(f"\r  {done} of {len(jobs)} covers ({done / max(seconds, 1e-6):.1f} covers/s)",
+                      end='\n' if done == len(jobs) else '', flush=True)
+    return built, up_to_date, failed
+
+
+def build_cover_cache(tool_folder, workers=CACHE_WORKERS):
+    """Builds the cover cache of one tool and returns (built, up to date, failed)."""
+    return build_cache_folder(os.path.join(tool_folder, COVERS_FOLDER), os.path.join(tool_folder, CACHE_FOLDER), workers)
@@ -0,0 +1,231 @@
+"""Duplicate cover detection: finds ALT, demo and other copies of the same art.
+
+Cover packs often carry the same box art more than once ("ALT" and "demo"
+folders, region copies). Duplicates make find_best_match() rename several
+covers to the same game, so the "How to use.txt" files tell people to delete
+those folders by hand. find_duplicate_covers() does it by looking at the
+pictures instead of the names:
+
+  hashing     every cover is shrunk to greyscale and gets two 64 bit
+              perceptual hashes: a dHash (9x8 pixels, each brighter or darker
+              than its right neighbour) and a pHash (32x32 pixels, the lowest
+              8x8 DCT frequencies above or below their median). The
+              covers are decoded in a process pool, a batch per task, and each
+              batch is hashed at once with NumPy.
+  clustering  two covers are the same picture when both hashes differ in at
+              most a few bits. Instead of comparing every pair, the pHashes
+              are split into 8 bytes and only covers that share a byte are
+              compared: covers that differ in 7 bits or less always share one.
+  keeping     each cluster keeps one cover (see keep_rank()) and the rest are
+              moved to a "duplicate cover art" folder, never deleted.
+
+Needs Pillow and NumPy (pip install pillow numpy).
+"""
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DUPLICATES_FOLDER = "duplicate cover art"
+DEDUP_WORKERS = os.cpu_count() or 1
+BATCH_SIZE = 64
+HASH_SIZE = 32
+
+# Covers are the same picture when both hashes are at most this many bits
+# apart. The byte index finds every pair up to 7 bits apart.
+PHASH_DISTANCE = 6
+DHASH_DISTANCE = 8
+
+# Folder and file names that mark a variant rather than the main cover
+VARIANT_PATTERN = re.compile(r'\b(alt|alternate|alternative|demo|beta|proto|prototype)\b', re.IGNORECASE)
+
+IMAGE_EXTENSIONS = ('.png', '.jpeg', '.jpg')
+
+
+def dependencies_available():
+    """Returns True when Pillow and NumPy are installed, printing how to get them when not."""
+    missing = [name for name, module in (('pillow', Image), ('numpy', np)) if module is None]
+    if missing:
+        print(f"Finding duplicate covers needs {' and '.join(missing)}. Install with: pip install {' '.join(missing)}")
+        return False
+    return True
+
+
+def _dct_matrix(size):
+    k = np.arange(size)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def _pack_bits(bits):
+    """Packs N x 64 booleans into N 64 bit hashes."""
+    return np.packbits(bits.reshape(len(bits), 64), axis=1).view('>u8')[:, 0].astype(np.uint64)
+
+
+def hash_pixels(small, pixels):
+    """Returns (dhashes, phashes) for N images shrunk to 9x8 (N x 8 x 9) and 32x32 (N x 32 x 32)."""
+    small = small.astype(np.int16)
+    pixels = pixels.astype(np.float32)
+
+    # dHash: 9 columns give 8 left/right comparisons per row
+    dhashes = _pack_bits(small[:, :, 1:] > small[:, :, :-1])
+
+    # pHash: 8x8 lowest frequencies of the 2D DCT, compared to their median
+    # (without the DC term, which is just the overall brightness)
+    dct = _dct_matrix(HASH_SIZE).astype(np.float32)
+    frequencies = np.einsum('ij,njk,lk->nil', dct, pixels, dct)[:, :8, :8].reshape(len(pixels), 64)
+    median = np.median(frequencies[:, 1:], axis=1, keepdims=True)
+    phashes = _pack_bits(frequencies > median)
+    return dhashes, phashes
+
+
+def _load_batch(paths):
+    """Decodes a batch of covers. Returns (hashable covers, failures)."""
+    covers = []
+    small = []
+    pixels = []
+    failed = []
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                size = image.size
+                image.draft('L', (HASH_SIZE * 2, HASH_SIZE * 2))
+                grey = image.convert('L')
+            small.append(np.asarray(grey.resize((9, 8), Image.BOX), dtype=np.uint8))
+            pixels.append(np.asarray(grey.resize((HASH_SIZE, HASH_SIZE), Image.BOX), dtype=np.uint8))
+            covers.append({'path': path, 'pixels': size[0] * size[1], 'bytes': os.path.getsize(path)})
+        except Exception as e:
+            failed.append((path, str(e)))
+    if covers:
+        dhashes, phashes = hash_pixels(np.stack(small), np.stack(pixels))
+        for cover, dhash, phash in zip(covers, dhashes, phashes):
+            cover['dhash'] = int(dhash)
+            cover['phash'] = int(phash)
+    return covers, failed
+
+
+def hash_covers(paths, workers=DEDUP_WORKERS):
+    """Returns (covers, failures): a dict per cover with its hashes, and (path, error) pairs."""
+    batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+    covers = []
+    failed = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        for batch_covers, batch_failed in pool.map(_load_batch, batches):
+            covers.extend(batch_covers)
+            failed.extend(batch_failed)
+            done = len(covers) + len(failed)
+            seconds = time.perf_counter() - start
+            print(f"\r  Hashed {done} of {len(paths)} covers ({done / max(seconds, 1e-6):.1f} covers/s)",
+                  end='\n' if done == len(paths) else '', flush=True)
+    return covers, failed
+
+
+def _bit_counts(values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1)
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def cluster_covers(covers, phash_distance=PHASH_DISTANCE, dhash_distance=DHASH_DISTANCE):
+    """Groups covers showing the same picture. Returns clusters of 2 or more covers."""
+    if not covers:
+        return []
+    phashes = np.array([cover['phash'] for cover in covers], dtype=np.uint64)
+    dhashes = np.array([cover['dhash'] for cover in covers], dtype=np.uint64)
+    parents = list(range(len(covers)))
+
+    for band in range(8):
+        keys = (phashes >> np.uint64(band * 8)) & np.uint64(0xFF)
+        order = np.argsort(keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group) < 2:
+                continue
+            close = ((_bit_counts(phashes[group][:, None] ^ phashes[group][None, :]) <= phash_distance)
+                     & (_bit_counts(dhashes[group][:, None] ^ dhashes[group][None, :]) <= dhash_distance))
+            for a, b in zip(*np.nonzero(np.triu(close, 1))):
+                root_a, root_b = _find(parents, group[a]), _find(parents, group[b])
+                if root_a != root_b:
+                    parents[root_b] = root_a
+
+    clusters = {}
+    for i in range(len(covers)):
+        clusters.setdefault(_find(parents, i), []).append(covers[i])
+    return [cluster for cluster in clusters.values() if len(cluster) > 1]
+
+
+def is_variant(path, art_folder):
+    """True when the cover's folders or name mark it as an ALT/demo/... variant."""
+    return bool(VARIANT_PATTERN.search(os.path.relpath(path, art_folder)))
+
+
+def keep_rank(cover, art_folder):
+    """Sort key for the cover a cluster keeps: the smallest one wins.
+
+    Main covers before ALT/demo variants, then the sharpest (most pixels),
+    then the biggest file, then the one in the shallowest folder, then by name.
+    """
+    relative = os.path.relpath(cover['path'], art_folder)
+    return (is_variant(cover['path'], art_folder), -cover['pixels'], -cover['bytes'],
+            relative.count(os.sep), relative.lower())
+
+
+def find_duplicate_covers(art_folder, workers=DEDUP_WORKERS):
+    """Returns [(cover kept, [duplicates])] for the covers in art_folder."""
+    paths = []
+    for root, dirs, files in os.walk(art_folder):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    paths.sort()
+    if not paths:
+        return []
+
+    covers, failed = hash_covers(paths, workers)
+    for path, error in failed:
+        print(f"Could not read {path}: {error}")
+
+    results = []
+    for cluster in cluster_covers(covers):
+        cluster.sort(key=lambda cover: keep_rank(cover, art_folder))
+        results.append((cluster[0]['path'], [cover['path'] for cover in cluster[1:]]))
+    results.sort()
+    return results
+
+
+def move_duplicates(results, art_folder, duplicates_folder):
+    """Moves the duplicates out of art_folder, keeping their subfolders. Returns how many moved."""
+    moved = 0
+    for kept, duplicates in results:
+        for path in duplicates:
+            target = os.path.join(duplicates_folder, os.path.relpath(path, art_folder))
+            if os.path.exists(target):
+                print(f"'{target}' already exists. Skipping '{path}'.")
+                continue
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(path, target)
+                moved += 1
+            except OSError as e:
+                print(f"Failed to move '{path}': {e}")
+    return moved
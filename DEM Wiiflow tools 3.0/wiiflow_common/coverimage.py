@@ -0,0 +1,185 @@
+"""Cover normalization: every cover becomes a real 1090x680 PNG.
+
+Wiiflow wants 1090x680 PNG covers, but cover packs often come as JPEGs or in
+other sizes, and the DAT tools only rename a cover to "<game>.<ext>.png"
+without converting it. normalize_folder() decodes each cover in a folder,
+resizes it to 1090x680 and saves it back as a PNG under the same name.
+
+Covers are converted in a process pool. Only a few covers are handed to the
+pool at a time, so memory use stays the same however big the folder is.
+
+A hash cache (a JSON file kept next to the folder, not inside it, so it never
+ends up on the SD card) remembers the SHA-1 of every cover that is already
+normalized. A cover is hashed only when its size or date changed since the
+last run, and a cover whose hash is known is never decoded again, even if it
+was renamed.
+
+Needs Pillow (pip install pillow).
+"""
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+COVER_SIZE = (1090, 680)
+HASH_CACHE_NAME = "normalized covers.json"
+NORMALIZE_WORKERS = os.cpu_count() or 1
+# Covers handed to the pool at once, per worker
+QUEUE_PER_WORKER = 4
+
+# Hashes of covers that are already normalized, set in each worker process
+_normalized_hashes = frozenset()
+
+
+def pillow_available():
+    """Returns True when Pillow is installed, printing how to get it when it is not."""
+    if Image is None:
+        print("Converting covers to 1090x680 PNG needs Pillow. Install it with: pip install pillow")
+        return False
+    return True
+
+
+def hash_cache_path(covers_folder):
+    """Returns where the hash cache of a covers folder is kept (next to the folder)."""
+    folder = os.path.normpath(os.path.abspath(covers_folder))
+    return os.path.join(os.path.dirname(folder), HASH_CACHE_NAME)
+
+
+def load_hash_cache(path):
+    """Returns {relative path: [size, mtime_ns, sha1]} from a hash cache file."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hash_cache(path, files):
+    temp_path = path + '.part'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'files': files}, f)
+    os.replace(temp_path, path)
+
+
+def _init_worker(normalized_hashes):
+    global _normalized_hashes
+    _normalized_hashes = normalized_hashes
+
+
+def normalize_cover(path, normalized_hashes=frozenset()):
+    """Rewrites one cover as a 1090x680 PNG when it isn't one already.
+
+    Returns (sha1 of the cover as it is now, True if it was rewritten).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if digest in normalized_hashes:
+        return digest, False
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except OSError:
+        raise ValueError("not an image file (empty, cut short or not a picture)")
+    with image:
+        if image.format == 'PNG' and image.size == COVER_SIZE and image.mode in ('RGB', 'RGBA'):
+            return digest, False
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        image = image.resize(COVER_SIZE, Image.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+    data = output.getvalue()
+
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return hashlib.sha1(data).hexdigest(), True
+
+
+def _normalize_job(path):
+    return normalize_cover(path, _normalized_hashes)
+
+
+def list_covers(covers_folder):
+    """Returns the paths of the PNG covers in a folder and its subfolders, sorted."""
+    paths = []
+    for root, dirs, files in os.walk(covers_folder):
+        for name in files:
+            if name.lower().endswith('.png'):
+                paths.append(os.path.join(root, name))
+    paths.sort()
+    return paths
+
+
+def normalize_folder(covers_folder, workers=NORMALIZE_WORKERS, cache_path=None):
+    """Normalizes every cover in a folder. Returns (converted, already fine, failed)."""
+    if not pillow_available():
+        return 0, 0, 0
+    if cache_path is None:
+        cache_path = hash_cache_path(covers_folder)
+
+    cached = load_hash_cache(cache_path)
+    normalized_hashes = frozenset(entry[2] for entry in cached.values())
+    files = {}
+    jobs = []
+    for path in list_covers(covers_folder):
+        relative = os.path.relpath(path, covers_folder)
+        st = os.stat(path)
+        entry = cached.get(relative)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            files[relative] = entry
+        else:
+            jobs.append(path)
+
+    converted = 0
+    already_fine = len(files)
+    failed = 0
+    if jobs:
+        workers = max(1, min(workers, len(jobs)))
+        start = time.perf_counter()
+        pending = {}
+        remaining = iter(jobs)
+        finished = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(normalized_hashes,)) as pool:
+            while True:
+                # Keep the queue topped up without handing the whole folder over at once
+                for path in remaining:
+                    pending[pool.submit(_normalize_job, path)] = path
+                    if len(pending) >= workers * QUEUE_PER_WORKER:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        digest, rewritten = future.result()
+                        st = os.stat(path)
+                    except Exception as e:
+                        print(f"\nFailed to convert {path}: {e}")
+                        failed += 1
+                        continue
+                    files[os.path.relpath(path, covers_folder)] = [st.st_size, st.st_mtime_ns, digest]
+                    if rewritten:
+                        converted += 1
+                    else:
+                        already_fine += 1
+                finished += len(done)
+                seconds = time.perf_counter() - start
+                print(f"\r  {finished} of {len(jobs)} covers ({finished / max(seconds, 1e-6):.1f} covers/s)",
+                      end='\n' if finished == len(jobs) else '', flush=True)
+
+    # Covers that are gone drop out of the cache here
+    save_hash_cache(cache_path, files)
+    return converted, already_fine, failed
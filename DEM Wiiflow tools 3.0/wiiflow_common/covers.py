@@ -0,0 +1,79 @@
+"""Cover materialization: puts a matched cover at its Wiiflow name as cheaply as possible.
+
+The DAT tools used to copy every matched cover and then move the copy, which
+reads and rewrites every PNG. materialize_cover() picks the cheapest option
+that is still correct for each file:
+
+  rename    the original is not needed any more (same drive)
+  reflink   the original is kept and the filesystem can clone blocks (Btrfs, XFS)
+  hardlink  the original is kept and both names are on the same filesystem
+  copy      a streamed copy, only when none of the above work
+
+Reflinked and copied covers are independent files. Hardlinked covers share
+their data with the original, which is fine because the tools only ever
+rename or replace covers, they never edit one in place.
+"""
+import errno
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl number for FICLONE from <linux/fs.h>
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported here")
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+
+
+def _hardlink(src, dst):
+    os.link(src, dst)
+
+
+def _copy(src, dst):
+    shutil.copyfile(src, dst)
+
+
+def materialize_cover(src, dst, keep_original=False):
+    """Makes src available as dst and returns the method that was used."""
+    if not keep_original:
+        try:
+            os.replace(src, dst)
+            return 'rename'
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    # Build the new name next to dst first so a failed attempt never leaves
+    # a half written cover behind, then swap it in.
+    temp_path = dst + '.part'
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    for method, make in (('reflink', _reflink), ('hardlink', _hardlink), ('copy', _copy)):
+        if method == 'hardlink' and not keep_original:
+            continue  # A rename already failed, so the drives differ
+        try:
+            make(src, temp_path)
+        except OSError:
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            if method == 'copy':
+                raise
+            continue
+        os.replace(temp_path, dst)
+        if not keep_original:
+            os.remove(src)
+        return method
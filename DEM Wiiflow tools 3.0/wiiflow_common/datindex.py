@@ -0,0 +1,238 @@
+"""Game identification by checksum against No-Intro/Redump DAT files.
+
+Put the system's DAT files (Logiqx XML, the .dat files No-Intro and Redump
+hand out) in a "dat files" folder inside the tool folder. identify_games()
+then hashes every game (romhash.py) and looks the hashes up in an index built
+from those DATs: SHA-1 first, then MD5, then CRC32 together with the size.
+A game found there is known for certain by its DAT title, so the tools only
+have to fall back to fuzzy name matching for dumps the DATs don't know.
+
+Zipped games aren't hashed at all: a zip's central directory already holds
+the CRC32 and size of every ROM in it, which is what the DATs list too, so a
+whole zipped set is identified from the zip directories alone. When a system's
+dumps can carry a header the DATs leave out (header_size), the zips that
+aren't found that way are hashed after all, with the header left out.
+
+DATs that list serials (No-Intro's game codes like "AGB-AXVE-USA", Redump's
+serials) are indexed by them too. A tool that can read a game's code from the
+ROM header (gbrom.py, segarom.py) passes those to identify_games() as serials,
+and those games are found without hashing anything.
+
+The hashes are kept in the tool's hash cache (hashcache.py), so the next run
+only hashes new or changed files.
+
+Without a "dat files" folder nothing is hashed and the tools work as before.
+"""
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from wiiflow_common import hashcache, romhash
+
+DAT_FOLDER = "dat files"
+DAT_EXTENSIONS = ('.dat', '.xml')
+# Serials that start with one of these hold the 4 character game code the ROM header has
+GAME_CODE_PREFIXES = {'AGB', 'CGB', 'DMG'}
+# Type field a Genesis header puts before the product code ("GM MK-1079 -00")
+SEGA_SERIAL_TYPE = re.compile(r'^(GM|AI|OS|BR|SP)\s+')
+SEGA_PRODUCT_CODE = re.compile(r'([A-Z]*)[\s-]*0*(\d+)')
+
+
+def new_index():
+    """Returns an empty DAT index."""
+    return {'sha1': {}, 'md5': {}, 'crc': {}, 'serial': {}, 'games': 0}
+
+
+def serial_keys(serial):
+    """The keys a serial is indexed under: all of it, plus the game code of a Game Boy serial.
+
+    "AGB-AXVE-USA" gives "AGBAXVEUSA" and "AXVE", so the bare game code in a
+    ROM header finds it. Other serials only match in full, so "T-1079" and
+    "MK-1079" stay two different games.
+    """
+    parts = re.findall(r'[0-9A-Z]+', (serial or '').upper())
+    keys = {''.join(parts)} if parts else set()
+    if len(parts) >= 2 and parts[0] in GAME_CODE_PREFIXES and len(parts[1]) == 4:
+        keys.add(parts[1])
+    return keys
+
+
+def sega_serial_keys(serial, lookup=False):
+    """The product code keys of a Sega serial, without the type field and revision.
+
+    "MK-1079-00" in a DAT and "GM MK-1079 -00" in a Genesis header both give
+    "sega:MK1079". A DAT serial is also indexed by its bare number
+    ("sega#1079"), since Master System and Game Gear headers hold nothing
+    else; with lookup, a serial only uses that key when it has no prefix, so
+    "MK-1079" never finds "T-1079".
+    """
+    match = SEGA_PRODUCT_CODE.search(SEGA_SERIAL_TYPE.sub('', (serial or '').upper().strip()))
+    if not match:
+        return set()
+    prefix, number = match.groups()
+    if lookup:
+        return {f'sega:{prefix}{number}'} if prefix else {f'sega#{number}'}
+    return {f'sega:{prefix}{number}', f'sega#{number}'}
+
+
+def _add_serial(index, serial, title, sega=False):
+    keys = serial_keys(serial)
+    if sega:
+        # DATs list several serials in one field now and then ("MK-7001, MK-7001-50")
+        for part in re.split(r'[,/]', serial or ''):
+            keys |= sega_serial_keys(part)
+    for key in keys:
+        known = index['serial'].setdefault(key, title)
+        if known is not None and plain_title(known) != plain_title(title):
+            # Shared by different games, so it can't tell them apart
+            index['serial'][key] = None
+
+
+def load_dat(path, index=None):
+    """Adds the games of one Logiqx XML DAT to an index (a new one when None) and returns it."""
+    if index is None:
+        index = new_index()
+    sega = False
+    for event, element in ET.iterparse(path, events=('end',)):
+        if element.tag == 'header':
+            # "Sega - Mega Drive - Genesis", "Sega - Master System - Mark III"...
+            sega = (element.findtext('name') or '').lower().startswith('sega')
+            continue
+        if element.tag not in ('game', 'machine'):
+            continue
+        title = element.get('name')
+        for serial in element.iter('serial'):
+            _add_serial(index, serial.text, title, sega)
+        for rom in element.iter('rom'):
+            if rom.get('serial'):
+                _add_serial(index, rom.get('serial'), title, sega)
+            sha1 = (rom.get('sha1') or '').lower()
+            md5 = (rom.get('md5') or '').lower()
+            crc = (rom.get('crc') or '').lower()
+            if sha1:
+                index['sha1'].setdefault(sha1, title)
+            if md5:
+                index['md5'].setdefault(md5, title)
+            if crc and rom.get('size', '').isdigit():
+                index['crc'].setdefault((crc.zfill(8), int(rom.get('size'))), title)
+        index['games'] += 1
+        element.clear()
+    return index
+
+
+def load_dats(dat_folder):
+    """Loads every DAT in a folder into one index. Returns None when there are none."""
+    if not os.path.isdir(dat_folder):
+        return None
+    index = None
+    for name in sorted(os.listdir(dat_folder)):
+        if not name.lower().endswith(DAT_EXTENSIONS):
+            continue
+        path = os.path.join(dat_folder, name)
+        try:
+            index = load_dat(path, index)
+        except (OSError, ET.ParseError) as e:
+            print(f"Could not read the DAT '{path}': {e}")
+    return index
+
+
+def lookup(index, hashes):
+    """Returns the DAT title for one set of hashes, or None.
+
+    hashes may only have a CRC32 and size, like the ones read from a zip.
+    """
+    return (index['sha1'].get(hashes.get('sha1'))
+            or index['md5'].get(hashes.get('md5'))
+            or index['crc'].get((hashes['crc32'], hashes['size'])))
+
+
+def lookup_serial(index, serial):
+    """Returns the DAT title for a serial or game code, or None when it's unknown or not unique."""
+    keys = serial_keys(serial) | sega_serial_keys(serial, lookup=True)
+    titles = {index['serial'].get(key) for key in keys} - {None}
+    if len(titles) == 1:
+        return titles.pop()
+    return None
+
+
+def _titles(index, hashes_by_path, paths):
+    titles = {}
+    for path, members in hashes_by_path.items():
+        for name, hashes in members:
+            title = lookup(index, hashes)
+            if title:
+                titles[paths[path]] = title
+                break
+    return titles
+
+
+def identify_games(games_folder, game_files, dat_folder=None, header_size=None, serials=None, cache_folder=None):
+    """Identifies games by checksum. Returns {game file: DAT title} for the ones the DATs know.
+
+    game_files are names inside games_folder. The DATs are read from the
+    "dat files" folder next to games_folder unless dat_folder is given.
+    header_size is passed on to romhash.hash_files(). serials ({game file:
+    serial}) are looked up after the zip CRCs, and only the games neither of
+    them identifies are hashed. The hash cache is kept in cache_folder, the
+    folder above games_folder unless given.
+    """
+    tool_folder = os.path.dirname(os.path.abspath(games_folder))
+    if dat_folder is None:
+        dat_folder = os.path.join(tool_folder, DAT_FOLDER)
+    index = load_dats(dat_folder)
+    if not index or not game_files:
+        return {}
+
+    print(f"Identifying your games by checksum with {index['games']} games from the DATs in '{DAT_FOLDER}'...")
+    paths = {os.path.join(games_folder, game_file): game_file for game_file in game_files}
+    zips = [path for path in paths if path.lower().endswith('.zip')]
+    titles = _titles(index, romhash.read_zip_crcs(zips), paths)
+
+    # Game codes next, they cost nothing to look up either
+    by_serial = 0
+    wanted = set(game_files)
+    for game_file, serial in (serials or {}).items():
+        title = lookup_serial(index, serial)
+        if title and game_file in wanted and game_file not in titles:
+            titles[game_file] = title
+            by_serial += 1
+    if by_serial:
+        print(f"  {by_serial} games identified by the game code in their header.")
+
+    others = [path for path in paths if not path.lower().endswith('.zip') and paths[path] not in titles]
+    if header_size is not None:
+        # A zipped ROM with a header has the header in its zip CRC too
+        others += [path for path in zips if paths[path] not in titles]
+    if others:
+        hash_cache = hashcache.open_cache(cache_folder or tool_folder)
+        try:
+            titles.update(_titles(index, romhash.hash_files(others, hash_cache=hash_cache, header_size=header_size), paths))
+            hashcache.prune(hash_cache)
+        finally:
+            hashcache.close_cache(hash_cache)
+    print(f"{len(titles)} of {len(game_files)} games identified. The rest are matched by name.")
+    return titles
+
+
+def plain_title(title):
+    """A title without (region)/[version] tags, lowercase, for exact comparisons.
+
+    Trailing dots are dropped too, because Windows file names can't end with one.
+    """
+    title = re.sub(r'[\(\[].*?[\)\]]', '', title)
+    return ' '.join(title.split()).rstrip('. ').lower()
+
+
+def title_lookup(txt_files):
+    """Returns {plain title: txt file} for the names in a plain text names list."""
+    lookup_table = {}
+    for txt_file in txt_files:
+        lookup_table.setdefault(plain_title(os.path.splitext(os.path.basename(txt_file))[0]), txt_file)
+    return lookup_table
+
+
+def exact_match(dat_title, known_titles):
+    """Returns the txt file named exactly like a DAT title (tags aside), or None."""
+    if not dat_title:
+        return None
+    return known_titles.get(plain_title(dat_title))
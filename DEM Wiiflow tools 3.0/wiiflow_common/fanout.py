@@ -0,0 +1,285 @@
+"""Fan-out transfers: builds several SD/USB cards at once from one read of the source.
+
+Each card gets its own plan (so sync mode, the journal and the pre-flight
+check work per card) and its own writer thread. A single reader goes through
+the source files once, in the same folder order as a normal transfer, and
+hands every chunk it reads to the writers of the cards that need that file.
+
+Each writer has a small queue of its own. A card that keeps failing is marked
+dead after MAX_FAILURES_IN_A_ROW errors and its writer just empties its queue
+from then on, so the other cards carry on at full speed. A card that is slow
+but working does hold the reader back once its queue is full, since the data
+has to reach it at some point. A card that hangs (a write that never returns)
+is marked dead once its writer hasn't taken anything from its queue for
+STALL_SECONDS, and the reader stops waiting for it.
+
+A file that fails on a card is removed from it again, so no later run takes
+a half written file for a finished one.
+"""
+import os
+import queue
+import shutil
+import threading
+import time
+
+from wiiflow_common import journal, largefile, preflight, transfer, verification
+
+CHUNK_SIZE = 8 * 1024 * 1024
+QUEUE_CHUNKS = 8
+MAX_FAILURES_IN_A_ROW = 5
+PROGRESS_INTERVAL = 0.5
+STALL_SECONDS = 60
+PUT_WAIT = 1.0
+
+
+def _discard(f, job):
+    """Closes and removes a file that was not written completely."""
+    if f is not None:
+        try:
+            f.close()
+        except OSError:
+            pass
+    try:
+        os.remove(job['destination'])
+    except OSError:
+        pass
+
+
+def _run_writer(writer, verify, transfer_journal, journal_lock):
+    plan = writer['plan']
+    stats = writer['stats']
+    start = writer['start'] = time.perf_counter()
+    try:
+        for folder in sorted(set(plan['folders'])):
+            os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        writer['dead'] = e
+
+    job = None
+    f = None
+    failures_in_a_row = 0
+    while True:
+        kind, item = writer['queue'].get()
+        writer['progress'] += 1
+        if kind == 'end':
+            break
+        if writer['dead'] is not None:
+            if f is not None:
+                _discard(f, job)
+                f = None
+            continue  # Keep emptying the queue so the reader never waits on a dead card
+        try:
+            if kind == 'open':
+                job = item
+                f = open(job['destination'], 'wb')
+                if job['size'] >= transfer.LARGE_FILE_SIZE:
+                    largefile.preallocate(f.fileno(), job['size'])
+            elif f is None:
+                continue  # This file already failed, skip the rest of it
+            elif kind == 'data':
+                f.write(item)
+                writer['written'] += len(item)
+            elif kind == 'fail':
+                raise item
+            elif kind == 'close':
+                f.truncate()
+                f.close()
+                f = None
+                shutil.copystat(job['source'], job['destination'])
+                if verify:
+                    verification.check_copy(job, item)
+                    stats['verified'] += 1
+                stats['files'] += 1
+                stats['bytes'] += job['size']
+                failures_in_a_row = 0
+                if transfer_journal is not None:
+                    with journal_lock:
+                        journal.record_complete(transfer_journal, job)
+        except Exception as e:
+            if job is not None and (f is not None or kind == 'close'):
+                _discard(f, job)
+            f = None
+            stats['failed'].append((job, e))
+            failures_in_a_row += 1
+            if failures_in_a_row >= MAX_FAILURES_IN_A_ROW:
+                writer['dead'] = e
+
+    if plan['extra'] and writer['dead'] is None:
+        stats['removed'] = transfer.remove_extra_files(plan)
+    stats['seconds'] = time.perf_counter() - start
+
+
+def _send(writer, message):
+    """Queues a message for a writer. Returns False when the writer is stuck and was marked dead.
+
+    A slow card is waited for as long as it keeps taking messages; one that
+    takes nothing for STALL_SECONDS is given up on.
+    """
+    if writer['stalled']:
+        return False
+    last_progress = writer['progress']
+    waited = 0.0
+    while True:
+        try:
+            writer['queue'].put(message, timeout=PUT_WAIT)
+            return True
+        except queue.Full:
+            if writer['progress'] != last_progress:
+                last_progress = writer['progress']
+                waited = 0.0
+                continue
+            waited += PUT_WAIT
+            if waited >= STALL_SECONDS:
+                writer['stalled'] = True
+                writer['stats']['seconds'] = time.perf_counter() - writer['start']
+                writer['dead'] = TimeoutError(f"the drive stopped responding for {STALL_SECONDS} seconds")
+                print(f"\n{writer['drive']} stopped responding, carrying on without it.")
+                return False
+
+
+def print_progress(writers, final=False):
+    """Prints one progress line with every card's share of the transfer."""
+    parts = []
+    for writer in writers:
+        if writer['dead'] is not None:
+            parts.append(f"{writer['drive']} FAILED")
+        else:
+            percent = writer['written'] * 100 / writer['total'] if writer['total'] else 100
+            parts.append(f"{writer['drive']} {percent:5.1f}%")
+    print('\r  ' + ' | '.join(parts), end='\n' if final else '', flush=True)
+
+
+def _read_order(drive, job):
+    folder, name = os.path.split(os.path.relpath(job['destination'], drive))
+    return folder.lower(), name.lower()
+
+
+def fan_out(drive_transfers, report_folder=None):
+    """Runs the same transfers to several drives, reading each source file once.
+
+    drive_transfers is a list of (drive, transfers) with the transfers built for
+    that drive, as for transfer.transfer_all(). Returns {drive: stats}.
+    """
+    writers = []
+    all_plans = []
+    for drive, transfers in drive_transfers:
+        print(f"\nPlanning {drive}")
+        plans = []
+        for planned in transfers:
+            plan = transfer.prepare_transfer(*planned)
+            if plan is not None:
+                plans.append(plan)
+        if plans:
+            writers.append({'drive': drive, 'plans': plans})
+            all_plans.extend(plans)
+    if not writers:
+        return {}
+
+    if report_folder is None:
+        report_folder = os.path.dirname(os.path.abspath(all_plans[0]['source']))
+    transfer_journal = journal.open_journal(report_folder)
+    journal_lock = threading.Lock()
+    verify = any(plan['options'].get('verify') for plan in all_plans)
+
+    ready = []
+    for writer in writers:
+        resumed = sum(journal.skip_completed(transfer_journal, plan) for plan in writer['plans'])
+        if resumed:
+            print(f"{writer['drive']}: resuming an interrupted transfer, {resumed} files are already there.")
+        if not preflight.check_plans(writer['plans']):
+            print(f"Skipping {writer['drive']}.")
+            continue
+        writer['plan'] = transfer.merge_plans(writer['plans'])
+        writer['total'] = sum(job['size'] for job in writer['plan']['jobs'])
+        writer['written'] = 0
+        writer['stats'] = transfer.new_stats()
+        writer['stats']['skipped'] = writer['plan']['skipped']
+        writer['dead'] = None
+        writer['stalled'] = False
+        writer['progress'] = 0
+        writer['queue'] = queue.Queue(maxsize=QUEUE_CHUNKS)
+        ready.append(writer)
+    writers = ready
+    if not writers:
+        return {}
+
+    # Which cards need each source file, in the order the cards are written.
+    # A writer takes one file at a time, so a card that wants the same source
+    # in two places gets it in a second read of its own.
+    sources = {}
+    for writer in writers:
+        copies = {}
+        for job in writer['plan']['jobs']:
+            copy = copies.get(job['source'], 0)
+            copies[job['source']] = copy + 1
+            entry = sources.setdefault((job['source'], copy), {'order': (_read_order(writer['drive'], job), copy),
+                                                               'targets': []})
+            entry['targets'].append((writer, job))
+
+    for writer in writers:
+        # Daemon threads, so a drive that hangs for good can't keep the tool from exiting
+        writer['thread'] = threading.Thread(target=_run_writer, args=(writer, verify, transfer_journal, journal_lock),
+                                            daemon=True)
+        writer['thread'].start()
+
+    last_report = 0.0
+    for (source, copy), entry in sorted(sources.items(), key=lambda item: item[1]['order']):
+        targets = [(writer, job) for writer, job in entry['targets'] if writer['dead'] is None]
+        if not targets:
+            continue
+        for writer, job in targets:
+            _send(writer, ('open', job))
+
+        digest = verification.new_digest() if verify else None
+        try:
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    if digest is not None:
+                        digest.update(chunk)
+                    for writer, job in targets:
+                        _send(writer, ('data', chunk))
+                    now = time.perf_counter()
+                    if now - last_report >= PROGRESS_INTERVAL:
+                        last_report = now
+                        print_progress(writers)
+        except OSError as e:
+            print(f"\nFailed to read {source}: {e}")
+            for writer, job in targets:
+                _send(writer, ('fail', e))
+            continue
+
+        for writer, job in targets:
+            _send(writer, ('close', digest.hexdigest() if digest is not None else None))
+
+    for writer in writers:
+        _send(writer, ('end', None))
+    for writer in writers:
+        if not writer['stalled']:
+            writer['thread'].join()
+    print_progress(writers, final=True)
+
+    results = {}
+    for writer in writers:
+        stats = writer['stats']
+        print(f"\n{writer['drive']}:")
+        transfer.print_transfer_summary(stats)
+        if writer['dead'] is not None:
+            print(f"Stopped writing to {writer['drive']}, the drive keeps failing: {writer['dead']}")
+        elif stats['failed']:
+            print(f"{len(stats['failed'])} file(s) could not be transferred to {writer['drive']}.")
+            for job, error in stats['failed']:
+                print(f"  {job['destination']}: {error}")
+        else:
+            print(f"Everything has been successfully transferred to {writer['drive']}")
+        if verify:
+            try:
+                verification.write_report(writer['plans'], stats, report_folder)
+            except OSError as e:
+                print(f"Could not write the verification report: {e}")
+        results[writer['drive']] = stats
+
+    finished = all(writer['dead'] is None and not writer['stats']['failed'] for writer in writers)
+    # A hung writer may still wake up and finish a file, so close under the lock
+    with journal_lock:
+        journal.close_journal(transfer_journal, finished)
+    return results
@@ -0,0 +1,130 @@
+"""Game Boy, Game Boy Color and Game Boy Advance cartridge headers.
+
+Every Game Boy cartridge has a header at a fixed place, checked by the
+console's boot ROM before the game starts:
+
+  GB/GBC  0x104  Nintendo logo (48 bytes)
+          0x134  title (16 bytes, 15 or 11 on GBC carts)
+          0x13F  game code (4 bytes, only on later GBC carts)
+          0x143  GBC flag (0x80 or 0xC0)
+          0x14A  destination (0 Japan, 1 elsewhere)
+          0x14B  old licensee code (0x33 when the cart has a game code)
+          0x14D  header checksum over 0x134-0x14C
+  GBA     0x0A0  title (12 bytes)
+          0x0AC  game code (4 bytes, the last one is the region)
+          0x0B2  always 0x96
+          0x0BD  complement check over 0x0A0-0x0BC
+
+A dump whose header checksum doesn't add up won't even boot, so probe() flags
+it as damaged. probe() reads only those 336 bytes, and probe_folder() reads a
+whole library on a few threads in a moment.
+
+The game code ("AXVE" for Pokemon Ruby USA) is what the No-Intro DATs list
+as the serial, so the tools look games up by it (datindex.identify_games()
+with serials) before anything has to be hashed.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+HEADER_END = 0x150
+NEW_LICENSEE = 0x33
+PROBE_WORKERS = 8
+
+NINTENDO_LOGO = bytes.fromhex('ceed6666cc0d000b03730083000c000d0008111f8889000e'
+                              'dccc6ee6ddddd999bbbb67636e0eecccdddc999fbbb9333e')
+
+GBA_REGIONS = {
+    'J': 'Japan', 'E': 'USA', 'P': 'Europe', 'D': 'Germany', 'F': 'France',
+    'I': 'Italy', 'S': 'Spain', 'H': 'Netherlands', 'K': 'Korea', 'C': 'China',
+    'U': 'Australia', 'X': 'Europe', 'Y': 'Europe',
+}
+
+
+def _text(raw):
+    return ' '.join(raw.split(b'\0')[0].decode('ascii', errors='replace').split())
+
+
+def _game_code(raw):
+    code = raw.decode('ascii', errors='replace')
+    if len(code) == 4 and all(c.isupper() or c.isdigit() for c in code):
+        return code
+    return None
+
+
+def _gb_header(head, result):
+    checksum = 0
+    for byte in head[0x134:0x14D]:
+        checksum = (checksum - byte - 1) & 0xFF
+    cgb = head[0x143] in (0x80, 0xC0)
+    result['system'] = 'GBC' if cgb else 'GB'
+    # The game code took the end of the title on GBC carts made after 1998. Those
+    # use the new licensee code (0x33), and their title may fill all 11 bytes.
+    code = _game_code(head[0x13F:0x143]) if cgb and head[0x14B] == NEW_LICENSEE else None
+    result['game_code'] = code
+    result['title'] = _text(head[0x134:0x13F if code else (0x143 if cgb else 0x144)]) or None
+    result['region'] = 'Japan' if head[0x14A] == 0 else 'Outside Japan'
+    result['valid'] = checksum == head[0x14D]
+    if head[0x104:0x134] != NINTENDO_LOGO:
+        result['problem'] = "the Nintendo logo in the header is damaged, the dump may be bad"
+    elif not result['valid']:
+        result['problem'] = "header checksum doesn't add up, the dump may be bad"
+
+
+def _gba_header(head, result):
+    checksum = 0
+    for byte in head[0xA0:0xBD]:
+        checksum = (checksum - byte) & 0xFF
+    checksum = (checksum - 0x19) & 0xFF
+    code = _game_code(head[0xAC:0xB0])
+    result['system'] = 'GBA'
+    result['game_code'] = code
+    result['title'] = _text(head[0xA0:0xAC]) or None
+    result['region'] = GBA_REGIONS.get(code[3]) if code else None
+    result['valid'] = head[0xB2] == 0x96 and checksum == head[0xBD]
+    if not result['valid']:
+        result['problem'] = "header complement check doesn't add up, the dump may be bad"
+
+
+def probe(path):
+    """Reads the header of one .gb, .gbc or .gba ROM. Returns a dict:
+
+    system ('GB', 'GBC' or 'GBA'), title, game_code (None when the cart has
+    none), region, valid (True when the header checks out) and problem
+    (None or a short description).
+    """
+    result = {'path': path, 'system': None, 'title': None, 'game_code': None, 'region': None,
+              'valid': False, 'problem': None}
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(HEADER_END)
+    except OSError as e:
+        result['problem'] = f"unreadable ({e.strerror or e})"
+        return result
+    if len(head) < HEADER_END:
+        result['problem'] = "too small to be a ROM"
+    elif path.lower().endswith('.gba'):
+        _gba_header(head, result)
+    else:
+        _gb_header(head, result)
+    return result
+
+
+def probe_folder(folder, game_files, workers=PROBE_WORKERS):
+    """Probes game_files (names in folder) on a few threads. Returns {game file: probe result}.
+
+    ROMs with a damaged header are printed.
+    """
+    if not game_files:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(game_files)))) as pool:
+        results = dict(zip(game_files, pool.map(probe, [os.path.join(folder, f) for f in game_files])))
+    for game_file, result in results.items():
+        if result['problem']:
+            print(f"Check '{game_file}': {result['problem']}.")
+    return results
+
+
+def game_codes(results):
+    """Returns {game file: game code} for the probed ROMs with a good header and a game code."""
+    return {game_file: result['game_code'] for game_file, result in results.items()
+            if not result['problem'] and result['game_code']}
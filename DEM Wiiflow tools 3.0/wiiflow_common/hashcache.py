@@ -0,0 +1,123 @@
+"""Hash cache: remembers ROM checksums between runs.
+
+Hashing a whole set, or one 700 MB PS1 bin, on every run is wasted time when
+the files haven't changed. Each tool keeps a "hash cache.sqlite" in its own
+folder with the hashes of every file it hashed, keyed by the file's device
+and inode (its file ID on Windows) and checked against its size and mtime.
+
+Renaming a file keeps its inode and mtime, so the renames the DAT tools do
+themselves don't throw the hashes away. A file that was changed gets a new
+size or mtime and is hashed again. prune() drops the entries of files that
+were not seen in this run and whose last known path is gone.
+
+The hashes depend on what the tools leave out of them (SNES copier headers,
+iNES headers, Atari 7800 and Lynx headers). If that ever changes, CACHE_VERSION goes up and caches written
+with another version are started over.
+
+Filesystems without stable file IDs (st_ino is 0, like FAT on some systems)
+are simply not cached.
+"""
+import json
+import os
+import sqlite3
+
+CACHE_NAME = "hash cache.sqlite"
+# Bumped whenever the hashes kept for the same file change
+CACHE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    hashes TEXT NOT NULL,
+    PRIMARY KEY (device, inode)
+)
+"""
+
+
+def open_cache(folder):
+    """Opens (or creates) the hash cache kept in folder. Returns None if it can't be used."""
+    path = os.path.join(folder, CACHE_NAME)
+    try:
+        connection = sqlite3.connect(path)
+        if connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            connection.execute("DROP TABLE IF EXISTS hashes")
+            connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        connection.execute(SCHEMA)
+    except sqlite3.Error as e:
+        print(f"Not using the hash cache '{path}': {e}")
+        return None
+    return {'path': path, 'connection': connection, 'seen': set(), 'hits': 0}
+
+
+def _key(st):
+    if not st.st_ino:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def lookup(hash_cache, path, st):
+    """Returns the cached hashes of a file, or None when it has to be hashed."""
+    if hash_cache is None:
+        return None
+    key = _key(st)
+    if key is None:
+        return None
+    path = os.path.abspath(path)
+    hash_cache['seen'].add(key)
+    row = hash_cache['connection'].execute(
+        "SELECT size, mtime_ns, path, hashes FROM hashes WHERE device = ? AND inode = ?", key).fetchone()
+    if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+        return None
+    if row[2] != path:
+        # Renamed since the last run
+        hash_cache['connection'].execute("UPDATE hashes SET path = ? WHERE device = ? AND inode = ?", (path, *key))
+    hash_cache['hits'] += 1
+    return [(name, hashes) for name, hashes in json.loads(row[3])]
+
+
+def store(hash_cache, path, st, hashes):
+    """Remembers the hashes of a file, as they were when st was taken."""
+    if hash_cache is None:
+        return
+    key = _key(st)
+    if key is None:
+        return
+    path = os.path.abspath(path)
+    hash_cache['seen'].add(key)
+    hash_cache['connection'].execute(
+        "INSERT OR REPLACE INTO hashes (device, inode, size, mtime_ns, path, hashes) VALUES (?, ?, ?, ?, ?, ?)",
+        (*key, st.st_size, st.st_mtime_ns, path, json.dumps(hashes)))
+
+
+def prune(hash_cache):
+    """Drops entries for files that weren't seen this run and no longer exist. Returns how many."""
+    if hash_cache is None:
+        return 0
+    stale = []
+    for device, inode, path in hash_cache['connection'].execute("SELECT device, inode, path FROM hashes"):
+        if (device, inode) in hash_cache['seen']:
+            continue
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) == (device, inode):
+                continue
+        except OSError:
+            pass
+        stale.append((device, inode))
+    hash_cache['connection'].executemany("DELETE FROM hashes WHERE device = ? AND inode = ?", stale)
+    return len(stale)
+
+
+def close_cache(hash_cache):
+    """Saves and closes the cache."""
+    if hash_cache is None:
+        return
+    try:
+        hash_cache['connection'].commit()
+    except sqlite3.Error as e:
+        print(f"Could not save the hash cache: {e}")
+    hash_cache['connection'].close()
@@ -0,0 +1,144 @@
+"""Quick cover art checks that read only the file headers.
+
+A cover pack can hold empty files, downloads that stopped half way, web pages
+saved as .png, or JPEGs named .png. Those used to go through matching and
+renaming and only showed up as blank covers on the Wii. probe_image() spots
+them without decoding the picture:
+
+  - the first bytes must be the PNG or JPEG signature, and must match the
+    file's extension
+  - the size is read from the PNG IHDR chunk, or from the JPEG SOF segment
+    (other JPEG segments are skipped with seek(), not read)
+  - the end of the file must be there: the PNG IEND chunk or the JPEG end of
+    image marker, somewhere in the last TAIL_SIZE bytes (editors and cameras
+    often put padding, metadata or a second picture after it)
+
+That is a few KB per file, so filter_cover_art() can check a 30k
+cover pack in a couple of seconds with a few threads.
+"""
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+PNG_END = b'IEND\xaeB`\x82'
+JPEG_END = b'\xff\xd9'
+
+# Bytes read from the start and the end of each file
+HEAD_SIZE = 64
+TAIL_SIZE = 4096
+# Give up looking for the JPEG size after this many segments
+MAX_JPEG_SEGMENTS = 64
+
+PROBE_WORKERS = 8
+
+EXTENSION_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+
+# SOF markers hold the image size. C4 (DHT), C8 (JPG) and CC (DAC) are not SOFs.
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+
+def _jpeg_size(f):
+    """Walks the JPEG segments after the signature. Returns (width, height) or None."""
+    f.seek(2)
+    for _ in range(MAX_JPEG_SEGMENTS):
+        byte = f.read(1)
+        if byte != b'\xff':
+            return None
+        marker = f.read(1)
+        while marker == b'\xff':  # Fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9 or marker == 0xDA:  # End of image or start of scan before any SOF
+            return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack('>H', length)[0]
+        if marker in SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>xHH', data)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def probe_image(path):
+    """Checks one cover. Returns a dict with format, width, height, size and problem.
+
+    problem is None for a good cover, otherwise a short description.
+    """
+    result = {'path': path, 'format': None, 'width': None, 'height': None, 'size': 0, 'problem': None}
+    try:
+        size = os.path.getsize(path)
+        result['size'] = size
+        if size == 0:
+            result['problem'] = "empty file"
+            return result
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_SIZE)
+            f.seek(max(0, size - TAIL_SIZE))
+            tail = f.read(TAIL_SIZE)
+
+            if head.startswith(PNG_SIGNATURE):
+                result['format'] = 'PNG'
+                if len(head) < 24 or head[12:16] != b'IHDR':
+                    result['problem'] = "cut short (no PNG header)"
+                    return result
+                result['width'], result['height'] = struct.unpack('>II', head[16:24])
+                if PNG_END not in tail:
+                    result['problem'] = "cut short (no PNG end)"
+            elif head.startswith(JPEG_SIGNATURE):
+                result['format'] = 'JPEG'
+                dimensions = _jpeg_size(f)
+                if dimensions is None:
+                    result['problem'] = "cut short or damaged (no JPEG size)"
+                    return result
+                result['width'], result['height'] = dimensions
+                if JPEG_END not in tail:
+                    result['problem'] = "cut short (no JPEG end)"
+            else:
+                result['problem'] = "not a PNG or JPEG picture"
+                return result
+    except OSError as e:
+        result['problem'] = f"unreadable ({e.strerror or e})"
+        return result
+
+    if not result['problem'] and not (result['width'] and result['height']):
+        result['problem'] = "picture has no size"
+    expected = EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower())
+    if not result['problem'] and expected and expected != result['format']:
+        result['problem'] = f"a {result['format']} picture with a {os.path.splitext(path)[1]} name"
+    return result
+
+
+def probe_images(paths, workers=PROBE_WORKERS):
+    """Probes many covers with a few threads. Returns the results in the same order."""
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        return list(pool.map(probe_image, paths))
+
+
+def filter_cover_art(paths, workers=PROBE_WORKERS):
+    """Returns the covers that passed the checks, printing the ones left out and why."""
+    good = []
+    skipped = 0
+    for result in probe_images(paths, workers):
+        if result['problem']:
+            print(f"Skipping cover '{result['path']}': {result['problem']}.")
+            skipped += 1
+        else:
+            good.append(result['path'])
+    if skipped:
+        print(f"{skipped} cover art files were left out. Re-download them or fix their extension to use them.")
+    return good
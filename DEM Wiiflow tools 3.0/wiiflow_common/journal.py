@@ -0,0 +1,104 @@
+"""Transfer journal: lets an interrupted transfer carry on where it stopped.
+
+While a transfer runs, every file that has been completely written is added
+to "transfer journal.jsonl" on the PC side (next to the source folders), one
+line per file with its size, source mtime and a hash of its last 64 KB. If the
+drive is unplugged or the PC goes to sleep, the next run skips every journaled
+file that is still intact on the drive and starts again at the first one that
+is not.
+
+A file the journal lists is only trusted when the copy on the drive still has
+the right size and ends with the same bytes. Copies are preallocated, so a file
+cut off halfway usually has the right size but ends in zeros, which the tail
+check catches. The journal is deleted once a transfer finishes without errors.
+"""
+import hashlib
+import json
+import os
+
+JOURNAL_NAME = "transfer journal.jsonl"
+TAIL_SIZE = 64 * 1024
+
+
+def tail_digest(path, size):
+    """Returns the SHA-1 of the last TAIL_SIZE bytes of a file of the given size."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - TAIL_SIZE))
+        digest.update(f.read(TAIL_SIZE))
+    return digest.hexdigest()
+
+
+def open_journal(folder):
+    """Loads the journal kept in folder, or starts an empty one."""
+    path = os.path.join(folder, JOURNAL_NAME)
+    entries = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short when the PC went down
+                entries[entry['destination']] = entry
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Ignoring unreadable transfer journal '{path}': {e}")
+    return {'path': path, 'entries': entries, 'file': None, 'closed': False}
+
+
+def is_complete(transfer_journal, job):
+    """Returns True when the journal lists job as done and the drive still has it intact."""
+    entry = transfer_journal['entries'].get(job['destination'])
+    if entry is None or entry['size'] != job['size'] or entry['mtime_ns'] != job['mtime_ns']:
+        return False
+    try:
+        if os.path.getsize(job['destination']) != job['size']:
+            return False
+        return tail_digest(job['destination'], job['size']) == entry['tail']
+    except OSError:
+        return False
+
+
+def skip_completed(transfer_journal, plan):
+    """Drops the jobs an earlier, interrupted run already finished. Returns how many."""
+    if not transfer_journal['entries']:
+        return 0
+    jobs = [job for job in plan['jobs'] if not is_complete(transfer_journal, job)]
+    done = len(plan['jobs']) - len(jobs)
+    plan['jobs'] = jobs
+    plan['skipped'] += done
+    return done
+
+
+def record_complete(transfer_journal, job):
+    """Adds a fully written file to the journal. Does nothing once the journal is closed."""
+    if transfer_journal['closed']:
+        return
+    if transfer_journal['file'] is None:
+        transfer_journal['file'] = open(transfer_journal['path'], 'a', encoding='utf-8')
+    # The source tail is still in the page cache, and matches the copy when it went well
+    entry = {
+        'destination': job['destination'],
+        'size': job['size'],
+        'mtime_ns': job['mtime_ns'],
+        'tail': tail_digest(job['source'], job['size']),
+    }
+    transfer_journal['file'].write(json.dumps(entry) + '\n')
+    transfer_journal['file'].flush()
+
+
+def close_journal(transfer_journal, finished):
+    """Closes the journal, and deletes it when the transfer finished without errors."""
+    transfer_journal['closed'] = True
+    if transfer_journal['file'] is not None:
+        transfer_journal['file'].close()
+        transfer_journal['file'] = None
+    if finished:
+        try:
+            os.remove(transfer_journal['path'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not remove the transfer journal: {e}")
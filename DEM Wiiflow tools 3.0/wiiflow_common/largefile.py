@@ -0,0 +1,227 @@
+"""Large file copies (PS1 bins, Sega CD images) with progress.
+
+On Linux the data never has to pass through Python: os.copy_file_range() lets
+the kernel (or the filesystem, for reflink capable ones) copy the file, and
+os.sendfile() is the next best thing when the two files are on different kinds
+of filesystem. Everywhere else, or when the kernel refuses both, the file is
+streamed through one reusable buffer.
+
+Each method picks up at the byte the previous one stopped at, so a call that
+is refused halfway through a file simply hands over to the next method. A
+call that copies nothing before the end of the file counts as refused too:
+some filesystems answer copy_file_range() with 0 instead of an error. If the
+last method can't finish either, the copy fails with an OSError rather than
+leaving a short file behind that looks complete.
+
+Before any data is written the whole file is reserved on the destination
+(preallocate()), so a FAT32 card can hand it one contiguous run of clusters
+instead of growing it piece by piece.
+
+When the caller wants a checksum of the data (verify mode) the file is always
+streamed, since that is the only way the bytes pass through Python, and the
+checksum is updated from the same buffer that is written.
+"""
+import ctypes
+import errno
+import functools
+import os
+import sys
+import time
+
+COPY_FILE_RANGE_CHUNK = 64 * 1024 * 1024
+SENDFILE_CHUNK = 16 * 1024 * 1024
+READ_WRITE_CHUNK = 8 * 1024 * 1024
+PROGRESS_INTERVAL = 0.5
+
+# Errors that mean "this call can't do this copy", as opposed to a real I/O
+# problem like a full card, which has to be raised.
+UNSUPPORTED_ERRORS = {
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+    getattr(errno, 'ENOTSOCK', errno.EINVAL),
+}
+
+
+class _Unsupported(Exception):
+    """Raised by a copy method that cannot continue, with how far it got."""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+def _copy_with_copy_file_range(source, destination, offset, size, report):
+    if not hasattr(os, 'copy_file_range'):
+        raise _Unsupported(offset)
+    while offset < size:
+        try:
+            copied = os.copy_file_range(source.fileno(), destination.fileno(),
+                                        min(COPY_FILE_RANGE_CHUNK, size - offset), offset, offset)
+        except OSError as e:
+            if e.errno in UNSUPPORTED_ERRORS:
+                raise _Unsupported(offset)
+            raise
+        if copied == 0:
+            raise _Unsupported(offset)
+        offset += copied
+        report(offset)
+    return offset
+
+
+def _copy_with_sendfile(source, destination, offset, size, report):
+    if not hasattr(os, 'sendfile'):
+        raise _Unsupported(offset)
+    os.lseek(destination.fileno(), offset, os.SEEK_SET)
+    while offset < size:
+        try:
+            sent = os.sendfile(destination.fileno(), source.fileno(), offset, min(SENDFILE_CHUNK, size - offset))
+        except OSError as e:
+            if e.errno in UNSUPPORTED_ERRORS:
+                raise _Unsupported(offset)
+            raise
+        if sent == 0:
+            raise _Unsupported(offset)
+        offset += sent
+        report(offset)
+    return offset
+
+
+def _copy_with_read_write(source, destination, offset, size, report, digest=None):
+    source.seek(offset)
+    destination.seek(offset)
+    buffer = bytearray(READ_WRITE_CHUNK)
+    view = memoryview(buffer)
+    while offset < size:
+        count = source.readinto(view[:min(READ_WRITE_CHUNK, size - offset)])
+        if not count:
+            # The source got shorter while it was being copied
+            raise _Unsupported(offset)
+        destination.write(view[:count])
+        if digest is not None:
+            digest.update(view[:count])
+        offset += count
+        report(offset)
+    return offset
+
+
+COPY_METHODS = (
+    ('copy_file_range', _copy_with_copy_file_range),
+    ('sendfile', _copy_with_sendfile),
+    ('read/write', _copy_with_read_write),
+)
+
+
+def _load_fallocate():
+    # glibc's posix_fallocate() quietly falls back to writing zeros over the
+    # whole file when the filesystem can't preallocate, which would write every
+    # bin twice on older vfat drivers. Calling fallocate() itself just fails.
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        fallocate = ctypes.CDLL(None, use_errno=True).fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+_fallocate = _load_fallocate()
+
+
+def preallocate(fd, size):
+    """Reserves size bytes for an open file. Returns False when the system can't."""
+    if size <= 0:
+        return False
+    if _fallocate is not None:
+        return _fallocate(fd, 0, 0, size) == 0
+    if hasattr(os, 'posix_fallocate'):  # BSDs, where it never emulates
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return True
+        except OSError:
+            return False
+    return False
+
+
+def _advise_sequential(fd, size):
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def print_progress(name, copied, total, seconds):
+    """Default progress line for copy_large_file()."""
+    megabytes = copied / (1024 * 1024)
+    percent = copied * 100 / total if total else 100
+    speed = megabytes / seconds if seconds > 0 else 0
+    end = '\n' if copied >= total else ''
+    print(f"\r  {name}: {percent:5.1f}% ({megabytes:.0f} of {total / (1024 * 1024):.0f} MB, {speed:.1f} MB/s)", end=end, flush=True)
+
+
+def copy_large_file(source_path, destination_path, progress=print_progress, fadvise=True, digest=None,
+                    reserve=True):
+    """Copies one big file with the fastest method that works and returns that method's name.
+
+    digest is an optional hashlib object that is fed the data as it is copied.
+    Raises OSError when no method could copy the whole file.
+    """
+    name = os.path.basename(source_path)
+    start = time.perf_counter()
+    last_report = [0.0, -1]  # time, offset
+
+    opened = False
+    try:
+        with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+            opened = True
+            size = os.fstat(source.fileno()).st_size
+            if fadvise:
+                _advise_sequential(source.fileno(), size)
+            if reserve:
+                preallocate(destination.fileno(), size)
+
+            def report(offset, force=False):
+                if progress is None:
+                    return
+                now = time.perf_counter()
+                if offset == last_report[1]:
+                    return
+                if force or offset >= size or now - last_report[0] >= PROGRESS_INTERVAL:
+                    last_report[0] = now
+                    last_report[1] = offset
+                    progress(name, offset, size, now - start)
+
+            methods = COPY_METHODS
+            if digest is not None:
+                methods = (('read/write', functools.partial(_copy_with_read_write, digest=digest)),)
+
+            offset = 0
+            used = None
+            for method, copy in methods:
+                try:
+                    offset = copy(source, destination, offset, size, report)
+                except _Unsupported as stopped:
+                    offset = stopped.offset
+                    continue
+                used = method
+                break
+
+            if offset != size:
+                raise OSError(errno.EIO, f"only {offset} of {size} bytes could be copied", destination_path)
+            report(offset, force=True)
+    except BaseException:
+        # Don't leave a partly written file that a later run takes for a finished one
+        if opened:
+            try:
+                os.remove(destination_path)
+            except OSError:
+                pass
+        raise
+
+    return used
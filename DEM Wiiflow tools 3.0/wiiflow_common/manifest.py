@@ -0,0 +1,119 @@
+"""Library manifest: remembers folder listings between runs.
+
+Each DAT tool keeps a "library manifest.json" in its own folder. For every
+folder it lists (games, cover art, renamed cover art and their subfolders) the
+manifest records the folder's mtime and the names inside it. On the next run a
+folder whose mtime has not changed is read back from the manifest instead of
+being listed again, which is what makes startup fast on big art packs.
+"""
+import json
+import os
+import time
+
+MANIFEST_NAME = "library manifest.json"
+MANIFEST_VERSION = 1
+
+# FAT32/exFAT only keep folder times to 2 seconds. A listing taken inside that
+# window could miss a change that did not move the mtime, so it is not reused.
+MTIME_SLACK_NS = 2_000_000_000
+
+
+def load_manifest(base_folder=None):
+    """Loads the manifest from the tool folder, or starts an empty one."""
+    base_folder = os.path.abspath(base_folder or os.getcwd())
+    path = os.path.join(base_folder, MANIFEST_NAME)
+    folders = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == MANIFEST_VERSION:
+            folders = data.get('folders', {})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable manifest '{path}': {e}")
+
+    return {
+        'base': base_folder,
+        'path': path,
+        'folders': folders,
+        'changed': False,
+        'reused': 0,
+        'listed': 0,
+    }
+
+
+def _folder_key(library_manifest, folder):
+    folder = os.path.abspath(folder)
+    try:
+        key = os.path.relpath(folder, library_manifest['base'])
+    except ValueError:  # Different drive on Windows
+        return folder
+    return folder if key.startswith('..') else key
+
+
+def scan_folder(library_manifest, folder):
+    """Returns (subfolders, files) for a folder, from the manifest when it is unchanged."""
+    key = _folder_key(library_manifest, folder)
+    mtime_ns = os.stat(folder).st_mtime_ns
+    entry = library_manifest['folders'].get(key)
+
+    if entry and entry['mtime_ns'] == mtime_ns and mtime_ns + MTIME_SLACK_NS < entry['listed_ns']:
+        library_manifest['reused'] += 1
+        return list(entry['dirs']), list(entry['files'])
+
+    listed_ns = time.time_ns()
+    dirs = []
+    files = []
+    with os.scandir(folder) as entries:
+        for item in entries:
+            if item.is_dir():
+                dirs.append(item.name)
+            else:
+                files.append(item.name)
+
+    library_manifest['folders'][key] = {
+        'mtime_ns': mtime_ns,
+        'listed_ns': listed_ns,
+        'dirs': dirs,
+        'files': files,
+    }
+    library_manifest['changed'] = True
+    library_manifest['listed'] += 1
+    return list(dirs), list(files)
+
+
+def list_files(library_manifest, folder):
+    """Drop-in for os.listdir() when only the files in a folder are wanted."""
+    return scan_folder(library_manifest, folder)[1]
+
+
+def walk(library_manifest, top):
+    """Drop-in for os.walk(top) that reuses unchanged folders from the manifest."""
+    try:
+        dirs, files = scan_folder(library_manifest, top)
+    except OSError:
+        return
+    yield top, dirs, files
+    for name in dirs:
+        yield from walk(library_manifest, os.path.join(top, name))
+
+
+def save_manifest(library_manifest):
+    """Writes the manifest back if anything was listed, dropping folders that are gone."""
+    if not library_manifest['changed']:
+        return
+
+    folders = {}
+    for key, entry in library_manifest['folders'].items():
+        if os.path.isdir(os.path.join(library_manifest['base'], key)):
+            folders[key] = entry
+
+    temp_path = library_manifest['path'] + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'folders': folders}, f)
+        os.replace(temp_path, library_manifest['path'])
+        library_manifest['changed'] = False
+    except OSError as e:
+        print(f"Could not save the library manifest: {e}")
@@ -0,0 +1,121 @@
+"""Transfer metrics: where the time of a transfer goes.
+
+A metrics dict is passed along a transfer and filled in as it runs: wall time
+per phase (planning, sync, pre-flight, copy, ...), time spent in os.stat() and
+os.makedirs(), and for each file size class how many files and bytes were
+copied and how long the copies took. Every function here accepts None instead
+of a metrics dict and then does nothing, so callers don't have to check.
+
+Copy times per size class are the time spent inside each file's copy added
+up. With several copy threads that is more than the wall time of the copy
+phase, and comparing the two shows how well the threads kept the card busy.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+METRICS_NAME = "transfer metrics.json"
+
+# (name, files smaller than this many bytes)
+SIZE_CLASSES = (
+    ('under 1 MB', 1024 * 1024),
+    ('1 MB to 32 MB', 32 * 1024 * 1024),
+    ('32 MB and up', None),
+)
+
+
+def new_metrics():
+    """Returns an empty metrics dict."""
+    return {
+        'started': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'phases': {},
+        'calls': {'stat': {'count': 0, 'seconds': 0.0}, 'makedirs': {'count': 0, 'seconds': 0.0}},
+        'size_classes': {name: {'files': 0, 'bytes': 0, 'copy_seconds': 0.0, 'verify_seconds': 0.0}
+                         for name, limit in SIZE_CLASSES},
+        'lock': threading.Lock(),
+    }
+
+
+def size_class(size):
+    for name, limit in SIZE_CLASSES:
+        if limit is None or size < limit:
+            return name
+
+
+def add_phase(transfer_metrics, name, seconds):
+    """Adds wall time to a phase."""
+    if transfer_metrics is None:
+        return
+    with transfer_metrics['lock']:
+        transfer_metrics['phases'][name] = transfer_metrics['phases'].get(name, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def phase(transfer_metrics, name):
+    """Adds the wall time of the with block to a phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(transfer_metrics, name, time.perf_counter() - start)
+
+
+def add_call(transfer_metrics, name, seconds):
+    """Counts one timed os.stat()/os.makedirs() call."""
+    if transfer_metrics is None:
+        return
+    with transfer_metrics['lock']:
+        calls = transfer_metrics['calls'][name]
+        calls['count'] += 1
+        calls['seconds'] += seconds
+
+
+def add_file(transfer_metrics, size, copy_seconds, verify_seconds=0.0):
+    """Counts one copied file."""
+    if transfer_metrics is None:
+        return
+    with transfer_metrics['lock']:
+        entry = transfer_metrics['size_classes'][size_class(size)]
+        entry['files'] += 1
+        entry['bytes'] += size
+        entry['copy_seconds'] += copy_seconds
+        entry['verify_seconds'] += verify_seconds
+
+
+def _rates(files, size, seconds):
+    seconds = max(seconds, 1e-9)
+    return {'mb_per_second': round(size / (1024 * 1024) / seconds, 2), 'files_per_second': round(files / seconds, 2)}
+
+
+def summarize(transfer_metrics):
+    """Returns the metrics as plain data, with MB/s and files/s worked out."""
+    size_classes = {}
+    total_files = 0
+    total_bytes = 0
+    for name, entry in transfer_metrics['size_classes'].items():
+        summary = dict(entry)
+        summary.update(_rates(entry['files'], entry['bytes'], entry['copy_seconds']))
+        size_classes[name] = summary
+        total_files += entry['files']
+        total_bytes += entry['bytes']
+
+    copy_seconds = transfer_metrics['phases'].get('copy', 0.0)
+    totals = {'files': total_files, 'bytes': total_bytes, 'copy_phase_seconds': copy_seconds}
+    totals.update(_rates(total_files, total_bytes, copy_seconds))
+    return {
+        'started': transfer_metrics['started'],
+        'phases': {name: round(seconds, 4) for name, seconds in transfer_metrics['phases'].items()},
+        'calls': transfer_metrics['calls'],
+        'size_classes': size_classes,
+        'totals': totals,
+    }
+
+
+def write_metrics(transfer_metrics, folder, name=METRICS_NAME):
+    """Writes the metrics as JSON in folder and returns the file's path."""
+    path = os.path.join(folder, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summarize(transfer_metrics), f, indent=2)
+    return path
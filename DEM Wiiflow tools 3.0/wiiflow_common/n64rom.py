@@ -0,0 +1,152 @@
+"""N64 ROM byte order: finds .v64/.n64 dumps and turns them into .z64.
+
+N64 dumps come in three byte orders, told apart by their first four bytes:
+
+  .z64  80 37 12 40  big endian, the cartridge's own order
+  .v64  37 80 40 12  every 16 bit pair swapped (Doctor V64)
+  .n64  40 12 37 80  every 32 bit word reversed (little endian)
+
+The tool names and the cover names all use .z64, so convert_folder() turns
+every dump that isn't big endian into one, whatever its extension says. The
+ROM is memory mapped and swapped with NumPy's byteswap(), which is a single
+pass in C over the whole file; swapping a 64 MB ROM takes milliseconds, and
+writing the new file is most of the time a conversion takes. Without NumPy
+the stdlib array module does the same swap, reading the whole ROM into memory.
+Files are converted on a few threads, and the original is only removed once
+the .z64 is completely written.
+"""
+import array
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ROM_EXTENSIONS = ('.z64', '.v64', '.n64')
+CONVERT_WORKERS = min(4, os.cpu_count() or 1)
+
+MAGIC = {
+    b'\x80\x37\x12\x40': 'z64',
+    b'\x37\x80\x40\x12': 'v64',
+    b'\x40\x12\x37\x80': 'n64',
+}
+# Word size swapped by each byte order
+SWAP_SIZE = {'v64': 2, 'n64': 4}
+
+
+def byte_order(path):
+    """Returns 'z64', 'v64' or 'n64' from a ROM's first four bytes, or None when it isn't an N64 ROM."""
+    with open(path, 'rb') as f:
+        return MAGIC.get(f.read(4))
+
+
+def _swap_numpy(source_path, temp_path, swap_size):
+    dtype = np.uint16 if swap_size == 2 else np.uint32
+    source = np.memmap(source_path, dtype=dtype, mode='r')
+    target = np.memmap(temp_path, dtype=dtype, mode='w+', shape=source.shape)
+    target[:] = source.byteswap()
+    target.flush()
+    del source, target
+
+
+def _swap_array(source_path, temp_path, swap_size):
+    # 'I' is 4 bytes on every platform Python runs the tools on
+    words = array.array('H' if swap_size == 2 else 'I')
+    with open(source_path, 'rb') as f:
+        words.frombytes(f.read())
+    words.byteswap()
+    with open(temp_path, 'wb') as f:
+        words.tofile(f)
+
+
+def _same_file(path, target):
+    """True when target names path itself, also on drives that ignore case (Windows, FAT)."""
+    if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(target)):
+        return True
+    try:
+        return os.path.samefile(path, target)
+    except OSError:
+        return False
+
+
+def convert_to_z64(path):
+    """Converts one ROM to big endian .z64 next to it and removes the original.
+
+    Returns the new file name, or None when the ROM already was big endian
+    (a .z64 name is kept as it is).
+    """
+    order = byte_order(path)
+    if order is None:
+        raise ValueError("not an N64 ROM")
+    base, ext = os.path.splitext(path)
+    target = base + '.z64'
+    if order == 'z64':
+        if ext.lower() == '.z64':
+            return None
+        if os.path.exists(target):
+            raise FileExistsError(f"'{os.path.basename(target)}' already exists")
+        os.rename(path, target)
+        return os.path.basename(target)
+
+    swap_size = SWAP_SIZE[order]
+    if os.path.getsize(path) % swap_size:
+        raise ValueError("the size doesn't fit its byte order, the dump is damaged")
+    # "game.Z64" is converted in place, it isn't in the way of "game.z64"
+    in_place = _same_file(path, target)
+    if not in_place and os.path.exists(target):
+        raise FileExistsError(f"'{os.path.basename(target)}' already exists")
+
+    temp_path = target + '.part'
+    try:
+        if np is not None:
+            _swap_numpy(path, temp_path, swap_size)
+        else:
+            _swap_array(path, temp_path, swap_size)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if not in_place:
+        os.remove(path)
+    return os.path.basename(target)
+
+
+def needs_conversion(folder, game_files):
+    """Returns the games in folder that aren't big endian .z64 ROMs (by content, not name)."""
+    result = []
+    for game_file in game_files:
+        try:
+            order = byte_order(os.path.join(folder, game_file))
+        except OSError:
+            continue
+        if order in ('v64', 'n64') or (order == 'z64' and not game_file.lower().endswith('.z64')):
+            result.append(game_file)
+    return result
+
+
+def convert_folder(folder, game_files, workers=CONVERT_WORKERS):
+    """Converts game_files (names in folder) to .z64 on a few threads. Returns (converted, failed)."""
+    converted = 0
+    failed = 0
+
+    def job(game_file):
+        try:
+            return game_file, convert_to_z64(os.path.join(folder, game_file)), None
+        except (OSError, ValueError) as e:
+            return game_file, None, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(game_files) or 1))) as pool:
+        for game_file, new_name, error in pool.map(job, game_files):
+            if error is not None:
+                print(f"Failed to convert '{game_file}': {error}")
+                failed += 1
+            elif new_name:
+                print(f"Converted '{game_file}' to '{new_name}'")
+                converted += 1
+    if converted:
+        print(f"Converted {converted} ROMs in {time.perf_counter() - start:.1f}s")
+    return converted, failed
@@ -0,0 +1,175 @@
+"""NES ROM headers: iNES and NES 2.0.
+
+A .nes file is a 16 byte header followed by the game: an optional 512 byte
+trainer, then the PRG ROM (the program) and the CHR ROM (the graphics). The
+header says which mapper chip the cartridge had, how big PRG and CHR are and,
+in NES 2.0 headers, which TV system the game was made for.
+
+The header isn't part of the cartridge, and emulator users have fixed and
+re-fixed headers for years, so the No-Intro DATs list the checksums of PRG
+and CHR only. header_size() is what romhash.hash_files() uses to leave the
+header (and trainer) out, both for .nes files and for .nes files inside a
+zip, which are decompressed on the fly.
+
+probe() reads the first 16 bytes and checks the header against the rest:
+
+  - the file is as big as the header says PRG + CHR are
+  - the mapper can hold that much PRG/CHR (an NROM cart can't have 64 KB)
+  - the TV system in the header matches the region in the game's name
+"""
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b'NES\x1a'
+INES_HEADER_SIZE = 16
+TRAINER_SIZE = 512
+PRG_UNIT = 16 * 1024
+CHR_UNIT = 8 * 1024
+PROBE_WORKERS = 8
+
+TV_SYSTEMS = {0: 'NTSC', 1: 'PAL', 2: 'NTSC and PAL', 3: 'Dendy'}
+
+# Most PRG and CHR ROM the simple boards can hold (bytes)
+MAPPER_LIMITS = {
+    0: ('NROM', 32 * 1024, 8 * 1024),
+    3: ('CNROM', 32 * 1024, 32 * 1024),
+}
+
+PAL_REGIONS = {'europe', 'australia', 'germany', 'france', 'spain', 'italy', 'sweden',
+               'netherlands', 'uk', 'scandinavia'}
+NTSC_REGIONS = {'usa', 'japan', 'canada', 'korea'}
+
+
+def header_size(head, size):
+    """Returns how many bytes of iNES header (and trainer) a ROM starts with, 0 for a headerless one.
+
+    Fits romhash.hash_files(header_size=...).
+    """
+    if head[:4] != MAGIC or len(head) < INES_HEADER_SIZE:
+        return 0
+    return INES_HEADER_SIZE + (TRAINER_SIZE if head[6] & 0x04 else 0)
+
+
+def _rom_size(lsb, msb, unit):
+    if msb == 0x0F:
+        # NES 2.0 exponent-multiplier notation for odd sizes
+        return (1 << (lsb >> 2)) * ((lsb & 0x03) * 2 + 1)
+    return ((msb << 8) | lsb) * unit
+
+
+def parse_header(head):
+    """Reads a 16 byte iNES/NES 2.0 header. Returns a dict, or None when there is no header.
+
+    The dict has format ('iNES' or 'NES 2.0'), mapper, prg_size, chr_size,
+    trainer (True/False) and tv_system (None when the header doesn't say).
+    """
+    if head[:4] != MAGIC or len(head) < INES_HEADER_SIZE:
+        return None
+    flags6, flags7 = head[6], head[7]
+    nes2 = flags7 & 0x0C == 0x08
+    if nes2:
+        mapper = (flags6 >> 4) | (flags7 & 0xF0) | ((head[8] & 0x0F) << 8)
+        prg_size = _rom_size(head[4], head[9] & 0x0F, PRG_UNIT)
+        chr_size = _rom_size(head[5], head[9] >> 4, CHR_UNIT)
+        tv_system = TV_SYSTEMS[head[12] & 0x03]
+    else:
+        # Old tools wrote their name ("DiskDude!") over bytes 7-15, which garbles the upper mapper bits
+        if any(head[12:16]):
+            mapper = flags6 >> 4
+        else:
+            mapper = (flags6 >> 4) | (flags7 & 0xF0)
+        prg_size = head[4] * PRG_UNIT
+        chr_size = head[5] * CHR_UNIT
+        # iNES 1.0 only has a PAL bit, and hardly anyone set it
+        tv_system = 'PAL' if head[9] & 0x01 else None
+    return {'format': 'NES 2.0' if nes2 else 'iNES', 'mapper': mapper, 'prg_size': prg_size,
+            'chr_size': chr_size, 'trainer': bool(flags6 & 0x04), 'tv_system': tv_system}
+
+
+def name_tv_system(name):
+    """Returns 'PAL' or 'NTSC' from the region tags in a game's name, or None when it's unclear."""
+    regions = set()
+    for tag in re.findall(r'\((.*?)\)', name or ''):
+        regions.update(part.strip().lower() for part in tag.split(','))
+    pal = bool(regions & PAL_REGIONS)
+    ntsc = bool(regions & NTSC_REGIONS)
+    if pal == ntsc:
+        return None
+    return 'PAL' if pal else 'NTSC'
+
+
+def _read_head(path):
+    """Returns (first 16 bytes, size) of a .nes file, or of the first ROM inside a .zip."""
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if not members:
+                return b'', 0
+            info = next((info for info in members if info.filename.lower().endswith('.nes')), members[0])
+            with archive.open(info) as member:
+                return member.read(INES_HEADER_SIZE), info.file_size
+    with open(path, 'rb') as f:
+        return f.read(INES_HEADER_SIZE), os.fstat(f.fileno()).st_size
+
+
+def probe(path, title=None):
+    """Checks the header of one .nes (or zipped .nes) ROM. Returns the parse_header() dict plus problems.
+
+    header is False for a headerless ROM. problems is a list of short
+    descriptions. title (the DAT title, when known) is checked for its region
+    instead of the file name.
+    """
+    result = {'path': path, 'header': False, 'problems': []}
+    try:
+        head, size = _read_head(path)
+    except (OSError, zipfile.BadZipFile) as e:
+        result['problems'].append(f"unreadable ({getattr(e, 'strerror', None) or e})")
+        return result
+    header = parse_header(head)
+    if header is None:
+        return result
+    result.update(header)
+    result['header'] = True
+
+    expected = INES_HEADER_SIZE + (TRAINER_SIZE if header['trainer'] else 0) + header['prg_size'] + header['chr_size']
+    if size < expected:
+        result['problems'].append(f"{expected - size} bytes shorter than its header says, the dump is cut short")
+    elif size > expected:
+        result['problems'].append(f"{size - expected} bytes longer than its header says (overdump or wrong header)")
+
+    if header['mapper'] in MAPPER_LIMITS:
+        board, prg_limit, chr_limit = MAPPER_LIMITS[header['mapper']]
+        if header['prg_size'] > prg_limit or header['chr_size'] > chr_limit:
+            result['problems'].append(f"too big for mapper {header['mapper']} ({board}), the header's mapper is wrong")
+
+    name = title or os.path.splitext(os.path.basename(path))[0]
+    name_system = name_tv_system(name)
+    if name_system and header['tv_system'] in ('NTSC', 'PAL') and name_system != header['tv_system']:
+        result['problems'].append(f"the header says {header['tv_system']} but the name says {name_system}")
+    return result
+
+
+def probe_folder(folder, game_files, titles=None, workers=PROBE_WORKERS):
+    """Probes game_files (names in folder) on a few threads. Returns {game file: probe result}.
+
+    titles ({game file: DAT title}) are used for the region check where known.
+    ROMs with problems are printed.
+    """
+    if not game_files:
+        return {}
+    titles = titles or {}
+
+    def job(game_file):
+        return probe(os.path.join(folder, game_file), titles.get(game_file))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(game_files)))) as pool:
+        results = dict(zip(game_files, pool.map(job, game_files)))
+    for game_file, result in results.items():
+        for problem in result['problems']:
+            print(f"Check '{game_file}': {problem}.")
+    headerless = sum(1 for result in results.values() if not result['header'] and not result['problems'])
+    if headerless:
+        print(f"{headerless} of your NES games have no iNES header. Most emulators need one to run them.")
+    return results
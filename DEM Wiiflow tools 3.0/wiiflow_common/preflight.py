@@ -0,0 +1,167 @@
+"""Pre-flight check run on the copy plans before anything is written.
+
+Transfers used to start right away and stop halfway when the card filled up or
+when a file was too big for FAT32. check_plans() looks at every planned file
+first and only lets the transfer start when it will fit:
+
+  - the space needed is the size of every file rounded up to the drive's
+    cluster size, minus the files on the card that are being replaced
+  - the free space comes from os.statvfs(), or shutil.disk_usage() on Windows
+  - files of 4 GiB or more can't be stored on FAT32, which is what the Wii reads
+  - the duration is estimated from a short write test on the drive itself
+"""
+import math
+import os
+import shutil
+import time
+
+FAT32_MAX_FILE_SIZE = 4 * 1024 * 1024 * 1024 - 1
+DEFAULT_CLUSTER_SIZE = 32 * 1024  # FAT32 default for 32 GB cards, used when the OS can't tell
+BENCHMARK_NAME = "wiiflow transfer benchmark.tmp"
+BENCHMARK_SIZE = 16 * 1024 * 1024
+BENCHMARK_CHUNK = 1024 * 1024
+BENCHMARK_SMALL_FILES = 16
+BENCHMARK_SMALL_SIZE = 16 * 1024
+
+
+def _existing_parent(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def drive_space(path):
+    """Returns (free bytes, cluster size) for the drive that path is on."""
+    path = _existing_parent(path)
+    if hasattr(os, 'statvfs'):
+        info = os.statvfs(path)
+        return info.f_bavail * info.f_frsize, info.f_frsize or DEFAULT_CLUSTER_SIZE
+    return shutil.disk_usage(path).free, DEFAULT_CLUSTER_SIZE
+
+
+def _on_disk(size, cluster_size):
+    return math.ceil(size / cluster_size) * cluster_size
+
+
+def _sync_and_close(f):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def measure_write_speed(folder):
+    """Writes a few test files in folder and returns (bytes per second, seconds per file).
+
+    Returns None when the drive can't be written to.
+    """
+    folder = _existing_parent(folder)
+    path = os.path.join(folder, BENCHMARK_NAME)
+    chunk = os.urandom(BENCHMARK_CHUNK)
+    try:
+        start = time.perf_counter()
+        f = open(path, 'wb')
+        for _ in range(BENCHMARK_SIZE // BENCHMARK_CHUNK):
+            f.write(chunk)
+        _sync_and_close(f)
+        large_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_SMALL_FILES):
+            f = open(path, 'wb')
+            f.write(chunk[:BENCHMARK_SMALL_SIZE])
+            _sync_and_close(f)
+        small_seconds = time.perf_counter() - start
+    except OSError:
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    bytes_per_second = BENCHMARK_SIZE / max(large_seconds, 1e-6)
+    data_seconds = BENCHMARK_SMALL_FILES * BENCHMARK_SMALL_SIZE / bytes_per_second
+    seconds_per_file = max(0.0, (small_seconds - data_seconds) / BENCHMARK_SMALL_FILES)
+    return bytes_per_second, seconds_per_file
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def check_plans(plans):
+    """Checks that every plan fits on its drive and returns True when the transfer can start.
+
+    Files too big for FAT32 are removed from the plans if the user agrees to
+    skip them. Each plan needs a 'existing' dict of {path: size} for the files
+    already on the card.
+    """
+    megabyte = 1024 * 1024
+
+    too_big = [job for plan in plans for job in plan['jobs'] if job['size'] > FAT32_MAX_FILE_SIZE]
+    if too_big:
+        print("\nThese files are 4 GB or larger and can't be stored on a FAT32 SD card or USB drive:")
+        for job in too_big:
+            print(f"  {job['source']} ({job['size'] / megabyte:.0f} MB)")
+        answer = input("Skip these files and transfer everything else? (yes/no): ").strip().lower()
+        if answer != 'yes':
+            print("Transfer cancelled, nothing was copied.")
+            return False
+        for plan in plans:
+            plan['jobs'] = [job for job in plan['jobs'] if job['size'] <= FAT32_MAX_FILE_SIZE]
+
+    # Group by drive, a transfer could in theory span more than one
+    drives = {}
+    for plan in plans:
+        parent = _existing_parent(plan['destination'])
+        drive = drives.setdefault(os.stat(parent).st_dev, {'path': parent, 'plans': []})
+        drive['plans'].append(plan)
+
+    total_files = 0
+    total_bytes = 0
+    fits = True
+    for drive in drives.values():
+        free, cluster_size = drive_space(drive['path'])
+        needed = 0
+        for plan in drive['plans']:
+            for job in plan['jobs']:
+                needed += _on_disk(job['size'], cluster_size)
+                if job['destination'] in plan['existing']:
+                    needed -= _on_disk(plan['existing'][job['destination']], cluster_size)
+                total_files += 1
+                total_bytes += job['size']
+        if needed > free:
+            print(f"\nNot enough free space on {drive['path']}: {needed / megabyte:.0f} MB needed, "
+                  f"only {free / megabyte:.0f} MB free.")
+            fits = False
+        else:
+            print(f"\n{drive['path']}: {max(needed, 0) / megabyte:.0f} MB needed, {free / megabyte:.0f} MB free.")
+
+    if not fits:
+        print("Transfer cancelled, nothing was copied. Free up some space or use sync mode.")
+        return False
+
+    if total_files == 0:
+        print("Nothing to copy, the SD/USB drive is up to date.")
+        return True
+
+    speed = measure_write_speed(plans[0]['destination'])
+    if speed is None:
+        print(f"{total_files} files ({total_bytes / megabyte:.1f} MB) to copy. "
+              f"Could not test the drive's write speed, no time estimate.")
+    else:
+        bytes_per_second, seconds_per_file = speed
+        estimate = total_bytes / bytes_per_second + total_files * seconds_per_file
+        print(f"{total_files} files ({total_bytes / megabyte:.1f} MB) to copy. Drive writes at about "
+              f"{bytes_per_second / megabyte:.1f} MB/s, estimated time: {format_duration(estimate)}.")
+    return True
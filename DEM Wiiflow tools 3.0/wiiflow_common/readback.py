@@ -0,0 +1,73 @@
+"""Read-back benchmark: how fast can a folder on the SD card be listed and read?
+
+This is the number that shows whether a card's layout is any good. Run it on
+a folder of the card (for example ROMS/Nintendo/SNES or wiisxrx/isos) before
+and after writing it with the ordered, preallocated transfers:
+
+    python readback.py "E:\\ROMS\\Nintendo\\SNES"
+
+Folders are walked and files read in name order, the way Wiiflow scans them.
+Files are read around the file cache (uncached.py) so the numbers come from
+the card. Where the system can't do that, unplug and reconnect the card
+between runs.
+"""
+import os
+import sys
+import time
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wiiflow_common import uncached
+
+READ_CHUNK = 1024 * 1024
+
+
+def list_in_order(folder):
+    """Returns every file under folder, walking folders and files in name order."""
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort(key=str.lower)
+        paths.extend(os.path.join(root, name) for name in sorted(files, key=str.lower))
+    return paths
+
+
+def measure_read_speed(folder):
+    """Lists and reads every file under folder. Returns a dict of counts and timings."""
+    start = time.perf_counter()
+    paths = list_in_order(folder)
+    list_seconds = time.perf_counter() - start
+
+    total = 0
+    start = time.perf_counter()
+    for path in paths:
+        for chunk in uncached.read_chunks(path, READ_CHUNK):
+            total += len(chunk)
+    read_seconds = time.perf_counter() - start
+
+    return {'files': len(paths), 'bytes': total, 'list_seconds': list_seconds, 'read_seconds': read_seconds}
+
+
+def print_read_speed(folder, result):
+    seconds = max(result['read_seconds'], 1e-6)
+    megabytes = result['bytes'] / (1024 * 1024)
+    print(f"{folder}:")
+    print(f"  Listed {result['files']} files in {result['list_seconds']:.2f}s")
+    print(f"  Read {megabytes:.1f} MB in {result['read_seconds']:.2f}s"
+          f" - {megabytes / seconds:.1f} MB/s, {result['files'] / seconds:.1f} files/s")
+    if not uncached.bypass_supported():
+        print("  (This system reads these files from memory if they were used recently, so the numbers may be too high.)")
+
+
+def main():
+    folders = sys.argv[1:]
+    if not folders:
+        folders = [input("Folder on the SD/USB drive to read back: ").strip().strip('"')]
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"The folder {folder} does not exist.")
+            continue
+        print_read_speed(folder, measure_read_speed(folder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Streaming ROM hashing: CRC32, MD5 and SHA-1 from a single read.
+
+hash_file() reads a ROM once, in 1 MiB blocks read straight into a reused
+buffer, and feeds every block to all three hashes. ROMs inside a .zip are
+hashed the same way while they are decompressed, without extracting them.
+
+hash_files() hashes many files at once on a few threads. zlib and hashlib
+release the GIL while they work on big blocks, so the threads really run side
+by side and the drive, not Python, sets the pace.
+
+With a hash cache (hashcache.py) files that haven't changed since an earlier
+run are not read at all.
+
+Some dumps start with a header the DATs leave out, like SNES copier headers,
+the iNES header of NES ROMs and the .a78/.lnx headers of Atari 7800 and Lynx
+ROMs. hash_files() takes a header_size function
+for those: it gets the first HEAD_SIZE bytes and the size of each ROM and
+returns how many bytes to leave out of the hashes. Zip members are handled
+the same way, still without extracting them.
+
+The results are plain dicts: {'size', 'crc32', 'md5', 'sha1'}, with the hashes
+as lowercase hex like in Logiqx DAT files.
+"""
+import hashlib
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from wiiflow_common import hashcache
+
+BUFFER_SIZE = 1024 * 1024
+# Bytes header_size functions get to look at
+HEAD_SIZE = 512
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _finish(size, crc, md5, sha1):
+    return {'size': size, 'crc32': f'{crc & 0xFFFFFFFF:08x}', 'md5': md5.hexdigest(), 'sha1': sha1.hexdigest()}
+
+
+def hash_stream(f, total_size=None, header_size=None):
+    """Hashes everything left in a binary file object. Returns the hashes dict.
+
+    With header_size, header_size(first bytes, total_size) bytes at the start
+    are left out, and the size in the result is what was hashed.
+    """
+    crc = 0
+    md5 = hashlib.md5()
+    sha1 = hashlib.sha1()
+    if header_size is not None:
+        head = f.read(HEAD_SIZE)
+        skip = header_size(head, len(head) if total_size is None else total_size)
+        if skip > len(head):
+            # Headers longer than HEAD_SIZE (an iNES header with a trainer)
+            f.read(skip - len(head))
+        block = head[skip:]
+        crc = zlib.crc32(block, crc)
+        md5.update(block)
+        sha1.update(block)
+        size = len(block)
+    else:
+        size = 0
+    if hasattr(f, 'readinto'):
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            block = view[:count]
+            crc = zlib.crc32(block, crc)
+            md5.update(block)
+            sha1.update(block)
+            size += count
+    else:
+        while True:
+            block = f.read(BUFFER_SIZE)
+            if not block:
+                break
+            crc = zlib.crc32(block, crc)
+            md5.update(block)
+            sha1.update(block)
+            size += len(block)
+    return _finish(size, crc, md5, sha1)
+
+
+def hash_file(path, header_size=None):
+    """Returns the hashes of one file."""
+    with open(path, 'rb', buffering=0) as f:
+        return hash_stream(f, os.fstat(f.fileno()).st_size, header_size)
+
+
+def hash_zip_members(path, header_size=None):
+    """Returns [(member name, hashes)] for the files inside a zip, decompressed on the fly."""
+    results = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as member:
+                results.append((info.filename, hash_stream(member, info.file_size, header_size)))
+    return results
+
+
+def zip_crcs(path):
+    """Returns [(member name, {'size', 'crc32'})] from a zip's central directory.
+
+    The central directory at the end of the zip already lists every member's
+    CRC32 and uncompressed size, so nothing is decompressed and only the last
+    few KB of the file are read.
+    """
+    with zipfile.ZipFile(path) as archive:
+        return [(info.filename, {'size': info.file_size, 'crc32': f'{info.CRC:08x}'})
+                for info in archive.infolist() if not info.is_dir()]
+
+
+def read_zip_crcs(paths, workers=HASH_WORKERS):
+    """Reads the central directories of many zips on a few threads.
+
+    Returns {path: [(name, {'size', 'crc32'})]}. Broken zips are printed and left out.
+    """
+    def job(path):
+        try:
+            return path, zip_crcs(path), None
+        except (OSError, zipfile.BadZipFile) as e:
+            return path, None, e
+
+    results = {}
+    if not paths:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        for path, members, error in pool.map(job, paths):
+            if error is not None:
+                print(f"Could not read the zip '{path}': {error}")
+            else:
+                results[path] = members
+    return results
+
+
+def hash_rom(path, header_size=None):
+    """Returns [(name, hashes)] for a ROM: its members for a .zip, otherwise the file itself."""
+    if path.lower().endswith('.zip'):
+        return hash_zip_members(path, header_size)
+    return [(os.path.basename(path), hash_file(path, header_size))]
+
+
+def hash_files(paths, workers=HASH_WORKERS, hash_cache=None, header_size=None):
+    """Hashes many ROMs on a few threads.
+
+    Returns {path: [(name, hashes)]}. Files that can't be read are printed and
+    left out. Files the hash cache knows are taken from it, the others are
+    added to it. header_size is passed on to hash_stream().
+    """
+    results = {}
+    to_hash = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print(f"Could not hash '{path}': {e}")
+            continue
+        cached = hashcache.lookup(hash_cache, path, st)
+        if cached is not None:
+            results[path] = cached
+        else:
+            to_hash.append((path, st))
+    if hash_cache is not None and results:
+        print(f"  {len(results)} files unchanged since they were last hashed.")
+    if not to_hash:
+        return results
+
+    def job(item):
+        path, st = item
+        try:
+            return path, st, hash_rom(path, header_size), None
+        except (OSError, zipfile.BadZipFile, zlib.error) as e:
+            return path, st, None, e
+
+    start = time.perf_counter()
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(to_hash)))) as pool:
+        for done, (path, st, hashes, error) in enumerate(pool.map(job, to_hash), 1):
+            if error is not None:
+                print(f"\nCould not hash '{path}': {error}")
+            else:
+                results[path] = hashes
+                hashcache.store(hash_cache, path, st, hashes)
+                total_bytes += sum(entry['size'] for name, entry in hashes)
+            seconds = max(time.perf_counter() - start, 1e-6)
+            print(f"\r  Hashed {done} of {len(to_hash)} files ({total_bytes / (1024 * 1024) / seconds:.1f} MB/s)",
+                  end='\n' if done == len(to_hash) else '', flush=True)
+    return results
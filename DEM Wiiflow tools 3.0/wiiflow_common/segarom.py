@@ -0,0 +1,197 @@
+"""Sega cartridge headers: Genesis/Mega Drive, Master System and Game Gear.
+
+Genesis ROMs have a text header at 0x100:
+
+  0x100  console name ("SEGA GENESIS", "SEGA MEGA DRIVE")
+  0x120  domestic (Japanese) title, 48 characters
+  0x150  overseas title, 48 characters
+  0x180  serial ("GM MK-1079 -00": type, product code, revision)
+  0x18E  checksum
+  0x1F0  regions (J, U, E or a hex digit)
+
+A header whose console name or serial isn't plain text is marked as damaged.
+SMD files (from old copiers) have a 512 byte header of their own and the game
+interleaved in 16 KB blocks, so their Sega header can't be read at all; they
+are marked too, since the DATs list the plain .md/.bin dump.
+
+Master System and Game Gear ROMs end their first 8, 16 or 32 KB with a "TMR
+SEGA" header (at 0x1FF0, 0x3FF0 or 0x7FF0) holding the product code in BCD,
+the region (which also tells a Master System game from a Game Gear one) and
+the ROM size.
+
+The tools keep these games zipped, so probe() decompresses only the start of
+the ROM inside the zip: 512 bytes for a Genesis game, at most 32 KB for the
+others. Nothing is extracted to disk. The product code of the Genesis serial
+("MK-1079") and the Master System/Game Gear product number ("7001") are what
+the Sega DATs list as the serial ("MK-1079-00", "MK-7001"), so serials() feeds
+them to datindex.identify_games(), which matches them by product code
+(datindex.sega_serial_keys()). The overseas title can be matched to the names
+list exactly, both before find_best_match() is tried.
+"""
+import os
+import re
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+GENESIS_HEADER_END = 0x200
+TMR_OFFSETS = (0x7FF0, 0x3FF0, 0x1FF0)
+TMR_SIGNATURE = b'TMR SEGA'
+PROBE_WORKERS = 8
+
+ROM_EXTENSIONS = ('.md', '.gen', '.bin', '.smd', '.sms', '.gg')
+
+SMD_HEADER_SIZE = 512
+SMD_BLOCK_SIZE = 16 * 1024
+# Type ("GM" for a game), product code, then an optional revision
+GENESIS_SERIAL = re.compile(r'^[A-Z]{2} *(.*?\d.*?)(?: *-[0-9A-Z]{1,2})?$')
+
+TMR_REGIONS = {
+    0x3: ('Master System', 'Japan'),
+    0x4: ('Master System', 'Export'),
+    0x5: ('Game Gear', 'Japan'),
+    0x6: ('Game Gear', 'Export'),
+    0x7: ('Game Gear', 'International'),
+}
+TMR_SIZES = {
+    0xA: 8, 0xB: 16, 0xC: 32, 0xD: 48, 0xE: 64, 0xF: 128, 0x0: 256, 0x1: 512, 0x2: 1024,
+}
+GENESIS_REGIONS = {'J': 'Japan', 'U': 'USA', 'E': 'Europe'}
+
+
+def _text(raw):
+    return ' '.join(raw.decode('latin-1').replace('\0', ' ').split())
+
+
+def _bcd(byte):
+    return (byte >> 4) * 10 + (byte & 0x0F)
+
+
+def _printable(raw):
+    return all(byte == 0 or 0x20 <= byte < 0x7F for byte in raw)
+
+
+def _is_smd(head, size, name):
+    if name.lower().endswith('.smd'):
+        return True
+    # The copier header has 0xAA 0xBB at byte 8 and the game follows in 16 KB blocks
+    return head[8:10] == b'\xaa\xbb' and size % SMD_BLOCK_SIZE == SMD_HEADER_SIZE and not _is_genesis(head)
+
+
+def _is_genesis(head):
+    # A few carts start the console name with a space
+    return head[0x100:0x104] == b'SEGA' or head[0x101:0x105] == b'SEGA'
+
+
+def _read_rom_head(f):
+    head = f.read(GENESIS_HEADER_END)
+    if not _is_genesis(head):
+        # Read on up to the last place a TMR SEGA header can be
+        head += f.read(TMR_OFFSETS[0] + 16 - len(head))
+    return head
+
+
+def read_head(path):
+    """Returns (first bytes holding the header, ROM size, ROM name), from the ROM inside a zip for a .zip."""
+    if not path.lower().endswith('.zip'):
+        with open(path, 'rb') as f:
+            return _read_rom_head(f), os.fstat(f.fileno()).st_size, path
+    with zipfile.ZipFile(path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        if not members:
+            raise ValueError("empty zip")
+        info = next((info for info in members if info.filename.lower().endswith(ROM_EXTENSIONS)), members[0])
+        with archive.open(info) as member:
+            return _read_rom_head(member), info.file_size, info.filename
+
+
+def _genesis_header(head, result):
+    result['system'] = 'Genesis'
+    result['title'] = _text(head[0x150:0x180]) or _text(head[0x120:0x150]) or None
+    result['domestic_title'] = _text(head[0x120:0x150]) or None
+    serial = GENESIS_SERIAL.match(_text(head[0x180:0x18E]))
+    result['serial'] = serial.group(1) if serial else None
+    result['checksum'] = f'{struct.unpack(">H", head[0x18E:0x190])[0]:04x}'
+    codes = _text(head[0x1F0:0x1F3]).replace(' ', '')
+    regions = [GENESIS_REGIONS[c] for c in codes if c in GENESIS_REGIONS]
+    if not regions and codes:
+        # Newer carts use one hex digit: 1 Japan, 4 USA, 8 Europe
+        try:
+            bits = int(codes[0], 16)
+            regions = [name for bit, name in ((1, 'Japan'), (4, 'USA'), (8, 'Europe')) if bits & bit]
+        except ValueError:
+            pass
+    result['region'] = ', '.join(regions) or None
+    # Unlicensed carts often leave the serial blank, but a real header is always plain text
+    result['valid'] = len(head) >= GENESIS_HEADER_END and _printable(head[0x100:0x110]) and _printable(head[0x180:0x18E])
+    if not result['valid']:
+        result['problem'] = "the Genesis header is damaged, the dump may be bad"
+        # Don't let garbled text be matched as a title or serial
+        result['title'] = result['domestic_title'] = result['serial'] = None
+
+
+def _tmr_header(head, result):
+    for offset in TMR_OFFSETS:
+        header = head[offset:offset + 16]
+        if header[:8] != TMR_SIGNATURE or len(header) < 16:
+            continue
+        system, region = TMR_REGIONS.get(header[0xF] >> 4, (None, None))
+        product = (header[0xE] >> 4) * 10000 + _bcd(header[0xD]) * 100 + _bcd(header[0xC])
+        result['system'] = system
+        result['region'] = region
+        result['serial'] = str(product) if product else None
+        result['checksum'] = f'{struct.unpack("<H", header[0xA:0xC])[0]:04x}'
+        result['rom_kb'] = TMR_SIZES.get(header[0xF] & 0x0F)
+        result['valid'] = system is not None
+        if not result['valid']:
+            result['problem'] = "the TMR SEGA header has an unknown region, the dump may be bad"
+        return
+
+
+def probe(path):
+    """Reads the header of one Sega ROM, zipped or not. Returns a dict:
+
+    system ('Genesis', 'Master System', 'Game Gear' or None), title and
+    domestic_title (Genesis only), serial (the product code, as the DATs list
+    it), region, checksum (as stored in the
+    header), rom_kb (Master System and Game Gear only), valid and problem
+    (None or a short description).
+    """
+    result = {'path': path, 'system': None, 'title': None, 'domestic_title': None, 'serial': None,
+              'region': None, 'checksum': None, 'rom_kb': None, 'valid': False, 'problem': None}
+    try:
+        head, size, name = read_head(path)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        result['problem'] = f"unreadable ({getattr(e, 'strerror', None) or e})"
+        return result
+    if _is_smd(head, size, name):
+        result['system'] = 'Genesis'
+        result['problem'] = "an interleaved SMD copier dump, convert it to .md to have it identified"
+    elif _is_genesis(head):
+        _genesis_header(head, result)
+    else:
+        # Japanese Master System games often have no TMR SEGA header, which is fine
+        _tmr_header(head, result)
+    return result
+
+
+def probe_folder(folder, game_files, workers=PROBE_WORKERS):
+    """Probes game_files (names in folder) on a few threads. Returns {game file: probe result}.
+
+    ROMs with a damaged header are printed.
+    """
+    if not game_files:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(game_files)))) as pool:
+        results = dict(zip(game_files, pool.map(probe, [os.path.join(folder, f) for f in game_files])))
+    for game_file, result in results.items():
+        if result['problem']:
+            print(f"Check '{game_file}': {result['problem']}.")
+    return results
+
+
+def serials(results):
+    """Returns {game file: serial} for the probed ROMs with a good header and a serial."""
+    return {game_file: result['serial'] for game_file, result in results.items()
+            if result['valid'] and result['serial']}
+
@@ -0,0 +1,138 @@
+"""SNES ROM headers: copier headers and the cartridge's internal header.
+
+Some SNES dumps start with a 512 byte header added by the copier that made
+them (Super Wild Card, Pro Fighter, ...). It isn't part of the game, so the
+No-Intro DATs list the CRC of the ROM without it. A ROM is always a multiple
+of 1 KB, so a file that is 512 bytes past one has a copier header.
+
+The cartridge's own header sits at the end of the first bank, which is at a
+different place for each memory map:
+
+  LoROM    0x7FC0
+  HiROM    0xFFC0
+  ExHiROM  0x40FFC0
+
+(plus 512 with a copier header). It holds the 21 character internal title,
+the map mode, the region, and a checksum with its complement, which always
+add up to 0xFFFF. probe() reads the 64 bytes at each of those places and
+keeps the one that looks most like a real header, so it reads a few hundred
+bytes per ROM and a whole folder is probed in a moment.
+
+copier_header_size() is what romhash.hash_files() uses to leave the copier
+header out of the CRC, MD5 and SHA-1 it looks up in the DATs.
+"""
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+COPIER_HEADER_SIZE = 512
+HEADER_SIZE = 64
+PROBE_WORKERS = 8
+
+# Where the header is for each memory map, and the low bits of the map mode
+# byte that go with it
+MAPPINGS = (
+    ('LoROM', 0x7FC0, (0x0, 0x2, 0x3)),
+    ('HiROM', 0xFFC0, (0x1,)),
+    ('ExHiROM', 0x40FFC0, (0x5,)),
+)
+
+REGIONS = {
+    0x00: 'Japan', 0x01: 'USA', 0x02: 'Europe', 0x03: 'Sweden', 0x04: 'Finland',
+    0x05: 'Denmark', 0x06: 'France', 0x07: 'Netherlands', 0x08: 'Spain',
+    0x09: 'Germany', 0x0A: 'Italy', 0x0B: 'China', 0x0C: 'Indonesia',
+    0x0D: 'Korea', 0x0F: 'Canada', 0x10: 'Brazil', 0x11: 'Australia',
+}
+
+
+def copier_header_size(head, size):
+    """Returns how many bytes of copier header a ROM of this size starts with (512 or 0).
+
+    head (the first bytes of the file) isn't needed for SNES ROMs; it is there
+    so this fits romhash.hash_files(header_size=...).
+    """
+    return COPIER_HEADER_SIZE if size % 1024 == COPIER_HEADER_SIZE else 0
+
+
+def _score(header, mapping_bits):
+    """How much 64 bytes look like an internal header. 0 means not at all."""
+    if len(header) < HEADER_SIZE:
+        return 0
+    score = 0
+    complement, checksum = struct.unpack('<HH', header[0x1C:0x20])
+    if complement ^ checksum == 0xFFFF:
+        score += 4
+    map_mode = header[0x15]
+    if map_mode & 0xE0 == 0x20 and map_mode & 0x0F in mapping_bits:
+        score += 2
+    if all(0x20 <= byte < 0x7F or 0xA1 <= byte <= 0xDF for byte in header[:21]):
+        score += 1
+    reset_vector = struct.unpack('<H', header[0x3C:0x3E])[0]
+    if reset_vector >= 0x8000:
+        score += 1
+    return score
+
+
+def _title(raw):
+    # Japanese titles use half width katakana (JIS X 0201), which shift_jis decodes
+    return ' '.join(raw.decode('shift_jis', errors='replace').split())
+
+
+def probe(path):
+    """Reads the headers of one ROM. Returns a dict:
+
+    copier_header (bytes to skip), mapping ('LoROM', 'HiROM', 'ExHiROM' or
+    None), title, region, checksum, valid (True when the checksum and its
+    complement agree) and problem (None or a short description).
+    """
+    result = {'path': path, 'copier_header': 0, 'mapping': None, 'title': None, 'region': None,
+              'checksum': None, 'valid': False, 'problem': None}
+    try:
+        size = os.path.getsize(path)
+        skip = copier_header_size(b'', size)
+        result['copier_header'] = skip
+        best = None
+        with open(path, 'rb') as f:
+            for name, offset, mapping_bits in MAPPINGS:
+                if skip + offset + HEADER_SIZE > size:
+                    continue
+                f.seek(skip + offset)
+                header = f.read(HEADER_SIZE)
+                score = _score(header, mapping_bits)
+                if score and (best is None or score > best[0]):
+                    best = (score, name, header)
+    except OSError as e:
+        result['problem'] = f"unreadable ({e.strerror or e})"
+        return result
+
+    if best is None or best[0] < 4:
+        result['problem'] = "no SNES header found, the dump may be damaged"
+        return result
+    score, name, header = best
+    complement, checksum = struct.unpack('<HH', header[0x1C:0x20])
+    result['mapping'] = name
+    result['title'] = _title(header[:21]) or None
+    result['region'] = REGIONS.get(header[0x19], f'unknown ({header[0x19]:#04x})')
+    result['checksum'] = f'{checksum:04x}'
+    result['valid'] = complement ^ checksum == 0xFFFF
+    if not result['valid']:
+        result['problem'] = "header checksum and complement don't agree, the dump may be damaged or hacked"
+    return result
+
+
+def probe_folder(folder, game_files, workers=PROBE_WORKERS):
+    """Probes game_files (names in folder) on a few threads. Returns {game file: probe result}.
+
+    ROMs with a copier header are counted and ROMs with a damaged header are printed.
+    """
+    if not game_files:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(game_files)))) as pool:
+        results = dict(zip(game_files, pool.map(probe, [os.path.join(folder, f) for f in game_files])))
+    copier = sum(1 for result in results.values() if result['copier_header'])
+    for game_file, result in results.items():
+        if result['problem']:
+            print(f"Check '{game_file}': {result['problem']}.")
+    if copier:
+        print(f"{copier} of your SNES games have a copier header. It is left out when they are checked against the DATs.")
+    return results
@@ -0,0 +1,92 @@
+"""Where each system's games, covers and BIOS files go on the SD/USB drive.
+
+One entry per "Transfer to SD-USB" script, with the same folders that script
+uses. "Transfer to SD-USB (All Systems).py" reads this table to build a whole
+card in one run.
+"""
+import os
+
+from wiiflow_common import covercache
+
+# tool: the tool's folder, games: its games folder, roms/covers/bios: where
+# they go on the drive (bios is None when the emulator doesn't need one),
+# flatten: subfolders whose contents are copied without the folder itself.
+SYSTEMS = [
+    {'name': 'Atari 2600', 'tool': 'DAT A2600 Wiiflow Tool', 'games': 'a2600 games',
+     'roms': ('wii2600', 'roms'), 'covers': ('Atari', '2600'), 'bios': None},
+    {'name': 'Atari 5200', 'tool': 'DAT A5200 Wiiflow Tool', 'games': 'a5200 games',
+     'roms': ('wiixl', 'software', '5200'), 'covers': ('Atari', '5200'), 'bios': None},
+    {'name': 'Atari 7800', 'tool': 'DAT A7800 Wiiflow Tool', 'games': 'a7800 games',
+     'roms': ('wii7800', 'roms'), 'covers': ('Atari', '7800'), 'bios': None},
+    {'name': 'Atari Lynx', 'tool': 'DAT ATARI LYNX Wiiflow Tool', 'games': 'atari lynx games',
+     'roms': ('ROMS', 'Atari', 'Lynx'), 'covers': ('Atari', 'Lynx'), 'bios': ('wiimednafen',)},
+    {'name': 'ColecoVision', 'tool': 'DAT COLECOVISION Wiiflow Tool', 'games': 'colecovision games',
+     'roms': ('wiicolem', 'roms'), 'covers': ('Colecovision',), 'bios': None},
+    {'name': 'Commodore 64', 'tool': 'DAT COMMODORE64 Wiiflow Tool', 'games': 'commodore64 games',
+     'roms': ('frodo', 'Games'), 'covers': ('C64',), 'bios': None},
+    {'name': 'Game & Watch', 'tool': 'DAT GAME&WATCH Wiiflow tool', 'games': 'game&watch games',
+     'roms': ('ROMS', 'Nintendo', 'GW'), 'covers': ('Nintendo', 'GW'), 'bios': None},
+    {'name': 'Game Boy', 'tool': 'DAT GAMEBOY Wiiflow Tool', 'games': 'gameboy games',
+     'roms': ('ROMS', 'Nintendo', 'GB'), 'covers': ('Nintendo', 'GB'), 'bios': None},
+    {'name': 'Game Boy Advance', 'tool': 'DAT GBA Wiiflow Tool', 'games': 'gba games',
+     'roms': ('ROMS', 'Nintendo', 'GBA'), 'covers': ('Nintendo', 'GBA'), 'bios': None},
+    {'name': 'Game Boy Color', 'tool': 'DAT GBC Wiiflow Tool', 'games': 'gbc games',
+     'roms': ('ROMS', 'Nintendo', 'GBC'), 'covers': ('Nintendo', 'GBC'), 'bios': None},
+    {'name': 'Sega Genesis', 'tool': 'DAT GENESIS Wiiflow Tool', 'games': 'genesis games',
+     'roms': ('ROMS', 'Sega', 'Mega Drive'), 'covers': ('Sega', 'Mega Drive'), 'bios': None},
+    {'name': 'Intellivision', 'tool': 'DAT INTELLIVISION Wiiflow Tool', 'games': 'intellivision games',
+     'roms': ('jzintvWii', 'roms'), 'covers': ('Intellivision',), 'bios': ('jzintvWii', 'bios')},
+    {'name': 'Master System', 'tool': 'DAT MASTER SYSTEM Wiiflow Tool', 'games': 'MasterSystem games',
+     'roms': ('ROMS', 'Sega', 'Master System'), 'covers': ('Sega', 'Master System'), 'bios': None},
+    {'name': 'Nintendo 64', 'tool': 'DAT N64 Wiiflow Tool', 'games': 'n64 games',
+     'roms': ('not64', 'roms'), 'covers': ('Nintendo', 'N64'), 'bios': None},
+    {'name': 'Neo Geo Pocket Color', 'tool': 'DAT NEO POCKET COLOR Wiiflow Tool', 'games': 'pocket color games',
+     'roms': ('ROMS', 'NEO', 'Neo Pocket', 'Color'), 'covers': ('NEO', 'Neo Pocket', 'Color'), 'bios': None},
+    {'name': 'NES', 'tool': 'DAT NES Wiiflow Tool', 'games': 'nes games',
+     'roms': ('ROMS', 'Nintendo', 'NES'), 'covers': ('Nintendo', 'NES'), 'bios': None},
+    {'name': 'PlayStation', 'tool': 'DAT PS1 Wiiflow Tool', 'games': 'ps1 games',
+     'roms': ('wiisxrx', 'isos'), 'covers': ('PlayStation',), 'bios': ('wiisxrx', 'bios'), 'flatten': ('bin',)},
+    {'name': 'Sega Game Gear', 'tool': 'DAT SEGA GAME GEAR Wiiflow Tool', 'games': 'game gear games',
+     'roms': ('ROMS', 'Sega', 'Game Gear'), 'covers': ('Sega', 'Game Gear'), 'bios': None},
+    {'name': 'Sega CD', 'tool': 'DAT SEGA-CD Wiiflow Tool', 'games': 'sega-cd games',
+     'roms': ('ROMS', 'Sega', 'Mega CD'), 'covers': ('Sega', 'Mega CD'), 'bios': ('genplus', 'bios')},
+    {'name': 'SNES', 'tool': 'DAT SNES Wiiflow Tool', 'games': 'snes games',
+     'roms': ('ROMS', 'Nintendo', 'SNES'), 'covers': ('Nintendo', 'SNES'), 'bios': None},
+    {'name': 'TurboGrafx 16', 'tool': 'DAT TURBOGRAFX 16 Wiiflow Tool', 'games': 'turbografx 16 games',
+     'roms': ('ROMS', 'NEC', 'PCE'), 'covers': ('NEC', 'PCE'), 'bios': None},
+    {'name': 'Virtual Boy', 'tool': 'DAT VIRTUAL BOY Wiiflow Tool', 'games': 'virtual boy games',
+     'roms': ('ROMS', 'Nintendo', 'VB'), 'covers': ('Nintendo', 'VB'), 'bios': None},
+    {'name': 'WonderSwan Color', 'tool': 'DAT WONDERSWAN COLOR Wiiflow Tool', 'games': 'wonderswan color games',
+     'roms': ('ROMS', 'WonderSwan', 'Color'), 'covers': ('WonderSwan', 'Color'), 'bios': None},
+]
+
+COVERS_FOLDER = "renamed cover art"
+BIOS_FOLDER = "bios"
+
+
+def art_folder(system):
+    """Returns the folder a system's DAT tool reads the downloaded covers from.
+
+    It is always named like the games folder: "nes games" -> "nes cover art".
+    """
+    return system['games'][:-len('games')] + 'cover art'
+
+
+def system_transfers(system, tools_folder, destination_drive, options, covers=True, bios=True):
+    """Returns the transfers (for transfer.transfer_all()) that put one system on the drive.
+
+    BIOS folders are always copied in full and never cleaned up, because
+    some of them (wiimednafen) are shared with other emulators.
+    """
+    tool_folder = os.path.join(tools_folder, system['tool'])
+    flatten = system.get('flatten', ())
+    transfers = [(os.path.join(tool_folder, system['games']),
+                  os.path.join(destination_drive, *system['roms']), options, flatten)]
+    if covers:
+        destination_cover_art_path = os.path.join(destination_drive, 'wiiflow', 'boxcovers', *system['covers'])
+        transfers.append((os.path.join(tool_folder, COVERS_FOLDER), destination_cover_art_path, options, flatten))
+        transfers.extend(covercache.cover_cache_transfers(tool_folder, destination_cover_art_path, options))
+    if bios and system['bios']:
+        transfers.append((os.path.join(tool_folder, BIOS_FOLDER),
+                          os.path.join(destination_drive, *system['bios']), None, flatten))
+    return transfers
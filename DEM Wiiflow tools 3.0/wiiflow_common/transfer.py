@@ -0,0 +1,485 @@
+"""Copy engine used by every "Transfer to SD-USB" script.
+
+A transfer is done in two steps. plan_folder_copy() scans the source folder
+once and lists every folder to create and every file to copy. copy_files() then
+runs that plan: small files (covers, cartridge ROMs) are written by a bounded
+thread pool, while large files (PS1 bins, Sega CD images) are copied one at a
+time by largefile.py, with a progress line, so they don't fight each other for
+the card.
+
+Writes follow a fixed order: every folder is created first, then each folder's
+files, sorted by name, are cut into a few contiguous runs, one per writer, and
+each writer writes its run in order. The pool stays busy even when almost
+everything goes to one folder, while neighbouring files are still mostly
+written one after the other instead of in whatever order the threads get to
+them.
+
+In sync mode sync_plan() first drops every file the card already has (same
+size and mtime, or same contents when checksums are asked for), so updating a
+card only writes what changed. It can also remove files from the card that are
+gone from the source folder.
+
+In verify mode every copied file is read back from the card and compared with
+the source, see verification.py.
+
+The scripts queue all their transfers and hand them to transfer_all(), which
+plans every folder first and runs the pre-flight check (preflight.py) on the
+whole set, so a transfer that can't fit is refused before anything is copied.
+The folder plans are then merged into one (merge_plans()) and copied in a
+single run, so ROMs, covers and BIOS files, or several whole systems, share
+the same pool of writers.
+
+Finished files are written to a journal (journal.py) as they complete, so a
+transfer cut short by an unplugged drive picks up where it stopped next time.
+
+Every step records its timings in a metrics dict (metrics.py), saved as
+"transfer metrics.json" next to the source folders after each transfer.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from wiiflow_common import journal, largefile, metrics, preflight, verification
+
+COPY_WORKERS = 8
+LARGE_FILE_SIZE = 32 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# FAT32 stores file times to 2 seconds, and stores them in local time, so a
+# file can also look exactly one hour off after a daylight saving change.
+MTIME_WINDOW_NS = 2_000_000_000
+DST_SHIFT_NS = 3600 * 1_000_000_000
+
+
+def ask_transfer_options():
+    """Asks whether to do a full copy or only copy what changed."""
+    options = {'sync': False, 'checksum': False, 'delete_extra': False, 'verify': False}
+    answer = input("Only copy new or changed files to the SD/USB drive (sync mode)? (yes/no): ").strip().lower()
+    if answer == 'yes':
+        options['sync'] = True
+        answer = input("Compare file contents too? Slower, but catches files that changed without changing size or date (yes/no): ").strip().lower()
+        options['checksum'] = answer == 'yes'
+        answer = input("Delete files on the SD/USB drive that are no longer in your folders? (yes/no): ").strip().lower()
+        options['delete_extra'] = answer == 'yes'
+    answer = input("Verify every file after copying it? Catches bad SD cards, costs one extra read of the copies (yes/no): ").strip().lower()
+    options['verify'] = answer == 'yes'
+    return options
+
+
+def _timed_stat(path, transfer_metrics):
+    start = time.perf_counter()
+    info = os.stat(path)
+    metrics.add_call(transfer_metrics, 'stat', time.perf_counter() - start)
+    return info
+
+
+def _timed_makedirs(folder, transfer_metrics):
+    start = time.perf_counter()
+    os.makedirs(folder, exist_ok=True)
+    metrics.add_call(transfer_metrics, 'makedirs', time.perf_counter() - start)
+
+
+def plan_folder_copy(source_folder, destination_folder, flatten_folders=(), transfer_metrics=None):
+    """Lists the folders and files needed to copy source_folder into destination_folder.
+
+    Top level subfolders named in flatten_folders are not recreated, their
+    contents land directly in destination_folder (the PS1 'bin' folder).
+    """
+    flatten_folders = {name.lower() for name in flatten_folders}
+    destination_folder = os.path.normpath(destination_folder)
+    plan = {'destination': destination_folder, 'folders': [destination_folder], 'jobs': [], 'skipped': 0, 'extra': []}
+
+    def add_tree(source_root, destination_root):
+        for root, dirs, files in os.walk(source_root):
+            target = os.path.join(destination_root, os.path.relpath(root, source_root))
+            plan['folders'].append(os.path.normpath(target))
+            for name in files:
+                add_file(os.path.join(root, name), os.path.join(target, name))
+
+    def add_file(source, destination):
+        info = _timed_stat(source, transfer_metrics)
+        plan['jobs'].append({
+            'source': source,
+            'destination': os.path.normpath(destination),
+            'size': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+        })
+
+    with os.scandir(source_folder) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name.lower() in flatten_folders:
+                    add_tree(entry.path, destination_folder)
+                else:
+                    add_tree(entry.path, os.path.join(destination_folder, entry.name))
+            else:
+                add_file(entry.path, os.path.join(destination_folder, entry.name))
+
+    return plan
+
+
+def file_digest(path):
+    """Returns the SHA-1 of a file, read in 1 MB chunks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _same_mtime(a, b):
+    difference = abs(a - b)
+    return difference <= MTIME_WINDOW_NS or abs(difference - DST_SHIFT_NS) <= MTIME_WINDOW_NS
+
+
+def _scan_destination(destination_folder, transfer_metrics=None):
+    """Returns {path: (size, mtime_ns)} for every file already under destination_folder."""
+    existing = {}
+    for root, dirs, files in os.walk(destination_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                info = _timed_stat(path, transfer_metrics)
+            except OSError:
+                continue
+            existing[os.path.normpath(path)] = (info.st_size, info.st_mtime_ns)
+    return existing
+
+
+def _same_contents(job):
+    try:
+        return file_digest(job['source']) == file_digest(job['destination'])
+    except OSError:
+        return False
+
+
+def sync_plan(plan, checksum=False, delete_extra=False, workers=COPY_WORKERS, transfer_metrics=None):
+    """Drops files the card already has from a plan, and lists card files to delete."""
+    existing = _scan_destination(plan['destination'], transfer_metrics)
+    candidates = []
+    jobs = []
+
+    plan['existing'] = {path: size for path, (size, mtime_ns) in existing.items()}
+
+    for job in plan['jobs']:
+        found = existing.pop(job['destination'], None)
+        if found is None or found[0] != job['size']:
+            jobs.append(job)
+        elif checksum:
+            candidates.append(job)
+        elif not _same_mtime(found[1], job['mtime_ns']):
+            jobs.append(job)
+
+    if candidates:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for job, same in zip(candidates, pool.map(_same_contents, candidates)):
+                if not same:
+                    jobs.append(job)
+
+    plan['skipped'] = len(plan['jobs']) - len(jobs)
+    plan['jobs'] = jobs
+    plan['extra'] = sorted(existing) if delete_extra else []
+    return plan
+
+
+def remove_extra_files(plan):
+    """Deletes the card files sync_plan() found that are gone from the source."""
+    removed = 0
+    for path in plan['extra']:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            print(f"Failed to remove {path}: {e}")
+
+    # Drop folders that only held removed files, deepest first
+    kept = set(plan['folders'])
+    for destination in plan.get('destinations', [plan['destination']]):
+        for root, dirs, files in os.walk(destination, topdown=False):
+            root = os.path.normpath(root)
+            if root not in kept and not os.listdir(root):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+    return removed
+
+
+def new_stats():
+    """Returns an empty set of transfer counters."""
+    return {'files': 0, 'bytes': 0, 'seconds': 0.0, 'failed': [], 'skipped': 0, 'removed': 0,
+            'verified': 0, 'retried': []}
+
+
+def _copy_small_file(job, verify=False, transfer_metrics=None):
+    start = time.perf_counter()
+    if not verify:
+        shutil.copy2(job['source'], job['destination'])
+        metrics.add_file(transfer_metrics, job['size'], time.perf_counter() - start)
+        return
+    source_digest = verification.copy_and_hash(job['source'], job['destination'])
+    copied = time.perf_counter()
+    verification.check_copy(job, source_digest)
+    metrics.add_file(transfer_metrics, job['size'], copied - start, time.perf_counter() - copied)
+
+
+def _stream_large_file(job, verify=False, transfer_metrics=None):
+    start = time.perf_counter()
+    digest = verification.new_digest() if verify else None
+    largefile.copy_large_file(job['source'], job['destination'], digest=digest)
+    shutil.copystat(job['source'], job['destination'])
+    copied = time.perf_counter()
+    if verify:
+        verification.check_copy(job, digest.hexdigest())
+    metrics.add_file(transfer_metrics, job['size'], copied - start, time.perf_counter() - copied)
+
+
+def _copy_file(job, verify=False, transfer_metrics=None):
+    if job['size'] < LARGE_FILE_SIZE:
+        _copy_small_file(job, verify, transfer_metrics)
+    else:
+        _stream_large_file(job, verify, transfer_metrics)
+
+
+def _write_order(job):
+    folder, name = os.path.split(job['destination'])
+    return folder.lower(), name.lower()
+
+
+def copy_files(plan, workers=COPY_WORKERS, verify=False, transfer_journal=None, transfer_metrics=None):
+    """Runs a copy plan and returns its stats. A failed file never stops the others.
+
+    Each finished file is added to transfer_journal, and timings to
+    transfer_metrics, when they are given.
+
+    With verify, each file is hashed while it is copied and checked against the
+    card right after, in the same worker, so checks overlap with other copies.
+    Files that fail are copied again up to verification.VERIFY_RETRIES times.
+    """
+    stats = new_stats()
+    stats['skipped'] = plan['skipped']
+    start = time.perf_counter()
+
+    # Parents sort before their subfolders
+    with metrics.phase(transfer_metrics, 'makedirs'):
+        for folder in sorted(set(plan['folders'])):
+            _timed_makedirs(folder, transfer_metrics)
+
+    jobs = sorted(plan['jobs'], key=_write_order)
+    small_jobs = [job for job in jobs if job['size'] < LARGE_FILE_SIZE]
+    large_jobs = [job for job in jobs if job['size'] >= LARGE_FILE_SIZE]
+
+    def record(job, error):
+        if error is None:
+            stats['files'] += 1
+            stats['bytes'] += job['size']
+            if verify:
+                stats['verified'] += 1
+            if transfer_journal is not None:
+                journal.record_complete(transfer_journal, job)
+        else:
+            stats['failed'].append((job, error))
+            print(f"Failed to copy {job['source']}: {error}")
+
+    # Each folder gets a share of the writers in proportion to its files, and
+    # each of its writers a contiguous run of the name sorted files.
+    by_folder = {}
+    for job in small_jobs:
+        by_folder.setdefault(os.path.dirname(job['destination']), []).append(job)
+    runs = []
+    for folder_jobs in by_folder.values():
+        writers = max(1, min(len(folder_jobs), round(workers * len(folder_jobs) / len(small_jobs))))
+        run_size = -(-len(folder_jobs) // writers)
+        runs.extend(folder_jobs[i:i + run_size] for i in range(0, len(folder_jobs), run_size))
+
+    record_lock = threading.Lock()
+
+    def write_run(run_jobs):
+        for job in run_jobs:
+            try:
+                _copy_small_file(job, verify, transfer_metrics)
+                error = None
+            except Exception as e:
+                error = e
+            with record_lock:
+                record(job, error)
+
+    if small_jobs:
+        with metrics.phase(transfer_metrics, 'copy small files'):
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(runs)))) as pool:
+                for future in as_completed([pool.submit(write_run, run_jobs) for run_jobs in runs]):
+                    future.result()
+
+    with metrics.phase(transfer_metrics, 'copy large files'):
+        for job in large_jobs:
+            try:
+                _stream_large_file(job, verify, transfer_metrics)
+            except Exception as e:
+                record(job, e)
+            else:
+                record(job, None)
+
+    if verify:
+        for attempt in range(1, verification.VERIFY_RETRIES + 1):
+            if not stats['failed']:
+                break
+            failed = stats['failed']
+            stats['failed'] = []
+            for job, error in failed:
+                print(f"Copying {job['source']} again (attempt {attempt} of {verification.VERIFY_RETRIES})")
+                try:
+                    with metrics.phase(transfer_metrics, 'retry'):
+                        _copy_file(job, verify, transfer_metrics)
+                except Exception as e:
+                    record(job, e)
+                else:
+                    record(job, None)
+                    stats['retried'].append(job)
+
+    if plan['extra']:
+        with metrics.phase(transfer_metrics, 'remove extra files'):
+            stats['removed'] = remove_extra_files(plan)
+
+    stats['seconds'] = time.perf_counter() - start
+    metrics.add_phase(transfer_metrics, 'copy', stats['seconds'])
+    return stats
+
+
+def print_transfer_summary(stats):
+    """Prints how much was copied and how fast."""
+    seconds = max(stats['seconds'], 1e-6)
+    megabytes = stats['bytes'] / (1024 * 1024)
+    print(f"Copied {stats['files']} files ({megabytes:.1f} MB) in {stats['seconds']:.1f}s"
+          f" - {megabytes / seconds:.1f} MB/s, {stats['files'] / seconds:.1f} files/s")
+    if stats['verified']:
+        print(f"Verified {stats['verified']} files against the drive.")
+    if stats['skipped']:
+        print(f"Skipped {stats['skipped']} files that were already up to date.")
+    if stats['removed']:
+        print(f"Removed {stats['removed']} files that are no longer in the source folder.")
+
+
+def prepare_transfer(source_folder, destination_folder, options=None, flatten_folders=(), transfer_metrics=None):
+    """Plans the transfer of one folder. Returns the plan, or None if it can't be done."""
+    options = options or {}
+    if not os.path.exists(source_folder):
+        print(f"The source folder {source_folder} does not exist.")
+        return None
+
+    try:
+        with metrics.phase(transfer_metrics, 'plan'):
+            plan = plan_folder_copy(source_folder, destination_folder, flatten_folders, transfer_metrics)
+        if options.get('sync'):
+            with metrics.phase(transfer_metrics, 'sync'):
+                sync_plan(plan, options.get('checksum', False), options.get('delete_extra', False),
+                          transfer_metrics=transfer_metrics)
+        else:
+            with metrics.phase(transfer_metrics, 'scan destination'):
+                existing = _scan_destination(plan['destination'], transfer_metrics)
+            plan['existing'] = {path: size for path, (size, mtime_ns) in existing.items()}
+    except Exception as e:
+        print(f'An error occurred while transferring {source_folder}: {e}')
+        return None
+
+    plan['source'] = source_folder
+    plan['options'] = options
+    return plan
+
+
+def merge_plans(plans):
+    """Combines several folder plans into one copy plan.
+
+    A card file planned twice is only copied once, from the first plan that
+    lists it.
+    """
+    merged = {'destination': plans[0]['destination'], 'destinations': [], 'folders': [], 'jobs': [],
+              'skipped': 0, 'extra': []}
+    claimed = {}
+    for plan in plans:
+        merged['folders'].extend(plan['folders'])
+        merged['skipped'] += plan['skipped']
+        merged['extra'].extend(plan['extra'])
+        if plan['extra']:
+            merged['destinations'].append(plan['destination'])
+        for job in plan['jobs']:
+            first = claimed.setdefault(job['destination'], job)
+            if first is job:
+                merged['jobs'].append(job)
+            elif first['source'] != job['source']:
+                print(f"Skipping {job['source']}, {first['source']} is already going to {job['destination']}")
+    return merged
+
+
+def transfer_all(transfers, report_folder=None):
+    """Runs a list of (source_folder, destination_folder[, options[, flatten_folders]]) transfers.
+
+    Every folder is planned and checked before the first file is copied, then
+    all of them are copied in one run. The journal and verification report are
+    kept in report_folder, by default the folder holding the first source
+    folder. Returns the stats, or None when nothing was copied.
+    """
+    transfer_metrics = metrics.new_metrics()
+    plans = []
+    for transfer in transfers:
+        source_folder, destination_folder, *rest = transfer
+        options = rest[0] if rest else None
+        flatten_folders = rest[1] if len(rest) > 1 else ()
+        plan = prepare_transfer(source_folder, destination_folder, options, flatten_folders, transfer_metrics)
+        if plan is not None:
+            plans.append(plan)
+    if not plans:
+        return None
+
+    if report_folder is None:
+        report_folder = os.path.dirname(os.path.abspath(plans[0]['source']))
+    transfer_journal = journal.open_journal(report_folder)
+    resumed = sum(journal.skip_completed(transfer_journal, plan) for plan in plans)
+    if resumed:
+        print(f"Resuming an interrupted transfer, {resumed} files are already on the drive.")
+
+    with metrics.phase(transfer_metrics, 'pre-flight'):
+        ready = preflight.check_plans(plans)
+    if not ready:
+        return None
+
+    verify = any(plan['options'].get('verify') for plan in plans)
+    try:
+        stats = copy_files(merge_plans(plans), verify=verify, transfer_journal=transfer_journal,
+                           transfer_metrics=transfer_metrics)
+    except Exception as e:
+        print(f'An error occurred while transferring {plans[0]["source"]}: {e}')
+        journal.close_journal(transfer_journal, finished=False)
+        return None
+    journal.close_journal(transfer_journal, finished=not stats['failed'])
+
+    print_transfer_summary(stats)
+    try:
+        metrics.write_metrics(transfer_metrics, report_folder)
+    except OSError as e:
+        print(f"Could not save the transfer metrics: {e}")
+    if verify:
+        try:
+            report_path = verification.write_report(plans, stats, report_folder)
+            print(f"Verification report written to {report_path}")
+        except OSError as e:
+            print(f"Could not write the verification report: {e}")
+
+    failed = {id(job) for job, error in stats['failed']}
+    for plan in plans:
+        count = sum(1 for job in plan['jobs'] if id(job) in failed)
+        if count:
+            print(f"{count} file(s) from {plan['source']} could not be transferred.")
+        else:
+            print(f"Contents of {plan['source']} have been successfully transferred to {plan['destination']}")
+    return stats
+
+
+def transfer_folder_contents(source_folder, destination_folder, options=None, flatten_folders=()):
+    """Transfers the contents of a folder to the destination.
+
+    options comes from ask_transfer_options(); without it everything is copied.
+    """
+    return transfer_all([(source_folder, destination_folder, options, flatten_folders)])
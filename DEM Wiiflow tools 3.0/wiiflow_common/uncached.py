@@ -0,0 +1,98 @@
+"""Reading a file from the drive itself instead of from the file cache.
+
+Right after a transfer every file that was written is still in memory, so a
+normal read "checks" the copy in RAM, not on the card. read_chunks() gets
+around that:
+
+  - Windows: the file is opened with FILE_FLAG_NO_BUFFERING, so every read
+    goes to the drive. Such reads have to land in sector aligned memory, so
+    they go through a page aligned mmap buffer.
+  - Linux: the file is flushed and its pages are dropped from the page cache
+    with posix_fadvise(DONTNEED) before it is read.
+
+Anywhere else (macOS, BSDs) there is no dependable way, so the file is read
+normally and bypass_supported() returns False, so callers can say the data may
+have come from memory.
+"""
+import mmap
+import os
+import sys
+
+CHUNK_SIZE = 1024 * 1024  # A multiple of every sector size, as NO_BUFFERING reads need
+
+GENERIC_READ = 0x80000000
+FILE_SHARE_READ = 0x1
+FILE_SHARE_WRITE = 0x2
+OPEN_EXISTING = 3
+FILE_FLAG_NO_BUFFERING = 0x20000000
+FILE_FLAG_SEQUENTIAL_SCAN = 0x08000000
+
+
+def _load_create_file():
+    if os.name != 'nt':
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        create_file = ctypes.WinDLL('kernel32', use_last_error=True).CreateFileW
+    except (ImportError, OSError, AttributeError):
+        return None
+    create_file.argtypes = (wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                            wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE)
+    create_file.restype = wintypes.HANDLE
+    return create_file
+
+
+_create_file = _load_create_file()
+
+
+def bypass_supported():
+    """True when read_chunks() reads from the drive on this system, not from memory."""
+    if os.name == 'nt':
+        return _create_file is not None
+    return sys.platform.startswith('linux') and hasattr(os, 'posix_fadvise')
+
+
+def _open_no_buffering(path):
+    import ctypes
+    import msvcrt
+    handle = _create_file(os.path.abspath(path), GENERIC_READ, FILE_SHARE_READ | FILE_SHARE_WRITE, None,
+                          OPEN_EXISTING, FILE_FLAG_NO_BUFFERING | FILE_FLAG_SEQUENTIAL_SCAN, None)
+    if handle is None or handle == ctypes.c_void_p(-1).value:
+        raise ctypes.WinError(ctypes.get_last_error())
+    fd = msvcrt.open_osfhandle(handle, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    return open(fd, 'rb', buffering=0)
+
+
+def _open_dropping_cache(path):
+    f = open(path, 'rb', buffering=0)
+    try:
+        os.fsync(f.fileno())
+    except OSError:
+        pass
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+    return f
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yields a file's data as memoryviews, read from the drive where the system allows it.
+
+    Each view is only good until the next one is asked for.
+    """
+    if _create_file is not None:
+        f = _open_no_buffering(path)
+    else:
+        f = _open_dropping_cache(path)
+    # mmap memory is page aligned, which NO_BUFFERING reads need. It is left
+    # to the garbage collector, the caller may still hold the last view.
+    view = memoryview(mmap.mmap(-1, chunk_size))
+    with f:
+        while True:
+            count = f.readinto(view)
+            if not count:
+                break
+            yield view[:count]
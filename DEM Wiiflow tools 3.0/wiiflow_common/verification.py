@@ -0,0 +1,92 @@
+"""Verify mode for transfers: checks every copied file against what the card really holds.
+
+The source is hashed while it is being copied, from the same buffer that is
+written, so the source is still only read once. Afterwards only the copy on
+the card is read back and hashed, with uncached.py, so the bytes come from
+the card and not from the copy still in memory. On systems where that isn't
+possible the report says so.
+
+Files that fail are copied again (see VERIFY_RETRIES) and the outcome of each
+transfer is appended to "verification report.txt" next to the source folders.
+"""
+import hashlib
+import os
+import shutil
+import time
+
+from wiiflow_common import uncached
+
+VERIFY_RETRIES = 2
+REPORT_NAME = "verification report.txt"
+CHUNK_SIZE = 1024 * 1024
+
+
+class VerifyError(Exception):
+    """Raised when a copied file does not read back the same as its source."""
+
+
+def new_digest():
+    """Returns the hash object used for verification."""
+    return hashlib.sha1()
+
+
+def copy_and_hash(source_path, destination_path):
+    """Copies a file like shutil.copy2() and returns the SHA-1 of the data that was written."""
+    digest = new_digest()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        while True:
+            count = source.readinto(buffer)
+            if not count:
+                break
+            destination.write(view[:count])
+            digest.update(view[:count])
+    shutil.copystat(source_path, destination_path)
+    return digest.hexdigest()
+
+
+def read_back_digest(path):
+    """Returns the SHA-1 of a file as read back from the drive."""
+    digest = new_digest()
+    for chunk in uncached.read_chunks(path, CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_copy(job, source_digest):
+    """Raises VerifyError when the copy of a job does not match the source digest."""
+    size = os.path.getsize(job['destination'])
+    if size != job['size']:
+        raise VerifyError(f"size on the drive is {size} bytes, expected {job['size']}")
+    if read_back_digest(job['destination']) != source_digest:
+        raise VerifyError("contents on the drive do not match the source")
+
+
+def write_report(plans, stats, report_folder=None):
+    """Appends the verification result of one transfer to the report and returns its path.
+
+    The report goes in report_folder, by default the folder holding the first
+    source folder (the tool's folder).
+    """
+    if report_folder is None:
+        report_folder = os.path.dirname(os.path.abspath(plans[0]['source']))
+    report_path = os.path.join(report_folder, REPORT_NAME)
+    lines = [f"=== {time.strftime('%Y-%m-%d %H:%M:%S')} ==="]
+    lines.extend(f"{plan['source']} -> {plan['destination']}" for plan in plans)
+    lines.append(f"Verified: {stats['verified']} files")
+    if not uncached.bypass_supported():
+        lines.append("Note: this system can't read around its file cache, so the files were read back from "
+                     "memory. This shows they were written without errors, not what the drive holds.")
+    if stats['retried']:
+        lines.append(f"Fixed by copying again: {len(stats['retried'])} files")
+        lines.extend(f"  {job['destination']}" for job in stats['retried'])
+    if stats['failed']:
+        lines.append(f"FAILED: {len(stats['failed'])} files")
+        lines.extend(f"  {job['destination']}: {error}" for job, error in stats['failed'])
+    else:
+        lines.append("All files verified.")
+
+    with open(report_path, 'a', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n\n')
+    return report_path
@@ -0,0 +1,187 @@
+"""Wiiflow cover cache files (.wfc), built on the PC.
+
+The first time Wiiflow shows a cover it converts the PNG into a GX texture and
+saves it in wiiflow/cache as a .wfc file, which is slow on a Wii when there are
+thousands of covers. write_cache_file() makes the same file from a PNG here.
+
+A .wfc file is a 14 byte header followed by the texture with all its mipmaps,
+zlib compressed when the 'zipped' flag is set. The header is Wiiflow's
+SWFCHeader struct as the Wii's compiler lays it out (big endian, bit fields
+from the top bit down, 16 bit fields aligned):
+
+  byte 0      flags: 0x80 new format, 0x40 full cover, 0x20 CMPR texture
+              (otherwise RGB565), 0x10 zipped, 0x08 has a back cover texture
+  bytes 2-5   width / 4, height / 4
+  byte 6      number of mipmaps (max LOD)
+  bytes 8-12  back cover width / 4, height / 4 and max LOD (unused here)
+
+Like Wiiflow, the texture is the cover resized to powers of two (1090x680 box
+art becomes 1024x512), with mipmaps down to 32 pixels.
+
+Needs Pillow (pip install pillow) to read and resize the covers. The CMPR
+encoder is in cmpr.py.
+"""
+import os
+import struct
+import zlib
+
+try:
+    from PIL import Image, ImageChops
+except ImportError:
+    Image = None
+
+MAX_TEXTURE_SIZE = 1024
+MIN_MIP_SIZE = 32
+
+FLAG_NEW_FORMAT = 0x80
+FLAG_FULL = 0x40
+FLAG_CMPR = 0x20
+FLAG_ZIPPED = 0x10
+FLAG_BACK_COVER = 0x08
+
+HEADER_FORMAT = '>BxHHBxHHBx'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def pillow_available():
+    """Returns True when Pillow is installed, printing how to get it when it is not."""
+    if Image is None:
+        print("Building the Wiiflow cover cache needs Pillow. Install it with: pip install pillow")
+        return False
+    return True
+
+
+def _power_of_two(size):
+    upper = 1
+    while upper < size:
+        upper *= 2
+    lower = upper // 2
+    # Round down when the image is only a little bigger than the lower power
+    if lower and size - lower <= upper // 4:
+        return lower
+    return upper
+
+
+def texture_size(width, height):
+    """Returns the texture size Wiiflow uses for a cover of the given size."""
+    return min(_power_of_two(width), MAX_TEXTURE_SIZE), min(_power_of_two(height), MAX_TEXTURE_SIZE)
+
+
+def mipmap_sizes(width, height):
+    """Returns the size of every mipmap level, the full size texture first."""
+    sizes = [(width, height)]
+    while min(width, height) // 2 >= MIN_MIP_SIZE:
+        width //= 2
+        height //= 2
+        sizes.append((width, height))
+    return sizes
+
+
+def pack_header(width, height, max_lod, full=True, cmpr=False, zipped=True):
+    flags = FLAG_NEW_FORMAT
+    if full:
+        flags |= FLAG_FULL
+    if cmpr:
+        flags |= FLAG_CMPR
+    if zipped:
+        flags |= FLAG_ZIPPED
+    return struct.pack(HEADER_FORMAT, flags, width // 4, height // 4, max_lod, 0, 0, 0)
+
+
+def unpack_header(data):
+    """Reads a .wfc header back into a dict, for checking files."""
+    flags, width, height, max_lod, back_width, back_height, back_max_lod = struct.unpack_from(HEADER_FORMAT, data)
+    return {
+        'new_format': bool(flags & FLAG_NEW_FORMAT),
+        'full': bool(flags & FLAG_FULL),
+        'cmpr': bool(flags & FLAG_CMPR),
+        'zipped': bool(flags & FLAG_ZIPPED),
+        'back_cover': bool(flags & FLAG_BACK_COVER),
+        'width': width * 4,
+        'height': height * 4,
+        'max_lod': max_lod,
+    }
+
+
+def encode_rgb565(image):
+    """Encodes an RGB image as a GX RGB565 texture: 4x4 pixel tiles, big endian pixels."""
+    width, height = image.size
+    red, green, blue = image.split()
+    # The two bytes of each pixel, built band by band: rrrrrggg gggbbbbb
+    high = ImageChops.add(red.point(lambda v: v & 0xF8), green.point(lambda v: v >> 5))
+    low = ImageChops.add(green.point(lambda v: (v << 3) & 0xE0), blue.point(lambda v: v >> 3))
+    pixels = Image.merge('LA', (high, low)).tobytes()
+
+    row_bytes = width * 2
+    tiles = []
+    for tile_y in range(0, height, 4):
+        rows = [pixels[(tile_y + line) * row_bytes:(tile_y + line + 1) * row_bytes] for line in range(4)]
+        for x in range(0, row_bytes, 8):
+            for row in rows:
+                tiles.append(row[x:x + 8])
+    return b''.join(tiles)
+
+
+def build_texture(image, encoder=encode_rgb565):
+    """Resizes a cover and returns (width, height, max LOD, texture data with its mipmaps)."""
+    image = image.convert('RGB')
+    width, height = texture_size(*image.size)
+    sizes = mipmap_sizes(width, height)
+    level = image.resize((width, height), Image.LANCZOS)
+    data = []
+    for i, size in enumerate(sizes):
+        if i:
+            level = level.resize(size, Image.BOX)
+        data.append(encoder(level))
+    return width, height, len(sizes) - 1, b''.join(data)
+
+
+def write_cache_file(cover_path, wfc_path, cmpr_encoder=None, zipped=True):
+    """Converts one cover PNG into a Wiiflow cache file.
+
+    cmpr_encoder, when given, encodes each mipmap as a CMPR texture (what
+    Wiiflow uses with texture compression on); otherwise the cache is RGB565.
+    """
+    with Image.open(cover_path) as image:
+        image.load()
+        width, height, max_lod, texture = build_texture(image, cmpr_encoder or encode_rgb565)
+    if zipped:
+        texture = zlib.compress(texture, 6)
+
+    temp_path = wfc_path + '.part'
+    with open(temp_path, 'wb') as f:
+        f.write(pack_header(width, height, max_lod, cmpr=cmpr_encoder is not None, zipped=zipped))
+        f.write(texture)
+    os.replace(temp_path, wfc_path)
+
+
+def decode_rgb565(data, width, height):
+    """Turns a GX RGB565 texture back into an RGB image, to check a cache file on the PC."""
+    row_bytes = width * 2
+    rows = [bytearray(row_bytes) for _ in range(height)]
+    offset = 0
+    for tile_y in range(0, height, 4):
+        for x in range(0, row_bytes, 8):
+            for line in range(4):
+                rows[tile_y + line][x:x + 8] = data[offset:offset + 8]
+                offset += 8
+    packed = b''.join(rows)
+    pixels = bytearray(width * height * 3)
+    for i in range(width * height):
+        value = (packed[i * 2] << 8) | packed[i * 2 + 1]
+        red, green, blue = value >> 11, (value >> 5) & 0x3F, value & 0x1F
+        pixels[i * 3] = (red << 3) | (red >> 2)
+        pixels[i * 3 + 1] = (green << 2) | (green >> 4)
+        pixels[i * 3 + 2] = (blue << 3) | (blue >> 2)
+    return Image.frombytes('RGB', (width, height), bytes(pixels))
+
+
+def read_cache_file(wfc_path):
+    """Returns (header, data) for a .wfc file, with the texture data unzipped."""
+    with open(wfc_path, 'rb') as f:
+        data = f.read()
+    header = unpack_header(data)
+    texture = data[HEADER_SIZE:]
+    if header['zipped']:
+        texture = zlib.decompress(texture)
+    return header, texture